@@ -1,44 +1,181 @@
 """
-Client wrapper for LandingAI's document extraction API
+Async client for LandingAI's document extraction API
 """
 
 import json
 import logging
-import requests
+import httpx
 import base64
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass
 from models import Invoice, Contract, ExtractionMeta, Box, ParseResult
+from config import Settings
+from preprocess import ImagePreprocessor, PreprocessOptions
+from resilience import ADEError, CircuitBreaker, ResilientCaller
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _map_landing_ai_response or DEFAULT_FIELDS_SCHEMA changes, so
+# cached extractions made by the old mapping are not served
+MAPPER_VERSION = "1"
+
+DEFAULT_FIELDS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "invoice_number": {"type": "string", "description": "Invoice number"},
+        "issue_date": {"type": "string", "description": "Invoice date"},
+        "seller_name": {"type": "string", "description": "Vendor/Seller name"},
+        "seller_address": {"type": "string", "description": "Seller address"},
+        "seller_tax_id": {"type": "string", "description": "Seller tax ID"},
+        "client_name": {"type": "string", "description": "Client/Buyer name"},
+        "client_address": {"type": "string", "description": "Client address"},
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "no": {"type": "string"},
+                    "description": {"type": "string", "description": "Item description"},
+                    "qty": {"type": "number", "description": "Quantity"},
+                    "net_price": {"type": "number", "description": "Unit price (before tax)"},
+                    "net_worth": {"type": "number", "description": "Line subtotal (before tax)"},
+                    "vat_percent": {"type": "number", "description": "VAT/tax percentage"},
+                    "gross_worth": {"type": "number", "description": "Line total (after tax) - THIS IS REQUIRED"}
+                }
+            },
+            "description": "Line items"
+        },
+        "summary": {
+            "type": "object",
+            "properties": {
+                "net_worth": {"type": "number", "description": "Subtotal before tax"},
+                "vat_value": {"type": "number", "description": "Total tax amount"},
+                "gross_worth": {"type": "number", "description": "Grand total (after tax) - THIS IS REQUIRED"}
+            },
+            "description": "Summary totals"
+        }
+    }
+}
+
 
 @dataclass
 class ExtractResult:
     document: Dict[str, Any]
     meta: List[ExtractionMeta]
     parse: ParseResult
+    # Sample data from STUB mode, never worth caching
+    stub: bool = False
 
 
-class ADEClient:
+class AsyncADEClient:
+    # Used from async handlers and the bulk runner: the upstream call is
+    # awaited on a pooled httpx.AsyncClient and upload preparation runs off
+    # the event loop
     
-    def __init__(self, api_key: str, mode: str = "ADE"):
+    def __init__(
+        self,
+        api_key: str,
+        mode: str = "ADE",
+        pool_size: int = 10,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        preprocessor: Optional[ImagePreprocessor] = None,
+        caller: Optional[ResilientCaller] = None
+    ):
         self.api_key = api_key
         self.mode = mode
+        self.preprocessor = preprocessor or ImagePreprocessor()
+        self.caller = caller or ResilientCaller()
         self.base_url = "https://api.va.landing.ai/v1/tools"
         self.extract_endpoint = f"{self.base_url}/agentic-document-analysis"
+        self.client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+        self._connections_opened = 0
+        self._requests_sent = 0
+    
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        self.preprocessor.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        connections, requests_sent = self._connections_opened, self._requests_sent
+        return {
+            "mode": self.mode,
+            "requests": requests_sent,
+            "connections_opened": connections,
+            "connection_reuse_rate": round(1 - connections / requests_sent, 4) if requests_sent else 0.0,
+        }
     
-    def parse(self, file_path: str) -> ParseResult:
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        # httpcore reports each new TCP connection through the trace extension
+        if event == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+    
+    async def parse(self, file_path: str) -> ParseResult:
         if self.mode == "STUB":
             return self._parse_stub(file_path)
         else:
-            return self._parse_ade(file_path)
+            return await self._parse_ade(file_path)
     
-    def extract(self, file_path: str, schema: Dict[str, Any], doc_type: str = "invoice") -> ExtractResult:
+    async def extract(self, file_path: str, schema: Dict[str, Any], doc_type: str = "invoice") -> ExtractResult:
         if self.mode == "STUB":
             return self._extract_stub(file_path, schema, doc_type)
         else:
-            return self._extract_ade(file_path, schema, doc_type)
+            return await self._extract_ade(file_path, schema, doc_type)
+    
+    async def parse_extract(
+        self,
+        file_path: str,
+        schema: Dict[str, Any],
+        doc_type: str = "invoice"
+    ) -> Tuple[ParseResult, ExtractResult]:
+        # One upload and one upstream call; the parse view comes from the
+        # same extraction response instead of a second schema-less pass
+        if self.mode == "STUB":
+            return self._parse_extract_stub(file_path, schema, doc_type)
+        result = await self._extract_ade(file_path, schema, doc_type)
+        return result.parse, result
+    
+    async def _parse_ade(self, file_path: str) -> ParseResult:
+        logger.info(f"[ADE] Parsing {file_path}")
+        result = await self._extract_ade(file_path, {}, "document")
+        return result.parse
+    
+    async def _extract_ade(
+        self,
+        file_path: str,
+        schema: Dict[str, Any],
+        doc_type: str
+    ) -> ExtractResult:
+        logger.info(f"[ADE] Extracting {doc_type} from {file_path} with schema")
+        
+        upload = await self.preprocessor.prepare_async(file_path)
+        files_data, data = self._upload_form(upload.content, upload.mime_type, schema)
+        
+        logger.info(f"[ADE] Calling LandingAI endpoint: {self.extract_endpoint}")
+        
+        async def send() -> httpx.Response:
+            self._requests_sent += 1
+            return await self.client.post(
+                self.extract_endpoint,
+                files=files_data,
+                data=data,
+                extensions={"trace": self._trace}
+            )
+        
+        response = await self.caller.acall(send, transport_errors=(httpx.TransportError,))
+        api_response = self._response_json(response)
+        
+        stats = self.stats()
+        logger.info(
+            f"[ADE] API Response received ({stats['connections_opened']} connections "
+            f"for {stats['requests']} requests)"
+        )
+        
+        return self._build_result(api_response, doc_type)
     
     def _parse_stub(self, file_path: str) -> ParseResult:
         logger.info(f"[STUB] Parsing {file_path}")
@@ -47,15 +184,15 @@ class ADEClient:
             markdown="# Document Content\nMocked markdown from document."
         )
     
-    def _parse_ade(self, file_path: str) -> ParseResult:
-        logger.info(f"[ADE] Parsing {file_path}")
-        
-        try:
-            result = self._extract_ade(file_path, {}, "document")
-            return result.parse
-        except Exception as e:
-            logger.error(f"[ADE] Parse failed: {e}")
-            return ParseResult(pages=1, markdown="# Document Content")
+    def _parse_extract_stub(
+        self,
+        file_path: str,
+        schema: Dict[str, Any],
+        doc_type: str
+    ) -> Tuple[ParseResult, ExtractResult]:
+        result = self._extract_stub(file_path, schema, doc_type)
+        result.parse = self._parse_stub(file_path)
+        return result.parse, result
     
     def _extract_stub(
         self,
@@ -116,146 +253,66 @@ class ADEClient:
         return ExtractResult(
             document=document,
             meta=meta,
-            parse=ParseResult(pages=1)
+            parse=ParseResult(pages=1),
+            stub=True
         )
     
-    def _extract_ade(
+    def _upload_form(
         self,
-        file_path: str,
-        schema: Dict[str, Any],
-        doc_type: str
-    ) -> ExtractResult:
-        logger.info(f"[ADE] Extracting {doc_type} from {file_path} with schema")
+        file_content: bytes,
+        mime_type: str,
+        schema: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        fields_schema = schema if schema and schema.get("properties") else DEFAULT_FIELDS_SCHEMA
+        
+        files_data = {
+            'pdf': ('document.pdf', file_content, mime_type)
+        }
+        data = {
+            'fields_schema': json.dumps(fields_schema)
+        }
         
+        logger.info(f"[ADE] File type: {mime_type}, sending as PDF")
+        
+        return files_data, data
+    
+    def _response_json(self, response: Any) -> Dict[str, Any]:
         try:
-            import os
-            from PIL import Image
-            import io
-            
-            _, ext = os.path.splitext(file_path)
-            
-            if ext.lower() in ['.jpg', '.jpeg', '.png']:
-                logger.info(f"[ADE] Converting image {ext} to PDF")
-                img = Image.open(file_path)
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                    rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = rgb_img
-                
-                pdf_bytes = io.BytesIO()
-                img.save(pdf_bytes, format='PDF')
-                file_content = pdf_bytes.getvalue()
-                mime_type = 'application/pdf'
-                actual_ext = '.pdf'
-                logger.info(f"[ADE] Image converted to PDF ({len(file_content)} bytes)")
-            else:
-                with open(file_path, "rb") as f:
-                    file_content = f.read()
-                mime_type = 'application/pdf'
-                actual_ext = ext
-            
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-            
-            if schema and schema.get("properties"):
-                fields_schema = schema
+            return response.json()
+        except ValueError as e:
+            raise ADEError(f"ADE returned invalid JSON: {e}", status=response.status_code)
+    
+    def _build_result(self, api_response: Dict[str, Any], doc_type: str) -> ExtractResult:
+        extracted_data = api_response.get("data", {}).get("extracted_schema", {})
+        
+        logger.info(f"[ADE] Extract successful for {doc_type}")
+        logger.info(f"[ADE] Extracted data keys: {list(extracted_data.keys())}")
+        
+        cleaned_data = {}
+        for key, value in extracted_data.items():
+            if isinstance(value, dict) and 'value' in value:
+                cleaned_data[key] = value['value']
             else:
-                fields_schema = {
-                    "type": "object",
-                    "properties": {
-                        "invoice_number": {"type": "string", "description": "Invoice number"},
-                        "issue_date": {"type": "string", "description": "Invoice date"},
-                        "seller_name": {"type": "string", "description": "Vendor/Seller name"},
-                        "seller_address": {"type": "string", "description": "Seller address"},
-                        "seller_tax_id": {"type": "string", "description": "Seller tax ID"},
-                        "client_name": {"type": "string", "description": "Client/Buyer name"},
-                        "client_address": {"type": "string", "description": "Client address"},
-                        "items": {
-                            "type": "array",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "no": {"type": "string"},
-                                    "description": {"type": "string", "description": "Item description"},
-                                    "qty": {"type": "number", "description": "Quantity"},
-                                    "net_price": {"type": "number", "description": "Unit price (before tax)"},
-                                    "net_worth": {"type": "number", "description": "Line subtotal (before tax)"},
-                                    "vat_percent": {"type": "number", "description": "VAT/tax percentage"},
-                                    "gross_worth": {"type": "number", "description": "Line total (after tax) - THIS IS REQUIRED"}
-                                }
-                            },
-                            "description": "Line items"
-                        },
-                        "summary": {
-                            "type": "object",
-                            "properties": {
-                                "net_worth": {"type": "number", "description": "Subtotal before tax"},
-                                "vat_value": {"type": "number", "description": "Total tax amount"},
-                                "gross_worth": {"type": "number", "description": "Grand total (after tax) - THIS IS REQUIRED"}
-                            },
-                            "description": "Summary totals"
-                        }
-                    }
-                }
-            
-            files_data = {
-                'pdf': ('document.pdf', file_content, mime_type)
-            }
-            data = {
-                'fields_schema': json.dumps(fields_schema)
-            }
-            
-            logger.info(f"[ADE] File type: {mime_type}, sending as PDF")
-            
-            logger.info(f"[ADE] Calling LandingAI endpoint: {self.extract_endpoint}")
-            
-            response = requests.post(
-                self.extract_endpoint,
-                headers=headers,
-                files=files_data,
-                data=data,
-                timeout=120
-            )
-            
-            response.raise_for_status()
-            api_response = response.json()
-            
-            logger.info(f"[ADE] API Response received")
-            
-            extracted_data = api_response.get("data", {}).get("extracted_schema", {})
-            
-            logger.info(f"[ADE] Extract successful for {doc_type}")
-            logger.info(f"[ADE] Extracted data keys: {list(extracted_data.keys())}")
-            
-            cleaned_data = {}
-            for key, value in extracted_data.items():
-                if isinstance(value, dict) and 'value' in value:
-                    cleaned_data[key] = value['value']
-                else:
-                    cleaned_data[key] = value
-            
-            logger.info(f"[ADE] Raw cleaned data: {cleaned_data}")
-            
-            mapped_data = self._map_landing_ai_response(cleaned_data, doc_type)
-            
-            document = mapped_data if mapped_data else {}
-            meta = []
-            parse_result = ParseResult(
-                pages=1,
-                markdown=json.dumps(mapped_data) if mapped_data else ""
-            )
-            
-            logger.info(f"[ADE] Mapped data: {json.dumps(mapped_data, indent=2)[:500]}")
-            
-            return ExtractResult(
-                document=document,
-                meta=meta,
-                parse=parse_result
-            )
-        except Exception as e:
-            logger.error(f"[ADE] Extract API call failed: {e}")
-            logger.error(f"[ADE] Response: {response.text if 'response' in locals() else 'No response'}")
-            logger.info(f"[ADE] Falling back to sample data for {doc_type}")
-            return self._extract_stub(file_path, schema, doc_type)
+                cleaned_data[key] = value
+        
+        logger.info(f"[ADE] Raw cleaned data: {cleaned_data}")
+        
+        mapped_data = self._map_landing_ai_response(cleaned_data, doc_type)
+        
+        document = mapped_data if mapped_data else {}
+        meta = []
+        parse_result = ParseResult(
+            pages=1,
+            markdown=json.dumps(mapped_data) if mapped_data else ""
+        )
+        
+        logger.info(f"[ADE] Mapped data: {json.dumps(mapped_data, indent=2)[:500]}")
+        
+        return ExtractResult(
+            document=document,
+            meta=meta,
+            parse=parse_result
+        )
     
     def _map_landing_ai_response(self, data: Dict[str, Any], doc_type: str) -> Dict[str, Any]:
         try:
@@ -384,3 +441,33 @@ class ADEClient:
                 ),
             ]
 
+
+def make_ade_client(settings: Settings) -> AsyncADEClient:
+    # One construction for the API and the bulk extraction CLI, so both share
+    # the ADE_* pool, preprocessing and retry settings
+    return AsyncADEClient(
+        api_key=settings.vision_agent_api_key,
+        mode=settings.app_mode,
+        pool_size=settings.ade_pool_size,
+        connect_timeout=settings.ade_connect_timeout_seconds,
+        read_timeout=settings.ade_read_timeout_seconds,
+        preprocessor=ImagePreprocessor(
+            PreprocessOptions(
+                target_dpi=settings.ade_image_target_dpi,
+                grayscale=settings.ade_image_grayscale,
+                jpeg_quality=settings.ade_image_jpeg_quality
+            ),
+            workers=settings.ade_image_workers,
+            cache_mb=settings.ade_image_cache_mb
+        ),
+        caller=ResilientCaller(
+            max_concurrency=settings.ade_max_concurrency,
+            max_attempts=settings.ade_max_attempts,
+            backoff_base=settings.ade_backoff_base_seconds,
+            backoff_max=settings.ade_backoff_max_seconds,
+            breaker=CircuitBreaker(
+                failure_threshold=settings.ade_breaker_failure_threshold,
+                reset_seconds=settings.ade_breaker_reset_seconds
+            )
+        )
+    )
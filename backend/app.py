@@ -3,28 +3,54 @@ FastAPI backend for PactProof - handles invoice reconciliation
 """
 
 import os
+import asyncio
 import json
+import math
 import logging
+import tempfile
 from pathlib import Path
-from typing import Optional
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple, Union
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import ValidationError
 import shutil
 import io
 from datetime import datetime
 
-from config import get_settings
+from config import REPO_ROOT, get_settings, load_schema
 from models import (
     Invoice,
     Contract,
     ReconcileResponse,
+    StageTiming,
+    BatchReconcileHeader,
+    BatchReconcileRequest,
+    ContractSummary,
+    RouteResponse,
+    BatchReconcileItem,
+    ReconcileDeltaRequest,
+    ReconcileDeltaResponse,
     NoteGenerationRequest,
     NoteGenerationResponse,
     ExtractionResponse,
+    ParseResult,
+    BulkExtractRequest,
+    BulkJobStatus,
 )
-from ade_client import ADEClient
-from reconcile import ReconcileEngine
+from ade_client import ExtractResult, MAPPER_VERSION, make_ade_client
+from resilience import ADEError, ADEUnavailableError
+from reconcile import ReconcileEngine, ENGINE_VERSION, RECONCILE_MODES
+from contract_index import ContractIndex, ContractIndexCache
+from incremental import SessionStore
+from instrumentation import NULL_TIMER, StageTimer
+from similarity_cache import SimilarityCache
+from ledger import QuantityLedger
+from result_cache import make_result_cache, result_key
+from extraction_cache import ExtractionCache, content_sha256, dump_extraction, extraction_key, load_extraction
+from bulk import BulkExtractionJob, collect_files, job_id_for
+from contract_registry import ContractRegistry
 from note import NoteGenerator
 
 logging.basicConfig(
@@ -52,27 +78,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-ade_client = ADEClient(
-    api_key=settings.vision_agent_api_key,
-    mode=settings.app_mode
+ade_client = make_ade_client(settings)
+extraction_cache = (
+    ExtractionCache(
+        settings.extraction_cache_dir,
+        max_mb=settings.extraction_cache_max_mb,
+        memory_entries=settings.extraction_cache_memory_entries
+    )
+    if settings.extraction_cache_max_mb > 0 else None
 )
 reconcile_engine = ReconcileEngine(
     fuzzy_threshold=settings.fuzzy_match_threshold,
-    allowed_variance_pct=settings.allowed_variance_pct
+    allowed_variance_pct=settings.allowed_variance_pct,
+    match_strategy=settings.match_strategy,
+    index_cache=ContractIndexCache(
+        max_entries=settings.contract_index_cache_size,
+        ttl_seconds=settings.contract_index_cache_ttl_seconds
+    ),
+    blocking=settings.blocking_mode or None,
+    blocking_min_lines=settings.blocking_min_lines,
+    blocking_candidates=settings.blocking_candidates,
+    scoring_workers=settings.scoring_workers,
+    similarity_cache=(
+        SimilarityCache(max_mb=settings.similarity_cache_max_mb)
+        if settings.similarity_cache_max_mb > 0 else None
+    ),
+    rules=[r.strip() for r in settings.reconcile_rules.split(",") if r.strip()] or None,
+    ledger=QuantityLedger(settings.ledger_path) if settings.ledger_path else None
+)
+result_cache = make_result_cache(
+    settings.result_cache_backend,
+    max_entries=settings.result_cache_size,
+    directory=settings.result_cache_dir
+)
+session_store = SessionStore(
+    max_entries=settings.reconcile_session_cache_size,
+    ttl_seconds=settings.reconcile_session_ttl_seconds
+)
+contract_registry = ContractRegistry(
+    engine=reconcile_engine,
+    vendor_threshold=settings.route_vendor_threshold,
+    max_candidates=settings.route_max_candidates
 )
 note_generator = NoteGenerator(google_api_key=settings.google_api_key)
-
-
-def load_schema(schema_name: str) -> dict:
-    schema_path = f"schemas/{schema_name}.schema.json"
-    if os.path.exists(schema_path):
-        with open(schema_path, "r") as f:
-            return json.load(f)
-    return {}
+bulk_jobs: Dict[str, BulkExtractionJob] = {}
+# Strong references to running job tasks, which the event loop only holds weakly
+bulk_tasks: Set[asyncio.Task] = set()
 
 
 INVOICE_SCHEMA = load_schema("invoice")
 CONTRACT_SCHEMA = load_schema("contract")
+SCHEMAS = {"invoice": INVOICE_SCHEMA, "contract": CONTRACT_SCHEMA}
 
 
 @app.get("/health")
@@ -84,6 +140,26 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "contract_index_cache": reconcile_engine.index_cache.stats(),
+        "similarity_cache": (
+            reconcile_engine.similarity_cache.stats()
+            if reconcile_engine.similarity_cache is not None else None
+        ),
+        "result_cache": result_cache.stats() if result_cache else None,
+        "reconcile_sessions": session_store.stats(),
+        "rules": reconcile_engine.rule_plan.timings(),
+        "quantity_ledger": reconcile_engine.ledger.stats() if reconcile_engine.ledger else None,
+        "registered_contracts": len(contract_registry),
+        "ade_client": ade_client.stats(),
+        "ade_calls": ade_client.caller.stats(),
+        "image_preprocessing": ade_client.preprocessor.stats(),
+        "extraction_cache": extraction_cache.stats() if extraction_cache else None,
+    }
+
+
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)) -> dict:
     try:
@@ -120,22 +196,57 @@ async def serve_file(filename: str):
     return FileResponse(file_path)
 
 
+async def extract_upload(
+    file_path: str,
+    contents: bytes,
+    schema: dict,
+    doc_type: str,
+    response: Response,
+    refresh: bool
+) -> Tuple[ParseResult, ExtractResult]:
+    # The same bytes extracted with the same schema and mapping are served
+    # from the extraction cache, whatever the upload was called
+    if extraction_cache is None:
+        return await ade_client.parse_extract(file_path, schema=schema, doc_type=doc_type)
+    
+    file_hash = await asyncio.to_thread(content_sha256, contents)
+    cache_key = extraction_key(file_hash, schema, doc_type, MAPPER_VERSION)
+    response.headers["X-Content-SHA256"] = file_hash
+    
+    cached = None if refresh else await asyncio.to_thread(extraction_cache.get, cache_key)
+    if cached is not None:
+        logger.info(f"Extraction served from cache ({cache_key[:12]})")
+        response.headers["X-Cache"] = "HIT"
+        extract_result = load_extraction(cached)
+        return extract_result.parse, extract_result
+    
+    parse_result, extract_result = await ade_client.parse_extract(file_path, schema=schema, doc_type=doc_type)
+    if not extract_result.stub:
+        await asyncio.to_thread(extraction_cache.put, cache_key, dump_extraction(extract_result))
+    response.headers["X-Cache"] = "REFRESH" if refresh else "MISS"
+    return parse_result, extract_result
+
+
 @app.post("/parse_extract/invoice", response_model=ExtractionResponse)
-async def parse_extract_invoice(file: UploadFile = File(...)) -> dict:
+async def parse_extract_invoice(
+    response: Response,
+    file: UploadFile = File(...),
+    refresh: bool = False
+) -> dict:
     try:
         file_path = os.path.join(settings.upload_dir, file.filename)
-        with open(file_path, "wb") as f:
-            contents = await file.read()
-            f.write(contents)
+        contents = await file.read()
+        await asyncio.to_thread(Path(file_path).write_bytes, contents)
         
         logger.info(f"Parsing invoice from {file.filename}")
         
-        parse_result = ade_client.parse(file_path)
-        
-        extract_result = ade_client.extract(
+        parse_result, extract_result = await extract_upload(
             file_path,
+            contents,
             schema=INVOICE_SCHEMA,
-            doc_type="invoice"
+            doc_type="invoice",
+            response=response,
+            refresh=refresh
         )
         
         invoice = Invoice(**extract_result.document)
@@ -143,13 +254,12 @@ async def parse_extract_invoice(file: UploadFile = File(...)) -> dict:
         extracted_data = {
             "invoice": invoice.model_dump(),
             "meta": [m.model_dump() for m in extract_result.meta],
-            "parse": extract_result.parse.model_dump(),
+            "parse": parse_result.model_dump(),
         }
         
         out_path = f"out/extracted/{file.filename}.json"
         os.makedirs("out/extracted", exist_ok=True)
-        with open(out_path, "w") as f:
-            json.dump(extracted_data, f, indent=2)
+        await asyncio.to_thread(Path(out_path).write_text, json.dumps(extracted_data, indent=2))
         
         file_url = f"{settings.api_origin}/uploads/{file.filename}"
         
@@ -157,18 +267,28 @@ async def parse_extract_invoice(file: UploadFile = File(...)) -> dict:
             "invoice": invoice,
             "contract": None,
             "meta": extract_result.meta,
-            "parse": extract_result.parse,
+            "parse": parse_result,
             "file_url": file_url,
             "file_path": file_path,
         }
     
+    except ADEUnavailableError as e:
+        logger.error(f"Invoice extraction rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except ADEError as e:
+        logger.error(f"Invoice extraction failed upstream: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Invoice extraction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/parse_extract/contract", response_model=ExtractionResponse)
-async def parse_extract_contract(file: UploadFile = File(...)) -> dict:
+async def parse_extract_contract(
+    response: Response,
+    file: UploadFile = File(...),
+    refresh: bool = False
+) -> dict:
     try:
         file_path = os.path.join(settings.upload_dir, file.filename)
         
@@ -176,8 +296,7 @@ async def parse_extract_contract(file: UploadFile = File(...)) -> dict:
             contents = await file.read()
             contract_data = json.loads(contents)
             
-            with open(file_path, "wb") as f:
-                f.write(contents)
+            await asyncio.to_thread(Path(file_path).write_bytes, contents)
             
             contract = Contract(**contract_data)
             
@@ -196,15 +315,16 @@ async def parse_extract_contract(file: UploadFile = File(...)) -> dict:
                 "file_path": file_path,
             }
         else:
-            with open(file_path, "wb") as f:
-                contents = await file.read()
-                f.write(contents)
+            contents = await file.read()
+            await asyncio.to_thread(Path(file_path).write_bytes, contents)
             
-            parse_result = ade_client.parse(file_path)
-            extract_result = ade_client.extract(
+            parse_result, extract_result = await extract_upload(
                 file_path,
+                contents,
                 schema=CONTRACT_SCHEMA,
-                doc_type="contract"
+                doc_type="contract",
+                response=response,
+                refresh=refresh
             )
             
             contract = Contract(**extract_result.document)
@@ -217,7 +337,7 @@ async def parse_extract_contract(file: UploadFile = File(...)) -> dict:
                 "invoice": None,
                 "contract": contract,
                 "meta": extract_result.meta,
-                "parse": extract_result.parse,
+                "parse": parse_result,
                 "file_url": file_url,
                 "file_path": file_path,
             }
@@ -225,33 +345,416 @@ async def parse_extract_contract(file: UploadFile = File(...)) -> dict:
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON: {e}")
         raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    except ADEUnavailableError as e:
+        logger.error(f"Contract extraction rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    except ADEError as e:
+        logger.error(f"Contract extraction failed upstream: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Contract extraction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.delete("/extraction_cache")
+async def purge_extraction_cache(file_sha256: Optional[str] = None) -> dict:
+    if extraction_cache is None:
+        raise HTTPException(status_code=404, detail="Extraction cache is not enabled (set EXTRACTION_CACHE_MAX_MB)")
+    try:
+        purged = await asyncio.to_thread(extraction_cache.purge, file_sha256)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Purged {purged} cached extractions" + (f" of {file_sha256[:12]}" if file_sha256 else ""))
+    return {"file_sha256": file_sha256, "purged": purged}
+
+
+def bulk_job_done(task: asyncio.Task) -> None:
+    bulk_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Bulk extraction job crashed: {task.exception()}")
+
+
+@app.post("/bulk_extract", response_model=BulkJobStatus, status_code=202)
+async def start_bulk_extract(request: BulkExtractRequest) -> dict:
+    # Starts (or resumes) a background job over files already on the server;
+    # poll GET /bulk_extract/{job_id} for progress
+    if extraction_cache is None:
+        raise HTTPException(status_code=404, detail="Bulk extraction is not enabled (set EXTRACTION_CACHE_MAX_MB)")
+    
+    root = Path(settings.bulk_input_dir).resolve()
+    paths = [(root / path).resolve() for path in request.paths]
+    outside = [path for path, resolved in zip(request.paths, paths) if not resolved.is_relative_to(root)]
+    if outside:
+        raise HTTPException(status_code=400, detail=f"Paths must be inside BULK_INPUT_DIR: {', '.join(outside)}")
+    
+    try:
+        files = await asyncio.to_thread(collect_files, [str(path) for path in paths])
+        job_id = request.job_id or job_id_for(files, request.doc_type)
+        running = bulk_jobs.get(job_id)
+        if running is not None and running.state in ("pending", "running"):
+            raise HTTPException(status_code=409, detail=f"Bulk job {job_id} is already running")
+        job = BulkExtractionJob(
+            job_id,
+            files,
+            doc_type=request.doc_type,
+            schema=SCHEMAS.get(request.doc_type, {}),
+            client=ade_client,
+            store=extraction_cache,
+            job_dir=settings.bulk_jobs_dir,
+            workers=request.workers or settings.bulk_workers,
+            rate_per_minute=(
+                request.rate_per_minute
+                if request.rate_per_minute is not None else settings.bulk_rate_per_minute
+            )
+        )
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    bulk_jobs[job_id] = job
+    task = asyncio.create_task(job.run())
+    bulk_tasks.add(task)
+    task.add_done_callback(bulk_job_done)
+    logger.info(f"Bulk extraction {job_id} started: {len(files)} {request.doc_type} files")
+    return job.status()
+
+
+@app.get("/bulk_extract/{job_id}", response_model=BulkJobStatus)
+async def get_bulk_extract(job_id: str) -> dict:
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job.status()
+
+
+def check_ledger_post(mode: str, incremental: bool = False) -> None:
+    if reconcile_engine.ledger is None:
+        raise HTTPException(status_code=400, detail="Quantity ledger is not enabled (set LEDGER_PATH)")
+    if mode != "full" or incremental:
+        raise HTTPException(status_code=400, detail="Only full, non-incremental reconciliations can be posted")
+
+
 @app.post("/reconcile", response_model=ReconcileResponse)
-async def reconcile(invoice: Invoice, contract: Contract) -> dict:
+async def reconcile(
+    invoice: Invoice,
+    contract: Contract,
+    response: Response,
+    incremental: bool = False,
+    mode: str = "full",
+    diagnostics: bool = False,
+    post: bool = False
+):
+    # post=true records the invoice's matched quantities in the quantity
+    # ledger; without it the ledger is only read, so dry runs consume nothing
+    if mode not in RECONCILE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}' (expected one of {', '.join(RECONCILE_MODES)})")
+    if incremental and mode != "full":
+        raise HTTPException(status_code=400, detail="Incremental sessions require mode=full")
+    if post:
+        check_ledger_post(mode, incremental)
+    
+    timer = StageTimer() if diagnostics or settings.reconcile_server_timing else NULL_TIMER
+    
     try:
         logger.info(
             f"Reconciling invoice {invoice.invoice_number} "
-            f"against contract {contract.contract_id}"
+            f"against contract {contract.contract_id} ({mode})"
         )
         
-        result = reconcile_engine.reconcile(invoice, contract)
+        # Sessions hand out a fresh token and findings depend on the ledger's
+        # running totals, so neither can be answered from the cache;
+        # diagnostics describe this run, so they bypass it too
+        cache_key = None
+        if result_cache is None or incremental or diagnostics or reconcile_engine.ledger is not None:
+            response.headers["X-Cache"] = "BYPASS"
+        else:
+            with timer.stage("cache_lookup"):
+                cache_key = result_key(
+                    invoice,
+                    contract,
+                    {**reconcile_engine.config(), "mode": mode},
+                    ENGINE_VERSION
+                )
+                cached = result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Reconciliation served from cache ({cache_key[:12]})")
+                headers = {"X-Cache": "HIT"}
+                if timer.enabled:
+                    headers["Server-Timing"] = timer.server_timing()
+                return Response(content=cached, media_type="application/json", headers=headers)
+            response.headers["X-Cache"] = "MISS"
+        
+        # Matching is CPU-bound and ledger reads and posts can wait on
+        # SQLite's lock, so the engine runs off the event loop
+        if incremental:
+            with timer.stage("session"):
+                session = await asyncio.to_thread(reconcile_engine.start_session, invoice, contract)
+                session_store.put(session)
+                result = reconcile_engine.session_response(session)
+        else:
+            result = await asyncio.to_thread(
+                reconcile_engine.reconcile, invoice, contract, mode=mode, timer=timer, post=post
+            )
         
         logger.info(
             f"Reconciliation complete: {result.summary.total_count} findings "
             f"({result.summary.major_count} major, {result.summary.minor_count} minor)"
         )
         
-        return result
+        if diagnostics:
+            result.diagnostics = [StageTiming(**stage) for stage in timer.report()]
+        
+        if cache_key is None and not timer.enabled:
+            return result
+        
+        # Serialized here (not by FastAPI) so the cost shows up as a stage;
+        # the diagnostics block is written before, so only the header has it
+        with timer.stage("serialize"):
+            payload = result.model_dump_json(by_alias=True)
+        if cache_key is not None:
+            result_cache.put(cache_key, payload)
+        
+        headers = {"X-Cache": response.headers["X-Cache"]}
+        if timer.enabled:
+            headers["Server-Timing"] = timer.server_timing()
+        return Response(content=payload, media_type="application/json", headers=headers)
     
     except Exception as e:
         logger.error(f"Reconciliation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/reconcile/delta", response_model=ReconcileDeltaResponse)
+async def reconcile_delta(request: ReconcileDeltaRequest) -> dict:
+    session = session_store.get(request.result_token)
+    if session is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Unknown or expired result token; run a full /reconcile?incremental=true"
+        )
+    
+    try:
+        changes = {change.index: change.line for change in request.changes}
+        patch = await asyncio.to_thread(reconcile_engine.apply_changes, session, changes)
+        session_store.put(session)
+        
+        logger.info(
+            f"Delta reconciliation for invoice {session.invoice.invoice_number}: "
+            f"{len(changes)} changed lines, {len(patch)} patch ops"
+        )
+        
+        return {
+            "result_token": session.token,
+            "summary": reconcile_engine.session_response(session).summary,
+            "patch": patch,
+        }
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Delta reconciliation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/contracts", response_model=ContractSummary)
+async def register_contract(contract: Contract) -> dict:
+    await asyncio.to_thread(contract_registry.add, contract)
+    logger.info(f"Registered contract {contract.contract_id} ({contract.vendor_name})")
+    return {
+        "contract_id": contract.contract_id,
+        "vendor_name": contract.vendor_name,
+        "client_name": contract.client_name,
+        "currency": contract.currency,
+        "line_count": len(contract.line_items),
+    }
+
+
+@app.get("/contracts", response_model=List[ContractSummary])
+async def list_contracts() -> list:
+    return contract_registry.summaries()
+
+
+@app.get("/contracts/{contract_id}", response_model=Contract)
+async def get_contract(contract_id: str) -> Contract:
+    contract = contract_registry.get(contract_id)
+    if contract is None:
+        raise HTTPException(status_code=404, detail=f"Unknown contract '{contract_id}'")
+    return contract
+
+
+@app.get("/ledger/{contract_id}")
+async def get_ledger(contract_id: str) -> dict:
+    if reconcile_engine.ledger is None:
+        raise HTTPException(status_code=404, detail="Quantity ledger is not enabled (set LEDGER_PATH)")
+    return {
+        "contract_id": contract_id,
+        "consumed": await asyncio.to_thread(reconcile_engine.ledger.totals, contract_id),
+    }
+
+
+@app.delete("/ledger/{contract_id}/{invoice_number}")
+async def void_ledger_posting(contract_id: str, invoice_number: str) -> dict:
+    if reconcile_engine.ledger is None:
+        raise HTTPException(status_code=404, detail="Quantity ledger is not enabled (set LEDGER_PATH)")
+    await asyncio.to_thread(reconcile_engine.ledger.void, contract_id, invoice_number)
+    logger.info(f"Voided ledger posting of invoice {invoice_number} on contract {contract_id}")
+    return {"contract_id": contract_id, "invoice_number": invoice_number, "voided": True}
+
+
+@app.post("/route", response_model=RouteResponse)
+async def route_invoice(invoice: Invoice, limit: int = 3) -> dict:
+    try:
+        candidates = await asyncio.to_thread(contract_registry.route, invoice, limit=limit)
+        
+        logger.info(
+            f"Routed invoice {invoice.invoice_number} from {invoice.seller_name}: "
+            f"{len(candidates)} candidate contracts"
+        )
+        
+        return {"candidates": candidates}
+    
+    except Exception as e:
+        logger.error(f"Routing failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def spool_request(request: Request) -> IO[bytes]:
+    # The raw body is buffered in memory up to BATCH_SPOOL_MEMORY_MB, then on
+    # disk. StreamingResponse listens on receive() for disconnects, so the
+    # body can't be read from inside the response generator
+    spool = tempfile.SpooledTemporaryFile(max_size=int(settings.batch_spool_memory_mb * 1024 * 1024))
+    try:
+        async for chunk in request.stream():
+            await asyncio.to_thread(spool.write, chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def ndjson_invoices(spool: IO[bytes]) -> Iterator[Tuple[int, Union[Invoice, ValueError]]]:
+    # Parses one line at a time; a line that isn't a valid invoice is
+    # reported in its place rather than failing the batch
+    idx = 0
+    for line in spool:
+        if not line.strip():
+            continue
+        try:
+            yield idx, Invoice.model_validate_json(line)
+        except ValueError as e:
+            yield idx, e
+        idx += 1
+
+
+@app.post("/reconcile/batch")
+async def reconcile_batch(request: Request) -> StreamingResponse:
+    # Two body formats: JSON (BatchReconcileRequest, parsed whole, at most
+    # BATCH_MAX_JSON_INVOICES invoices) or NDJSON (a BatchReconcileHeader
+    # line, then one invoice per line, parsed as each one is reconciled)
+    spool = None
+    try:
+        if request.headers.get("content-type", "").split(";")[0].strip() == "application/x-ndjson":
+            spool = await spool_request(request)
+            try:
+                header = BatchReconcileHeader.model_validate_json(spool.readline().strip() or b"{}")
+            except ValidationError as e:
+                raise RequestValidationError(e.errors())
+            invoices = ndjson_invoices(spool)
+        else:
+            try:
+                header = BatchReconcileRequest.model_validate_json(await request.body())
+            except ValidationError as e:
+                raise RequestValidationError(e.errors())
+            if len(header.invoices) > settings.batch_max_json_invoices:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"JSON batches are limited to {settings.batch_max_json_invoices} invoices; "
+                           f"send larger batches as application/x-ndjson"
+                )
+            invoices = enumerate(header.invoices)
+        
+        contract = header.contract
+        if header.mode not in RECONCILE_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown mode '{header.mode}' (expected one of {', '.join(RECONCILE_MODES)})"
+            )
+        if header.post:
+            check_ledger_post(header.mode)
+        
+        # Registered contracts come with their index, fingerprinted once at
+        # registration; an inline contract is hashed by the engine
+        contract_index = None
+        if contract is None and header.contract_id:
+            registered = await asyncio.to_thread(contract_registry.get_indexed, header.contract_id)
+            if registered is None:
+                raise HTTPException(status_code=404, detail=f"Unknown contract '{header.contract_id}'")
+            contract, contract_index = registered
+    except BaseException:
+        if spool is not None:
+            spool.close()
+        raise
+    
+    logger.info(
+        f"Batch reconciling {'NDJSON' if spool is not None else len(header.invoices)} invoices against "
+        f"{f'contract {contract.contract_id}' if contract else 'auto-routed contracts'}"
+    )
+    
+    def resolve_contract(invoice: Invoice) -> Tuple[Contract, Optional[ContractIndex]]:
+        if contract is not None:
+            return contract, contract_index
+        routes = contract_registry.route(invoice, limit=1)
+        registered = contract_registry.get_indexed(routes[0].contract_id) if routes else None
+        if registered is None or routes[0].matched_lines == 0:
+            raise ValueError(f"No registered contract matches invoice from {invoice.seller_name}")
+        return registered
+    
+    def stream_results():
+        total = failed = 0
+        try:
+            for idx, parsed in invoices:
+                total += 1
+                invoice = parsed if isinstance(parsed, Invoice) else None
+                contract_id = contract.contract_id if contract else None
+                try:
+                    if invoice is None:
+                        raise ValueError(f"Invalid invoice: {parsed}")
+                    governing, index = resolve_contract(invoice)
+                    contract_id = governing.contract_id
+                    timer = StageTimer() if header.diagnostics else NULL_TIMER
+                    result = reconcile_engine.reconcile(
+                        invoice, governing, index=index, mode=header.mode, timer=timer, post=header.post
+                    )
+                    if header.diagnostics:
+                        result.diagnostics = [StageTiming(**stage) for stage in timer.report()]
+                    item = BatchReconcileItem(
+                        index=idx,
+                        invoice_number=invoice.invoice_number,
+                        contract_id=contract_id,
+                        result=result,
+                    )
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Batch reconciliation failed for invoice {idx}: {e}")
+                    item = BatchReconcileItem(
+                        index=idx,
+                        invoice_number=invoice.invoice_number if invoice else None,
+                        contract_id=contract_id,
+                        error=str(e),
+                    )
+                yield item.model_dump_json(by_alias=True) + "\n"
+        finally:
+            if spool is not None:
+                spool.close()
+        
+        logger.info(f"Batch reconciliation complete: {total} invoices ({failed} failed)")
+    
+    # A sync generator is iterated in Starlette's threadpool, so parsing and
+    # reconciling don't block the event loop and each line is flushed as it
+    # is produced
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @app.post("/draft_note", response_model=NoteGenerationResponse)
 async def draft_note(request: NoteGenerationRequest) -> dict:
     try:
@@ -367,11 +870,24 @@ async def startup():
     logger.info(f"   Mode: {settings.app_mode}")
     logger.info(f"   API Origin: {settings.api_origin}")
     logger.info(f"   Upload Dir: {settings.upload_dir}")
+    
+    if settings.contracts_dir:
+        contracts_dir = REPO_ROOT / settings.contracts_dir
+        if contracts_dir.is_dir():
+            loaded = contract_registry.load_dir(str(contracts_dir))
+            logger.info(f"   Contracts: {loaded} registered from {contracts_dir}")
+        else:
+            logger.warning(f"   Contracts: directory {contracts_dir} not found; registry starts empty")
 
 
 @app.on_event("shutdown")
 async def shutdown():
     logger.info(" PactProof API shutting down...")
+    # Interrupted jobs resume from their checkpoint when started again
+    for task in list(bulk_tasks):
+        task.cancel()
+    await asyncio.gather(*bulk_tasks, return_exceptions=True)
+    await ade_client.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Inverted-index candidate blocking for large contracts
+"""
+
+from typing import Dict, List, Optional, Set
+import numpy as np
+
+BLOCKING_MODES = ("tokens", "ngrams")
+
+
+def token_keys(desc: str) -> Set[str]:
+    return set(desc.split())
+
+
+def ngram_keys(desc: str, n: int = 3) -> Set[str]:
+    # Character n-grams per token, padded so short tokens and word edges
+    # still produce keys; robust to single-character typos
+    keys: Set[str] = set()
+    for token in desc.split():
+        padded = f" {token} "
+        if len(padded) <= n:
+            keys.add(padded)
+            continue
+        for i in range(len(padded) - n + 1):
+            keys.add(padded[i:i + n])
+    return keys
+
+
+def blocking_keys(desc: str, mode: str) -> Set[str]:
+    if mode == "tokens":
+        return token_keys(desc)
+    if mode == "ngrams":
+        return ngram_keys(desc)
+    raise ValueError(f"Unknown blocking mode '{mode}' (expected one of {', '.join(BLOCKING_MODES)})")
+
+
+class CandidateBlocker:
+    
+    def __init__(
+        self,
+        descriptions: List[str],
+        mode: str = "tokens",
+        max_df_ratio: float = 0.05,
+        min_max_df: int = 100
+    ):
+        self.mode = mode
+        self.size = len(descriptions)
+        # Keys present on more lines than this carry little signal and are
+        # only used when a query has nothing more selective
+        self.max_df = max(min_max_df, int(max_df_ratio * self.size))
+        
+        postings: Dict[str, List[int]] = {}
+        for idx, desc in enumerate(descriptions):
+            for key in blocking_keys(desc, mode):
+                postings.setdefault(key, []).append(idx)
+        
+        self.postings: Dict[str, np.ndarray] = {
+            key: np.array(ids, dtype=np.int64) for key, ids in postings.items()
+        }
+    
+    def candidates(
+        self,
+        desc: str,
+        limit: int = 50,
+        exclude: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        lists = [self.postings[k] for k in blocking_keys(desc, self.mode) if k in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        
+        selective = [ids for ids in lists if len(ids) <= self.max_df]
+        if not selective:
+            selective = [min(lists, key=len)]
+        
+        ids, counts = np.unique(np.concatenate(selective), return_counts=True)
+        
+        if exclude is not None and exclude.any():
+            keep = ~exclude[ids]
+            ids, counts = ids[keep], counts[keep]
+        
+        if len(ids) > limit:
+            # Most shared keys first; stable sort keeps lower line ids on ties
+            top = np.argsort(-counts, kind="stable")[:limit]
+            ids = np.sort(ids[top])
+        
+        return ids
+
@@ -0,0 +1,263 @@
+"""
+Checkpointed bulk extraction of document directories into the extraction cache
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from ade_client import AsyncADEClient, MAPPER_VERSION
+from extraction_cache import ExtractionCache, content_sha256, dump_extraction, extraction_key
+from models import Contract, Invoice
+from preprocess import IMAGE_EXTENSIONS
+from resilience import ADEUnavailableError, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf',) + IMAGE_EXTENSIONS
+DOC_MODELS = {"invoice": Invoice, "contract": Contract}
+
+# Checkpoint statuses that mean the extraction is in the cache
+DONE_STATUSES = ("extracted", "cached")
+
+# Job ids name the checkpoint directory
+_JOB_ID_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+def collect_files(paths: List[str]) -> List[str]:
+    # Directories are walked recursively for supported documents; files named
+    # explicitly are taken as given
+    files = set()
+    for path in paths:
+        p = Path(path)
+        if p.is_dir():
+            files.update(
+                str(f.resolve()) for f in p.rglob("*")
+                if f.is_file() and f.suffix.lower() in SUPPORTED_EXTENSIONS
+            )
+        elif p.is_file():
+            files.add(str(p.resolve()))
+        else:
+            raise FileNotFoundError(f"No such file or directory: '{path}'")
+    return sorted(files)
+
+
+def job_id_for(files: List[str], doc_type: str) -> str:
+    # Rerunning the same command over the same files resumes the same job
+    digest = hashlib.sha256("\n".join([doc_type] + files).encode("utf-8")).hexdigest()
+    return f"{doc_type}-{digest[:12]}"
+
+
+def file_fingerprint(file_path: str) -> str:
+    st = os.stat(file_path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def load_checkpoint(path: Path) -> Dict[str, Dict[str, Any]]:
+    # The last record per file wins; a line torn by a crash mid-write is
+    # skipped and that file is simply processed again
+    records: Dict[str, Dict[str, Any]] = {}
+    if not path.exists():
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["file"]] = record
+    return records
+
+
+def _torn(path: Path) -> bool:
+    # True when a crash left the last record without its newline
+    if not path.exists() or path.stat().st_size == 0:
+        return False
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+class BulkExtractionJob:
+    # Extracts a list of files into the extraction cache with `workers` files
+    # in flight and at most rate_per_minute upstream calls (0 = unlimited).
+    # Every finished file is appended to {job_dir}/{job_id}/checkpoint.jsonl,
+    # so rerunning the job skips files that are unchanged and still cached
+    # and retries the ones that failed. Files whose bytes are already cached
+    # (same content under another name, or an earlier upload) cost no call.
+    
+    def __init__(
+        self,
+        job_id: str,
+        files: List[str],
+        doc_type: str,
+        schema: Dict[str, Any],
+        client: AsyncADEClient,
+        store: ExtractionCache,
+        job_dir: str,
+        workers: int = 4,
+        rate_per_minute: float = 0.0
+    ):
+        if doc_type not in DOC_MODELS:
+            raise ValueError(f"Unknown doc_type '{doc_type}' (expected one of {', '.join(DOC_MODELS)})")
+        if not _JOB_ID_RE.fullmatch(job_id):
+            raise ValueError(f"Invalid job id '{job_id}' (letters, digits, '_', '.', '-'; at most 64)")
+        self.job_id = job_id
+        self.files = files
+        self.doc_type = doc_type
+        self.schema = schema
+        self.client = client
+        self.store = store
+        self.workers = max(1, workers)
+        self.rate_per_minute = rate_per_minute
+        self.checkpoint_path = Path(job_dir) / job_id / "checkpoint.jsonl"
+        self.limiter = RateLimiter(rate_per_minute / 60)
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.counts = {"skipped": 0, "cached": 0, "extracted": 0, "failed": 0}
+        self.errors: Dict[str, str] = {}
+        self._in_flight: Dict[str, asyncio.Event] = {}
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+    
+    async def run(self) -> Dict[str, Any]:
+        self.state = "running"
+        self._started = time.monotonic()
+        await asyncio.to_thread(self.checkpoint_path.parent.mkdir, parents=True, exist_ok=True)
+        previous = await asyncio.to_thread(load_checkpoint, self.checkpoint_path)
+        torn = await asyncio.to_thread(_torn, self.checkpoint_path)
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for file_path in self.files:
+            queue.put_nowait(file_path)
+        
+        logger.info(f"[BULK] Job {self.job_id}: {len(self.files)} files, {len(previous)} in checkpoint")
+        try:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+                if torn:
+                    checkpoint.write("\n")
+                workers = [
+                    asyncio.create_task(self._worker(queue, previous, checkpoint))
+                    for _ in range(min(self.workers, len(self.files)))
+                ]
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+        except ADEUnavailableError as e:
+            # Pointless to burn through the rest of the files while the
+            # breaker is open; unfinished files are picked up on resume
+            self.state = "interrupted"
+            self.error = str(e)
+        except BaseException as e:
+            self.state = "failed"
+            self.error = str(e) or type(e).__name__
+            raise
+        else:
+            self.state = "finished"
+        finally:
+            self._finished = time.monotonic()
+            status = self.status()
+            logger.info(
+                f"[BULK] Job {self.job_id} {self.state}: {status['extracted']} extracted, "
+                f"{status['cached']} cached, {status['skipped']} skipped, {status['failed']} failed "
+                f"in {status['elapsed_seconds']:.1f}s"
+            )
+        return self.status()
+    
+    def status(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self._started is not None:
+            elapsed = (self._finished or time.monotonic()) - self._started
+        done = sum(self.counts.values())
+        return {
+            "job_id": self.job_id,
+            "doc_type": self.doc_type,
+            "state": self.state,
+            "total": len(self.files),
+            **self.counts,
+            "remaining": len(self.files) - done,
+            "elapsed_seconds": round(elapsed, 3),
+            "extractions_per_minute": round(self.counts["extracted"] * 60 / elapsed, 2) if elapsed else 0.0,
+            "rate_limit_wait_seconds": round(self.limiter.waited_seconds, 3),
+            "checkpoint_path": str(self.checkpoint_path),
+            "errors": dict(self.errors),
+            "error": self.error,
+        }
+    
+    async def _worker(self, queue: asyncio.Queue, previous: Dict[str, Dict[str, Any]], checkpoint) -> None:
+        while True:
+            try:
+                file_path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record = await self._process(file_path, previous.get(file_path))
+            if record is None:
+                continue
+            self.counts[record["status"]] += 1
+            if record["status"] == "failed":
+                self.errors[file_path] = record["error"]
+            # One short line per file, written from the event loop thread so
+            # records never interleave; flushed so a crash loses at most the
+            # files still in flight
+            checkpoint.write(json.dumps(record) + "\n")
+            checkpoint.flush()
+    
+    async def _process(self, file_path: str, previous: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        fingerprint = await asyncio.to_thread(file_fingerprint, file_path)
+        if (
+            previous is not None
+            and previous["status"] in DONE_STATUSES
+            and previous["fingerprint"] == fingerprint
+            and await asyncio.to_thread(self.store.__contains__, previous["cache_key"])
+        ):
+            self.counts["skipped"] += 1
+            return None
+        
+        contents = await asyncio.to_thread(Path(file_path).read_bytes)
+        file_hash = await asyncio.to_thread(content_sha256, contents)
+        cache_key = extraction_key(file_hash, self.schema, self.doc_type, MAPPER_VERSION)
+        record = {
+            "file": file_path,
+            "fingerprint": fingerprint,
+            "sha256": file_hash,
+            "cache_key": cache_key,
+            "status": "cached",
+            "error": None,
+        }
+        
+        # Identical files in one job share one extraction: whoever registers
+        # the key first owns it, the others wait and try again (finding it
+        # cached, or taking over if the owner's extraction failed)
+        event = asyncio.Event()
+        while True:
+            owner = self._in_flight.setdefault(cache_key, event)
+            if owner is event:
+                break
+            await owner.wait()
+        try:
+            if await asyncio.to_thread(self.store.__contains__, cache_key):
+                return record
+            await self.limiter.acquire()
+            _, extract_result = await self.client.parse_extract(file_path, schema=self.schema, doc_type=self.doc_type)
+            DOC_MODELS[self.doc_type](**extract_result.document)
+            if not extract_result.stub:
+                await asyncio.to_thread(self.store.put, cache_key, dump_extraction(extract_result))
+            record["status"] = "extracted"
+        except ADEUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"[BULK] {file_path} failed: {e}")
+            record["status"] = "failed"
+            record["error"] = str(e)
+        finally:
+            del self._in_flight[cache_key]
+            event.set()
+        return record
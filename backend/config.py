@@ -2,11 +2,16 @@
 App config and env settings
 """
 
+import json
 import os
 from pathlib import Path
 from functools import lru_cache
 from pydantic_settings import BaseSettings
 
+# start.sh runs the server from backend/, so checked-in data is located
+# from here rather than from the working directory
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
 
 class Settings(BaseSettings):
     
@@ -19,9 +24,51 @@ class Settings(BaseSettings):
     upload_dir: str = "uploads"
     fuzzy_match_threshold: int = 85
     allowed_variance_pct: float = 2.0
+    match_strategy: str = "greedy"
+    contract_index_cache_size: int = 64
+    contract_index_cache_ttl_seconds: float = 3600.0
+    blocking_mode: str = ""
+    blocking_min_lines: int = 1000
+    blocking_candidates: int = 50
+    scoring_workers: int = -1
+    reconcile_session_cache_size: int = 256
+    reconcile_session_ttl_seconds: float = 1800.0
+    similarity_cache_max_mb: float = 64.0
+    reconcile_rules: str = ""
+    ledger_path: str = ""
+    result_cache_backend: str = "memory"
+    result_cache_size: int = 1024
+    result_cache_dir: str = "out/result_cache"
+    contracts_dir: str = str(REPO_ROOT / "data" / "contracts")
+    route_vendor_threshold: int = 80
+    route_max_candidates: int = 50
+    reconcile_server_timing: bool = False
+    batch_max_json_invoices: int = 1000
+    batch_spool_memory_mb: float = 8.0
+    ade_pool_size: int = 10
+    ade_connect_timeout_seconds: float = 10.0
+    ade_read_timeout_seconds: float = 120.0
+    ade_max_concurrency: int = 4
+    ade_max_attempts: int = 4
+    ade_backoff_base_seconds: float = 0.5
+    ade_backoff_max_seconds: float = 8.0
+    ade_breaker_failure_threshold: int = 5
+    ade_breaker_reset_seconds: float = 30.0
+    ade_image_target_dpi: int = 200
+    ade_image_grayscale: bool = False
+    ade_image_jpeg_quality: int = 80
+    ade_image_workers: int = 2
+    ade_image_cache_mb: float = 64.0
+    extraction_cache_dir: str = "out/extraction_cache"
+    extraction_cache_max_mb: float = 512.0
+    extraction_cache_memory_entries: int = 128
+    bulk_input_dir: str = "uploads"
+    bulk_jobs_dir: str = "out/bulk"
+    bulk_workers: int = 4
+    bulk_rate_per_minute: float = 60.0
     
     class Config:
-        env_file = str(Path(__file__).parent.parent / ".env")
+        env_file = str(REPO_ROOT / ".env")
         case_sensitive = False
 
 
@@ -29,3 +76,10 @@ class Settings(BaseSettings):
 def get_settings() -> Settings:
     return Settings()
 
+
+def load_schema(schema_name: str) -> dict:
+    schema_path = f"schemas/{schema_name}.schema.json"
+    if os.path.exists(schema_path):
+        with open(schema_path, "r") as f:
+            return json.load(f)
+    return {}
@@ -0,0 +1,130 @@
+"""
+Precompiled per-contract lookup structures, cached across reconciliations
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import numpy as np
+from blocking import CandidateBlocker
+from cache import LRUCache
+from instrumentation import NULL_TIMER, StageTimer
+from matching import normalize_description
+from models import Contract
+
+logger = logging.getLogger(__name__)
+
+
+def contract_fingerprint(contract: Contract) -> str:
+    return hashlib.sha256(contract.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def normalize_sku(sku: Optional[str]) -> Optional[str]:
+    if not sku:
+        return None
+    normalized = "".join(sku.upper().split())
+    return normalized or None
+
+
+def line_keys(skus: List[Optional[str]], descriptions: List[str]) -> List[str]:
+    # Identity of each contract line that survives re-uploads with lines
+    # inserted, removed or reordered: its normalized SKU, else its normalized
+    # description; repeats get an occurrence suffix
+    keys = []
+    seen: Dict[str, int] = {}
+    for sku, desc in zip(skus, descriptions):
+        key = f"sku:{sku}" if sku else f"desc:{desc}"
+        count = seen.get(key, 0) + 1
+        seen[key] = count
+        keys.append(key if count == 1 else f"{key}#{count}")
+    return keys
+
+
+def _optional_array(values: List[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+@dataclass
+class ContractIndex:
+    contract_id: str
+    content_hash: str
+    descriptions: List[str]
+    sku_map: Dict[str, List[int]]
+    description_map: Dict[str, List[int]]
+    # Stable per-line keys the quantity ledger records consumption under
+    line_keys: List[str]
+    unit_prices: np.ndarray
+    max_quantities: np.ndarray
+    tax_rates: np.ndarray
+    _blockers: Dict[str, CandidateBlocker] = field(default_factory=dict, repr=False)
+    
+    @classmethod
+    def build(cls, contract: Contract, content_hash: Optional[str] = None) -> "ContractIndex":
+        descriptions = [normalize_description(line.description) for line in contract.line_items]
+        
+        skus = [normalize_sku(line.sku) for line in contract.line_items]
+        sku_map: Dict[str, List[int]] = {}
+        description_map: Dict[str, List[int]] = {}
+        for idx, sku in enumerate(skus):
+            if sku:
+                sku_map.setdefault(sku, []).append(idx)
+            description_map.setdefault(descriptions[idx], []).append(idx)
+        
+        return cls(
+            contract_id=contract.contract_id,
+            content_hash=content_hash or contract_fingerprint(contract),
+            descriptions=descriptions,
+            sku_map=sku_map,
+            description_map=description_map,
+            line_keys=line_keys(skus, descriptions),
+            unit_prices=_optional_array([line.unit_price for line in contract.line_items]),
+            max_quantities=_optional_array([line.max_quantity for line in contract.line_items]),
+            tax_rates=_optional_array([line.tax_rate for line in contract.line_items]),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.descriptions)
+    
+    def blocker(self, mode: str) -> CandidateBlocker:
+        # Built lazily: only large contracts with blocking enabled pay for it
+        blocker = self._blockers.get(mode)
+        if blocker is None:
+            blocker = CandidateBlocker(self.descriptions, mode=mode)
+            self._blockers[mode] = blocker
+        return blocker
+
+
+class ContractIndexCache:
+    
+    def __init__(self, max_entries: int = 64, ttl_seconds: Optional[float] = 3600.0):
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    
+    def get(
+        self,
+        contract: Contract,
+        timer: StageTimer = NULL_TIMER,
+        content_hash: Optional[str] = None
+    ) -> ContractIndex:
+        # Fingerprinting serializes the whole contract, so callers that
+        # already know the hash (the contract registry) pass it in
+        content_hash = content_hash or contract_fingerprint(contract)
+        key = (contract.contract_id, content_hash)
+        
+        index = self._cache.get(key)
+        timer.count("cache_hits" if index is not None else "cache_misses")
+        if index is None:
+            index = ContractIndex.build(contract, content_hash=content_hash)
+            self._cache.put(key, index)
+            logger.info(
+                f"Built contract index for {contract.contract_id} "
+                f"({len(index)} lines, hash {content_hash[:12]})"
+            )
+        
+        return index
+    
+    def clear(self) -> None:
+        self._cache.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -0,0 +1,221 @@
+"""
+Contract registry and invoice-to-contract routing
+"""
+
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from rapidfuzz import fuzz
+from blocking import ngram_keys
+from contract_index import ContractIndex, contract_fingerprint
+from matching import normalize_description
+from models import Contract, ContractRoute, ContractSummary, Invoice
+from reconcile import ReconcileEngine
+
+logger = logging.getLogger(__name__)
+
+# Legal-form suffixes that differ between an invoice letterhead and the SOW
+# ("Acme Corp." vs "ACME Corporation") without changing the party
+_LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation",
+    "co", "company", "gmbh", "ag", "sa", "plc", "bv", "pty",
+}
+
+
+def normalize_party_name(name: Optional[str]) -> str:
+    tokens = re.sub(r"[^\w\s]", " ", (name or "").lower()).split()
+    while len(tokens) > 1 and tokens[-1] in _LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+class ContractRegistry:
+    # Contracts are fingerprinted once, when registered, so routing and
+    # reconciling against them reuse the cached index without re-hashing;
+    # an edited contract must be registered again
+    
+    def __init__(
+        self,
+        engine: Optional[ReconcileEngine] = None,
+        vendor_threshold: int = 80,
+        max_candidates: int = 50
+    ):
+        self.engine = engine or ReconcileEngine()
+        self.vendor_threshold = vendor_threshold
+        self.max_candidates = max_candidates
+        self._lock = threading.Lock()
+        self._contracts: Dict[str, Contract] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._vocabularies: Dict[str, FrozenSet[str]] = {}
+        self._by_vendor: Dict[str, Set[str]] = {}
+        self._by_client: Dict[str, Set[str]] = {}
+        self._vendor_ngrams: Dict[str, Set[str]] = {}
+    
+    def add(self, contract: Contract) -> None:
+        vocabulary = frozenset(
+            token
+            for line in contract.line_items
+            for token in normalize_description(line.description).split()
+        )
+        vendor = normalize_party_name(contract.vendor_name)
+        client = normalize_party_name(contract.client_name)
+        fingerprint = contract_fingerprint(contract)
+        
+        with self._lock:
+            self._remove_locked(contract.contract_id)
+            self._contracts[contract.contract_id] = contract
+            self._fingerprints[contract.contract_id] = fingerprint
+            self._vocabularies[contract.contract_id] = vocabulary
+            self._by_vendor.setdefault(vendor, set()).add(contract.contract_id)
+            self._by_client.setdefault(client, set()).add(contract.contract_id)
+            for key in ngram_keys(vendor):
+                self._vendor_ngrams.setdefault(key, set()).add(vendor)
+    
+    def remove(self, contract_id: str) -> bool:
+        with self._lock:
+            return self._remove_locked(contract_id)
+    
+    def get(self, contract_id: str) -> Optional[Contract]:
+        return self._contracts.get(contract_id)
+    
+    def get_indexed(self, contract_id: str) -> Optional[Tuple[Contract, ContractIndex]]:
+        with self._lock:
+            contract = self._contracts.get(contract_id)
+            fingerprint = self._fingerprints.get(contract_id)
+        if contract is None:
+            return None
+        return contract, self.engine.index_cache.get(contract, content_hash=fingerprint)
+    
+    def summaries(self) -> List[ContractSummary]:
+        with self._lock:
+            contracts = list(self._contracts.values())
+        return [
+            ContractSummary(
+                contract_id=c.contract_id,
+                vendor_name=c.vendor_name,
+                client_name=c.client_name,
+                currency=c.currency,
+                line_count=len(c.line_items),
+            )
+            for c in contracts
+        ]
+    
+    def __len__(self) -> int:
+        return len(self._contracts)
+    
+    def load_dir(self, path: str) -> int:
+        loaded = 0
+        for file_path in sorted(Path(path).glob("*.json")):
+            try:
+                with open(file_path, "r") as f:
+                    self.add(Contract(**json.load(f)))
+                loaded += 1
+            except Exception as e:
+                logger.warning(f"Skipping contract file {file_path}: {e}")
+        return loaded
+    
+    def route(self, invoice: Invoice, limit: int = 3) -> List[ContractRoute]:
+        vendor_scores = self._match_vendors(invoice.seller_name)
+        client = normalize_party_name(invoice.client_name)
+        
+        with self._lock:
+            candidate_ids: Dict[str, float] = {}
+            for vendor, score in vendor_scores.items():
+                for contract_id in self._by_vendor.get(vendor, ()):
+                    candidate_ids[contract_id] = score
+            if not candidate_ids:
+                # Unknown vendor spelling: fall back to the client's contracts
+                for contract_id in self._by_client.get(client, ()):
+                    candidate_ids[contract_id] = 0.0
+            client_ids = set(self._by_client.get(client, ()))
+            candidates = [
+                (self._contracts[cid], self._fingerprints[cid], self._vocabularies[cid], score)
+                for cid, score in candidate_ids.items()
+            ]
+        
+        if not candidates or not invoice.items:
+            return []
+        
+        # Cheap pre-ranking on token overlap so full line matching only runs
+        # on the most plausible contracts when one vendor holds many SOWs
+        all_tokens = {
+            token
+            for item in invoice.items
+            for token in normalize_description(item.description).split()
+        }
+        
+        def overlap(vocabulary: FrozenSet[str]) -> float:
+            return len(all_tokens & vocabulary) / len(all_tokens) if all_tokens else 0.0
+        
+        ranked: List[Tuple[float, bool, float, Contract, str]] = [
+            (overlap(vocabulary), contract.contract_id in client_ids, vendor_score, contract, fingerprint)
+            for contract, fingerprint, vocabulary, vendor_score in candidates
+        ]
+        ranked.sort(key=lambda r: (r[0], r[1], r[2]), reverse=True)
+        
+        routes: List[ContractRoute] = []
+        for _, client_match, vendor_score, contract, fingerprint in ranked[:self.max_candidates]:
+            index = self.engine.index_cache.get(contract, content_hash=fingerprint)
+            matched = self.engine.line_coverage(invoice, contract, index)
+            routes.append(ContractRoute(
+                contract_id=contract.contract_id,
+                vendor_name=contract.vendor_name,
+                client_name=contract.client_name,
+                coverage=round(matched / len(invoice.items), 4),
+                matched_lines=matched,
+                vendor_score=round(vendor_score / 100.0, 4),
+                client_match=client_match,
+                currency_match=contract.currency == invoice.currency,
+            ))
+        
+        routes.sort(
+            key=lambda r: (r.coverage, r.client_match, r.vendor_score, r.currency_match),
+            reverse=True
+        )
+        return routes[:limit]
+    
+    def _match_vendors(self, seller_name: str) -> Dict[str, float]:
+        vendor = normalize_party_name(seller_name)
+        if not vendor:
+            return {}
+        
+        with self._lock:
+            if vendor in self._by_vendor:
+                return {vendor: 100.0}
+            blocked: Set[str] = set()
+            for key in ngram_keys(vendor):
+                blocked |= self._vendor_ngrams.get(key, set())
+        
+        scores = {
+            candidate: fuzz.token_set_ratio(vendor, candidate)
+            for candidate in blocked
+        }
+        return {name: score for name, score in scores.items() if score >= self.vendor_threshold}
+    
+    def _remove_locked(self, contract_id: str) -> bool:
+        contract = self._contracts.pop(contract_id, None)
+        if contract is None:
+            return False
+        self._vocabularies.pop(contract_id, None)
+        self._fingerprints.pop(contract_id, None)
+        
+        vendor = normalize_party_name(contract.vendor_name)
+        client = normalize_party_name(contract.client_name)
+        for mapping, key in ((self._by_vendor, vendor), (self._by_client, client)):
+            ids = mapping.get(key)
+            if ids is not None:
+                ids.discard(contract_id)
+                if not ids:
+                    del mapping[key]
+        
+        if vendor not in self._by_vendor:
+            for key in ngram_keys(vendor):
+                names = self._vendor_ngrams.get(key)
+                if names is not None:
+                    names.discard(vendor)
+                    if not names:
+                        del self._vendor_ngrams[key]
+        return True
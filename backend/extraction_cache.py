@@ -0,0 +1,167 @@
+"""
+Content-addressed cache of ADE extractions keyed by file bytes, schema and mapper version
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from ade_client import ExtractResult
+from cache import LRUCache
+from models import ExtractionMeta, ParseResult
+
+_SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def content_sha256(contents: bytes) -> str:
+    return hashlib.sha256(contents).hexdigest()
+
+
+def extraction_key(file_sha256: str, schema: Dict[str, Any], doc_type: str, mapper_version: str) -> str:
+    # The file hash leads the key so every extraction of one upload can be
+    # purged together, whatever schema it was extracted with
+    config = json.dumps(
+        {"schema": schema, "doc_type": doc_type, "mapper_version": mapper_version},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return f"{file_sha256}-{hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _stat(path: Path) -> os.stat_result:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return os.stat_result((0,) * 10)
+
+
+def dump_extraction(result: ExtractResult) -> str:
+    return json.dumps({
+        "document": result.document,
+        "meta": [m.model_dump(mode="json") for m in result.meta],
+        "parse": result.parse.model_dump(mode="json"),
+    })
+
+
+def load_extraction(payload: str) -> ExtractResult:
+    data = json.loads(payload)
+    return ExtractResult(
+        document=data["document"],
+        meta=[ExtractionMeta(**m) for m in data["meta"]],
+        parse=ParseResult(**data["parse"]),
+    )
+
+
+class ExtractionCache:
+    # A small in-memory LRU of payloads in front of a byte-capped directory of
+    # JSON files (two-character fan-out, like DiskResultCache). Disk hits are
+    # promoted to memory and touch the file, so disk eviction drops the least
+    # recently used extractions first; evicted keys leave both tiers. The
+    # directory may be shared by several processes (the API and
+    # scripts/bulk_extract.py), so writes go through unique temp files.
+    
+    def __init__(self, directory: str, max_mb: float = 512.0, memory_entries: int = 128):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._memory = LRUCache(max_entries=memory_entries)
+        self._lock = threading.Lock()
+        self._bytes = sum(_stat(path).st_size for path in self.directory.glob("*/*.json"))
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[str]:
+        payload = self._memory.get(key)
+        if payload is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return payload
+        
+        path = self._path(key)
+        try:
+            payload = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        self._memory.put(key, payload)
+        with self._lock:
+            self.disk_hits += 1
+        return payload
+    
+    def __contains__(self, key: str) -> bool:
+        # Every entry is on disk, so presence is checked there without counting
+        # a lookup or refreshing recency
+        return self._path(key).exists()
+    
+    def put(self, key: str, payload: str) -> None:
+        self._memory.put(key, payload)
+        
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        old_size = _stat(path).st_size
+        
+        data = payload.encode("utf-8")
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{key}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+        
+        with self._lock:
+            self._bytes += len(data) - old_size
+            over = self._bytes > self.max_bytes
+        if over:
+            self._evict()
+    
+    def purge(self, file_sha256: Optional[str] = None) -> int:
+        # Drops every extraction of one file, or everything when no hash is
+        # given; the memory tier is simply emptied and refills from disk
+        if file_sha256 is not None and not _SHA256_RE.fullmatch(file_sha256):
+            raise ValueError(f"Not a hex SHA-256 digest: '{file_sha256}'")
+        pattern = f"{file_sha256[:2]}/{file_sha256}-*.json" if file_sha256 else "*/*.json"
+        removed = 0
+        with self._lock:
+            for path in self.directory.glob(pattern):
+                self._bytes -= _stat(path).st_size
+                path.unlink(missing_ok=True)
+                removed += 1
+        self._memory.clear()
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "directory": str(self.directory),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+    
+    def _evict(self) -> None:
+        # Trim to 90% of the budget so a full cache doesn't rescan the
+        # directory on every put
+        target = self.max_bytes * 0.9
+        with self._lock:
+            paths = sorted(self.directory.glob("*/*.json"), key=lambda p: _stat(p).st_mtime)
+            for path in paths:
+                if self._bytes <= target:
+                    break
+                self._bytes -= _stat(path).st_size
+                path.unlink(missing_ok=True)
+                self._memory.pop(path.stem)
+                self.evictions += 1
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
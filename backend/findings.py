@@ -0,0 +1,100 @@
+"""
+Compact finding records used inside the engine, converted to models at the API boundary
+"""
+
+from typing import List, Optional, Tuple
+from models import Finding, FindingType, FindingSeverity, MatchTier, ReconcileResponse, ReconcileSummary
+
+
+class FindingRecord:
+    # Same fields as models.Finding minus the evidence ones, which the engine
+    # never fills; no validation, no per-instance __dict__
+    __slots__ = ("type", "severity", "details", "invoice_line_idx", "contract_line_idx", "match_tier")
+    
+    def __init__(
+        self,
+        type: FindingType,
+        severity: FindingSeverity,
+        details: str,
+        invoice_line_idx: Optional[int] = None,
+        contract_line_idx: Optional[int] = None,
+        match_tier: Optional[MatchTier] = None
+    ):
+        self.type = type
+        self.severity = severity
+        self.details = details
+        self.invoice_line_idx = invoice_line_idx
+        self.contract_line_idx = contract_line_idx
+        self.match_tier = match_tier
+    
+    def key(self) -> Tuple:
+        return (
+            self.type,
+            self.severity,
+            self.details,
+            self.invoice_line_idx,
+            self.contract_line_idx,
+            self.match_tier,
+        )
+    
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FindingRecord) and self.key() == other.key()
+    
+    def __hash__(self) -> int:
+        return hash(self.key())
+    
+    def __repr__(self) -> str:
+        return f"FindingRecord({self.type.value}, {self.severity.value}, line={self.invoice_line_idx})"
+    
+    def __getstate__(self) -> Tuple:
+        return self.key()
+    
+    def __setstate__(self, state: Tuple) -> None:
+        (
+            self.type,
+            self.severity,
+            self.details,
+            self.invoice_line_idx,
+            self.contract_line_idx,
+            self.match_tier,
+        ) = state
+    
+    def to_model(self) -> Finding:
+        # Fields were produced by the engine itself, so validation is skipped
+        return Finding.model_construct(
+            type=self.type,
+            severity=self.severity,
+            details=self.details,
+            invoice_line_idx=self.invoice_line_idx,
+            contract_line_idx=self.contract_line_idx,
+            match_tier=self.match_tier,
+        )
+
+
+def summarize(records: List[FindingRecord], partial: bool = False) -> ReconcileSummary:
+    major_count = minor_count = 0
+    for record in records:
+        if record.severity == FindingSeverity.MAJOR:
+            major_count += 1
+        elif record.severity == FindingSeverity.MINOR:
+            minor_count += 1
+    
+    return ReconcileSummary.model_construct(
+        pass_=major_count == 0,
+        major_count=major_count,
+        minor_count=minor_count,
+        total_count=len(records),
+        partial=partial,
+    )
+
+
+def to_response(
+    records: List[FindingRecord],
+    partial: bool = False,
+    result_token: Optional[str] = None
+) -> ReconcileResponse:
+    return ReconcileResponse.model_construct(
+        summary=summarize(records, partial=partial),
+        findings=[record.to_model() for record in records],
+        result_token=result_token,
+    )
@@ -0,0 +1,64 @@
+"""
+Server-side reconciliation sessions for incremental re-reconciliation
+"""
+
+import difflib
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from cache import LRUCache
+from contract_index import ContractIndex
+from matching import LineMatch
+from findings import FindingRecord
+from models import Invoice, Contract, FindingPatchOp
+
+
+@dataclass
+class ReconcileSession:
+    invoice: Invoice
+    contract: Contract
+    index: ContractIndex
+    row_scores: Dict[int, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    matches: List[LineMatch] = field(default_factory=list)
+    header_findings: List[FindingRecord] = field(default_factory=list)
+    row_findings: Dict[int, List[FindingRecord]] = field(default_factory=dict)
+    findings: List[FindingRecord] = field(default_factory=list)
+    token: Optional[str] = None
+
+
+class SessionStore:
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = 1800.0):
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    
+    def put(self, session: ReconcileSession) -> str:
+        session.token = session.token or uuid.uuid4().hex
+        self._cache.put(session.token, session)
+        return session.token
+    
+    def get(self, token: str) -> Optional[ReconcileSession]:
+        return self._cache.get(token)
+    
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+def findings_patch(old: List[FindingRecord], new: List[FindingRecord]) -> List[FindingPatchOp]:
+    # JSON Patch style ops turning `old` into `new`. Opcodes are emitted from
+    # the end of the list backwards so every path refers to a position that
+    # earlier ops have not shifted.
+    old_keys = [f.key() for f in old]
+    new_keys = [f.key() for f in new]
+    matcher = difflib.SequenceMatcher(a=old_keys, b=new_keys, autojunk=False)
+    
+    ops: List[FindingPatchOp] = []
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == "equal":
+            continue
+        for _ in range(i2 - i1):
+            ops.append(FindingPatchOp(op="remove", path=f"/findings/{i1}"))
+        for offset, finding in enumerate(new[j1:j2]):
+            ops.append(FindingPatchOp(op="add", path=f"/findings/{i1 + offset}", value=finding.to_model()))
+    
+    return ops
@@ -0,0 +1,87 @@
+"""
+Opt-in per-stage timing and counters for a single reconciliation request
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+
+class _Stage:
+    __slots__ = ("timer", "entry", "previous", "start")
+    
+    def __init__(self, timer: "StageTimer", name: str):
+        self.timer = timer
+        self.entry = timer._stages.setdefault(name, [0.0, {}])
+    
+    def __enter__(self) -> "_Stage":
+        self.previous = self.timer._current
+        self.timer._current = self.entry
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.entry[0] += time.perf_counter() - self.start
+        self.timer._current = self.previous
+
+
+class StageTimer:
+    # Wall time per named stage plus counters (pair comparisons, cache hits)
+    # attributed to whichever stage is open. A stage entered more than once
+    # accumulates. One timer belongs to one request and is not thread-safe.
+    enabled = True
+    
+    def __init__(self):
+        self._stages: Dict[str, List[Any]] = {}
+        self._current: Optional[List[Any]] = None
+    
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+    
+    def count(self, key: str, n: int = 1) -> None:
+        if self._current is not None:
+            counters = self._current[1]
+            counters[key] = counters.get(key, 0) + n
+    
+    def report(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": name, "duration_ms": round(seconds * 1000, 3), "counters": dict(counters)}
+            for name, (seconds, counters) in self._stages.items()
+        ]
+    
+    def server_timing(self) -> str:
+        # W3C Server-Timing header value; counters go in each metric's desc
+        metrics = []
+        for name, (seconds, counters) in self._stages.items():
+            metric = f"{name};dur={seconds * 1000:.2f}"
+            if counters:
+                desc = " ".join(f"{key}={value}" for key, value in counters.items())
+                metric += f';desc="{desc}"'
+            metrics.append(metric)
+        return ", ".join(metrics)
+
+
+class _NullStage:
+    __slots__ = ()
+    
+    def __enter__(self) -> "_NullStage":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullTimer(StageTimer):
+    # Default for uninstrumented calls: every method is a constant-time no-op
+    enabled = False
+    
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+    
+    def count(self, key: str, n: int = 1) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -0,0 +1,155 @@
+"""
+Persistent per-contract-line quantity ledger for cumulative max_quantity checks
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List
+
+# SQLite's default limit on bound parameters is 999 on older builds
+_MAX_PARAMS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS line_totals (
+    contract_id TEXT NOT NULL,
+    line_key TEXT NOT NULL,
+    consumed REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (contract_id, line_key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS postings (
+    contract_id TEXT NOT NULL,
+    invoice_number TEXT NOT NULL,
+    line_key TEXT NOT NULL,
+    quantity REAL NOT NULL,
+    PRIMARY KEY (contract_id, invoice_number, line_key)
+) WITHOUT ROWID;
+"""
+
+
+def _chunks(values: List[str], size: int = _MAX_PARAMS) -> Iterable[List[str]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class QuantityLedger:
+    # Lines are identified by ContractIndex.line_keys (normalized SKU or
+    # description), not by position, so totals stay on the right line when
+    # a contract is re-uploaded with lines inserted or reordered
+    
+    def __init__(self, path: str, timeout_seconds: float = 30.0):
+        self.path = path
+        self.timeout_seconds = timeout_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.posts = 0
+        self.replays = 0
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+    
+    def post(
+        self,
+        contract_id: str,
+        invoice_number: str,
+        quantities: Dict[str, float]
+    ) -> Dict[str, float]:
+        # Records `quantities` (contract line key -> units) as this invoice's
+        # consumption, replacing any earlier posting of the same invoice, and
+        # returns what other invoices had consumed on each line beforehand
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = dict(conn.execute(
+                "SELECT line_key, quantity FROM postings WHERE contract_id = ? AND invoice_number = ?",
+                (contract_id, invoice_number)
+            ))
+            totals = self._totals(conn, contract_id, sorted(set(previous) | set(quantities)))
+            prior = {
+                line: totals.get(line, 0.0) - previous.get(line, 0.0)
+                for line in quantities
+            }
+            
+            deltas = [
+                (contract_id, line, quantities.get(line, 0.0) - previous.get(line, 0.0))
+                for line in set(previous) | set(quantities)
+            ]
+            conn.executemany(
+                "INSERT INTO line_totals (contract_id, line_key, consumed) VALUES (?, ?, ?) "
+                "ON CONFLICT (contract_id, line_key) DO UPDATE SET consumed = consumed + excluded.consumed",
+                [d for d in deltas if d[2] != 0]
+            )
+            conn.execute(
+                "DELETE FROM postings WHERE contract_id = ? AND invoice_number = ?",
+                (contract_id, invoice_number)
+            )
+            conn.executemany(
+                "INSERT INTO postings (contract_id, invoice_number, line_key, quantity) VALUES (?, ?, ?, ?)",
+                [(contract_id, invoice_number, line, qty) for line, qty in quantities.items()]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        with self._lock:
+            self.posts += 1
+            self.replays += 1 if previous else 0
+        return prior
+    
+    def prior(
+        self,
+        contract_id: str,
+        invoice_number: str,
+        line_keys: Iterable[str]
+    ) -> Dict[str, float]:
+        # What post() would return, without recording anything: consumption
+        # by other invoices on each line. A read transaction, so in WAL mode
+        # it sees one snapshot and never waits on a writer
+        conn = self._connection()
+        lines = sorted(set(line_keys))
+        conn.execute("BEGIN")
+        try:
+            totals = self._totals(conn, contract_id, lines)
+            previous = dict(conn.execute(
+                "SELECT line_key, quantity FROM postings WHERE contract_id = ? AND invoice_number = ?",
+                (contract_id, invoice_number)
+            ))
+        finally:
+            conn.execute("COMMIT")
+        return {line: totals.get(line, 0.0) - previous.get(line, 0.0) for line in lines}
+    
+    def void(self, contract_id: str, invoice_number: str) -> None:
+        self.post(contract_id, invoice_number, {})
+    
+    def totals(self, contract_id: str) -> Dict[str, float]:
+        return dict(self._connection().execute(
+            "SELECT line_key, consumed FROM line_totals WHERE contract_id = ? ORDER BY line_key",
+            (contract_id,)
+        ))
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "posts": self.posts, "replays": self.replays}
+    
+    def _totals(self, conn: sqlite3.Connection, contract_id: str, lines: List[str]) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for chunk in _chunks(lines):
+            placeholders = ",".join("?" * len(chunk))
+            totals.update(conn.execute(
+                f"SELECT line_key, consumed FROM line_totals "
+                f"WHERE contract_id = ? AND line_key IN ({placeholders})",
+                (contract_id, *chunk)
+            ))
+        return totals
+    
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; transactions are managed explicitly
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout_seconds, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,289 @@
+"""
+Batched line scoring and assignment helpers for the reconciliation engine
+"""
+
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+import numpy as np
+from rapidfuzz import fuzz, process
+from models import MatchTier
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+class LineMatch(NamedTuple):
+    invoice_idx: int
+    contract_idx: int
+    confidence: float
+    tier: MatchTier
+
+
+# Vendors repeat the same descriptions invoice after invoice
+@lru_cache(maxsize=65536)
+def normalize_description(desc: str) -> str:
+    return " ".join(desc.lower().split())
+
+
+def score_matrix(
+    inv_descs: Sequence[str],
+    cont_descs: Sequence[str],
+    score_cutoff: float = 0,
+    workers: int = 1
+) -> np.ndarray:
+    # (n_invoice, n_contract) token_set_ratio scores in [0, 100]; inputs must
+    # already be normalized and anything below score_cutoff comes back as 0
+    if not inv_descs or not cont_descs:
+        return np.zeros((len(inv_descs), len(cont_descs)), dtype=np.float64)
+    
+    return process.cdist(
+        inv_descs,
+        cont_descs,
+        scorer=fuzz.token_set_ratio,
+        score_cutoff=score_cutoff,
+        dtype=np.float64,
+        workers=workers,
+    )
+
+
+def score_candidates(
+    inv_descs: Sequence[str],
+    cont_descs: Sequence[str],
+    candidates: Sequence[np.ndarray],
+    score_cutoff: float = 0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Score each invoice description against its own candidate columns only;
+    # returns (row, col, score) triples for scores at or above score_cutoff
+    rows, cols, values = [], [], []
+    for row, (desc, cand) in enumerate(zip(inv_descs, candidates)):
+        if not len(cand):
+            continue
+        
+        scores = process.cdist(
+            [desc],
+            [cont_descs[c] for c in cand],
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=score_cutoff,
+            dtype=np.float64,
+        )[0]
+        hit = scores > 0
+        rows.append(np.full(int(hit.sum()), row, dtype=np.int64))
+        cols.append(cand[hit])
+        values.append(scores[hit])
+    
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float64)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+
+def greedy_assignment(
+    scores: np.ndarray,
+    threshold: float
+) -> List[Tuple[int, int, float]]:
+    # Each invoice row, in order, takes its best still-unassigned contract
+    # column (lowest index on ties) - same result as the pairwise loop
+    matches: List[Tuple[int, int, float]] = []
+    if scores.size == 0:
+        return matches
+    
+    taken = np.zeros(scores.shape[1], dtype=bool)
+    for inv_idx in range(scores.shape[0]):
+        row = np.where(taken, -1.0, scores[inv_idx])
+        cont_idx = int(np.argmax(row))
+        score = row[cont_idx]
+        
+        if score > 0 and score >= threshold:
+            matches.append((inv_idx, cont_idx, float(score) / 100.0))
+            taken[cont_idx] = True
+    
+    return matches
+
+
+def optimal_assignment(
+    scores: np.ndarray,
+    threshold: float
+) -> List[Tuple[int, int, float]]:
+    if scores.size == 0:
+        return []
+    
+    edge_rows, edge_cols = np.nonzero((scores > 0) & (scores >= threshold))
+    return optimal_assignment_sparse(
+        edge_rows,
+        edge_cols,
+        scores[edge_rows, edge_cols],
+        threshold
+    )
+
+
+def greedy_assignment_sparse(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    scores: np.ndarray,
+    threshold: float
+) -> List[Tuple[int, int, float]]:
+    # Same first-come semantics as greedy_assignment, over (row, col, score)
+    # candidate triples instead of a dense matrix
+    matches: List[Tuple[int, int, float]] = []
+    keep = (scores > 0) & (scores >= threshold)
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+    if rows.size == 0:
+        return matches
+    
+    order = np.lexsort((cols, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ends = np.r_[starts[1:], rows.size]
+    
+    taken = set()
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        best_col = -1
+        best_score = 0.0
+        for col, score in zip(cols[start:end].tolist(), scores[start:end].tolist()):
+            if col not in taken and score > best_score:
+                best_col = col
+                best_score = score
+        
+        if best_col >= 0:
+            matches.append((int(rows[start]), best_col, best_score / 100.0))
+            taken.add(best_col)
+    
+    return matches
+
+
+def optimal_assignment_sparse(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    scores: np.ndarray,
+    threshold: float
+) -> List[Tuple[int, int, float]]:
+    # Global assignment maximizing total similarity over the pairs that reach
+    # threshold. Only those pairs are considered, so the graph is split into
+    # connected components and each one is solved independently - on real
+    # contracts most components are a single invoice line.
+    matches: List[Tuple[int, int, float]] = []
+    keep = (scores > 0) & (scores >= threshold)
+    rows, cols, scores = rows[keep], cols[keep], scores[keep]
+    if rows.size == 0:
+        return matches
+    
+    labels = _component_labels(rows, cols)
+    order = np.argsort(labels, kind="stable")
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+    
+    for edges in np.split(order, boundaries):
+        comp_rows, row_pos = np.unique(rows[edges], return_inverse=True)
+        comp_cols, col_pos = np.unique(cols[edges], return_inverse=True)
+        block = np.zeros((len(comp_rows), len(comp_cols)))
+        block[row_pos, col_pos] = scores[edges]
+        
+        if len(comp_rows) == 1:
+            pairs = [(0, int(np.argmax(block[0])))]
+        elif len(comp_cols) == 1:
+            pairs = [(int(np.argmax(block[:, 0])), 0)]
+        else:
+            pairs = _max_weight_matching(block)
+        
+        for r, c in pairs:
+            if block[r, c] > 0:
+                matches.append((int(comp_rows[r]), int(comp_cols[c]), float(block[r, c]) / 100.0))
+    
+    matches.sort()
+    return matches
+
+
+def _component_labels(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    # Union-find over the bipartite graph; column nodes are offset past rows.
+    # Returns the component root for every edge.
+    offset = int(rows.max()) + 1
+    parent: Dict[int, int] = {}
+    
+    def find(x: int) -> int:
+        root = parent.setdefault(x, x)
+        while root != parent[root]:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+    
+    row_list = rows.tolist()
+    for r, c in zip(row_list, cols.tolist()):
+        a, b = find(r), find(c + offset)
+        if a != b:
+            parent[b] = a
+    
+    return np.array([find(r) for r in row_list])
+
+
+def _max_weight_matching(weights: np.ndarray) -> List[Tuple[int, int]]:
+    if SCIPY_AVAILABLE:
+        row_ind, col_ind = linear_sum_assignment(weights, maximize=True)
+        return list(zip(row_ind.tolist(), col_ind.tolist()))
+    
+    transposed = weights.shape[0] > weights.shape[1]
+    if transposed:
+        weights = weights.T
+    col4row = _shortest_augmenting_path(weights.max() - weights)
+    
+    if transposed:
+        return [(int(c), r) for r, c in enumerate(col4row)]
+    return [(r, int(c)) for r, c in enumerate(col4row)]
+
+
+def _shortest_augmenting_path(cost: np.ndarray) -> np.ndarray:
+    # Rectangular min-cost assignment (rows <= cols), the same Jonker-Volgenant
+    # style algorithm scipy uses, with the inner column scans vectorized
+    n_rows, n_cols = cost.shape
+    u = np.zeros(n_rows)
+    v = np.zeros(n_cols)
+    col4row = np.full(n_rows, -1, dtype=np.int64)
+    row4col = np.full(n_cols, -1, dtype=np.int64)
+    
+    for cur_row in range(n_rows):
+        shortest = np.full(n_cols, np.inf)
+        path = np.full(n_cols, -1, dtype=np.int64)
+        remaining = np.ones(n_cols, dtype=bool)
+        visited_rows = []
+        min_val = 0.0
+        i = cur_row
+        sink = -1
+        
+        while sink == -1:
+            visited_rows.append(i)
+            reduced = min_val + cost[i] - u[i] - v
+            improved = remaining & (reduced < shortest)
+            path[improved] = i
+            shortest[improved] = reduced[improved]
+            
+            candidates = np.where(remaining, shortest, np.inf)
+            j = int(np.argmin(candidates))
+            min_val = candidates[j]
+            free_ties = np.flatnonzero((candidates == min_val) & (row4col == -1))
+            if free_ties.size:
+                j = int(free_ties[0])
+            
+            remaining[j] = False
+            if row4col[j] == -1:
+                sink = j
+            else:
+                i = int(row4col[j])
+        
+        u[cur_row] += min_val
+        others = np.array(visited_rows[1:], dtype=np.int64)
+        if others.size:
+            u[others] += min_val - shortest[col4row[others]]
+        scanned = ~remaining
+        v[scanned] -= min_val - shortest[scanned]
+        
+        j = sink
+        while True:
+            i = int(path[j])
+            row4col[j] = i
+            col4row[i], j = j, int(col4row[i])
+            if i == cur_row:
+                break
+    
+    return col4row
@@ -21,6 +21,12 @@ class FindingType(str, Enum):
     TAX_MISMATCH = "TAX_MISMATCH"
 
 
+class MatchTier(str, Enum):
+    SKU = "SKU"
+    EXACT = "EXACT"
+    FUZZY = "FUZZY"
+
+
 class Box(BaseModel):
     page: int = Field(default=0, description="Page number (0-indexed)")
     left: float = Field(ge=0, le=1, description="Left coordinate [0..1]")
@@ -126,6 +132,7 @@ class Finding(BaseModel):
     details: str
     invoice_line_idx: Optional[int] = None
     contract_line_idx: Optional[int] = None
+    match_tier: Optional[MatchTier] = None
     evidence_page: Optional[int] = None
     evidence_boxes: List[Box] = Field(default_factory=list)
 
@@ -135,11 +142,90 @@ class ReconcileSummary(BaseModel):
     major_count: int
     minor_count: int
     total_count: int
+    partial: bool = Field(default=False, description="Triage result: findings may be incomplete")
+
+
+class StageTiming(BaseModel):
+    name: str
+    duration_ms: float
+    counters: Dict[str, int] = Field(default_factory=dict, description="e.g. comparisons, cache_hits")
 
 
 class ReconcileResponse(BaseModel):
     summary: ReconcileSummary
     findings: List[Finding]
+    result_token: Optional[str] = None
+    diagnostics: Optional[List[StageTiming]] = Field(default=None, description="Per-stage timings, if requested")
+
+    class Config:
+        populate_by_name = True
+
+
+class ContractSummary(BaseModel):
+    contract_id: str
+    vendor_name: str
+    client_name: str
+    currency: str
+    line_count: int
+
+
+class ContractRoute(BaseModel):
+    contract_id: str
+    vendor_name: str
+    client_name: str
+    coverage: float = Field(description="Share of invoice lines matched to a contract line")
+    matched_lines: int
+    vendor_score: float = Field(description="Vendor name similarity [0..1]")
+    client_match: bool
+    currency_match: bool
+
+
+class RouteResponse(BaseModel):
+    candidates: List[ContractRoute]
+
+
+class BatchReconcileHeader(BaseModel):
+    # First line of an NDJSON batch; one invoice per line follows
+    contract: Optional[Contract] = None
+    contract_id: Optional[str] = None
+    mode: str = "full"
+    diagnostics: bool = False
+    # Record each invoice's quantities in the quantity ledger
+    post: bool = False
+
+
+class BatchReconcileRequest(BatchReconcileHeader):
+    invoices: List[Invoice]
+
+
+class BatchReconcileItem(BaseModel):
+    index: int
+    invoice_number: Optional[str] = None
+    contract_id: Optional[str] = None
+    result: Optional[ReconcileResponse] = None
+    error: Optional[str] = None
+
+
+class InvoiceLineChange(BaseModel):
+    index: int
+    line: InvoiceLine
+
+
+class ReconcileDeltaRequest(BaseModel):
+    result_token: str
+    changes: List[InvoiceLineChange]
+
+
+class FindingPatchOp(BaseModel):
+    op: str
+    path: str
+    value: Optional[Finding] = None
+
+
+class ReconcileDeltaResponse(BaseModel):
+    result_token: str
+    summary: ReconcileSummary
+    patch: List[FindingPatchOp]
 
     class Config:
         populate_by_name = True
@@ -159,6 +245,32 @@ class ExtractionResponse(BaseModel):
     file_path: str
 
 
+class BulkExtractRequest(BaseModel):
+    paths: List[str] = Field(description="Files or directories under BULK_INPUT_DIR")
+    doc_type: str = "invoice"
+    job_id: Optional[str] = Field(default=None, description="Resume this job; derived from the file list if omitted")
+    workers: Optional[int] = Field(default=None, ge=1)
+    rate_per_minute: Optional[float] = Field(default=None, ge=0, description="Upstream calls per minute (0 = unlimited)")
+
+
+class BulkJobStatus(BaseModel):
+    job_id: str
+    doc_type: str
+    state: str
+    total: int
+    skipped: int
+    cached: int
+    extracted: int
+    failed: int
+    remaining: int
+    elapsed_seconds: float
+    extractions_per_minute: float
+    rate_limit_wait_seconds: float
+    checkpoint_path: str
+    errors: Dict[str, str] = Field(default_factory=dict)
+    error: Optional[str] = None
+
+
 class NoteGenerationRequest(BaseModel):
     invoice: Invoice
     contract: Contract
@@ -0,0 +1,226 @@
+"""
+Image preprocessing for ADE uploads: decoder-level downscaling and JPEG-in-PDF recompression
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from cache import LRUCache
+from instrumentation import StageTimer
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+PDF_MIME_TYPE = 'application/pdf'
+
+# Long edge of an A4 page; scans are sized as if printed on one
+PAGE_LONG_SIDE_INCHES = 11.7
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    target_dpi: int = 200
+    grayscale: bool = False
+    jpeg_quality: int = 80
+    
+    @property
+    def max_side(self) -> int:
+        return int(self.target_dpi * PAGE_LONG_SIDE_INCHES)
+
+
+@dataclass
+class PreparedUpload:
+    content: bytes
+    mime_type: str
+    # StageTimer.report() entries: read, then decode/downscale/encode for images
+    stages: List[Dict[str, Any]]
+    cached: bool = False
+
+
+def convert_image(data: bytes, options: PreprocessOptions) -> Tuple[bytes, List[Dict[str, Any]]]:
+    # Runs in a pool worker, so only bytes and plain dicts cross the process
+    # boundary
+    from PIL import Image
+    
+    timer = StageTimer()
+    with timer.stage("decode"):
+        img = Image.open(io.BytesIO(data))
+        timer.count("bytes_in", len(data))
+        timer.count("source_pixels", img.width * img.height)
+        scale = options.max_side / max(img.size)
+        if scale < 1:
+            # JPEG decoders scale by 1/2 to 1/8 while decoding, so an oversized
+            # photo is never held in memory at full resolution; other formats
+            # ignore the hint
+            img.draft("L" if options.grayscale else "RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+        img.load()
+        timer.count("decoded_pixels", img.width * img.height)
+    
+    with timer.stage("downscale"):
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+            rgb_img.paste(img, mask=img.getchannel('A'))
+            img = rgb_img
+        if options.grayscale or img.mode in ('1', 'L'):
+            img = img.convert('L')
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        # Pillow's bilinear filter widens its support when shrinking, so it
+        # stays antialiased at about half the cost of Lanczos
+        img.thumbnail((options.max_side, options.max_side), Image.BILINEAR)
+        timer.count("pixels", img.width * img.height)
+    
+    with timer.stage("encode"):
+        # Pillow embeds L and RGB images in the PDF as JPEG (DCTDecode). The
+        # creation/modification timestamps are left out so one image always
+        # converts to the same bytes, whichever worker does it and when
+        out = io.BytesIO()
+        img.save(
+            out,
+            format='PDF',
+            quality=options.jpeg_quality,
+            resolution=options.target_dpi,
+            creationDate=None,
+            modDate=None
+        )
+        content = out.getvalue()
+        timer.count("bytes_out", len(content))
+    
+    return content, timer.report()
+
+
+class ImagePreprocessor:
+    # Turns uploads into the PDF bytes ADE expects. Images are converted in a
+    # process pool (inline when workers=0) and the converted artifacts are
+    # kept in a byte-capped LRU keyed by source hash and options, so retries
+    # and re-extractions with another schema skip the conversion.
+    
+    def __init__(
+        self,
+        options: Optional[PreprocessOptions] = None,
+        workers: int = 0,
+        cache_mb: float = 64.0
+    ):
+        self.options = options or PreprocessOptions()
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._cache = (
+            LRUCache(
+                max_entries=1024,
+                max_bytes=int(cache_mb * 1024 * 1024),
+                sizeof=lambda key, content: len(content)
+            )
+            if cache_mb > 0 else None
+        )
+        self._lock = threading.Lock()
+        self.images = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.stage_ms: Dict[str, float] = {}
+    
+    def prepare(self, file_path: str) -> PreparedUpload:
+        data, key, read_stages = self._read(file_path)
+        if key is None:
+            return PreparedUpload(data, PDF_MIME_TYPE, read_stages)
+        
+        cached = self._cached(key, read_stages)
+        if cached is not None:
+            return cached
+        
+        if self.workers > 0:
+            content, stages = self._executor().submit(convert_image, data, self.options).result()
+        else:
+            content, stages = convert_image(data, self.options)
+        return self._converted(key, data, content, read_stages + stages)
+    
+    async def prepare_async(self, file_path: str) -> PreparedUpload:
+        data, key, read_stages = await asyncio.to_thread(self._read, file_path)
+        if key is None:
+            return PreparedUpload(data, PDF_MIME_TYPE, read_stages)
+        
+        cached = self._cached(key, read_stages)
+        if cached is not None:
+            return cached
+        
+        if self.workers > 0:
+            loop = asyncio.get_running_loop()
+            content, stages = await loop.run_in_executor(self._executor(), convert_image, data, self.options)
+        else:
+            content, stages = await asyncio.to_thread(convert_image, data, self.options)
+        return self._converted(key, data, content, read_stages + stages)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "options": asdict(self.options),
+            "images": self.images,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "stage_ms": {name: round(ms, 3) for name, ms in self.stage_ms.items()},
+            "artifact_cache": self._cache.stats() if self._cache is not None else None,
+        }
+    
+    def _read(self, file_path: str) -> Tuple[bytes, Optional[str], List[Dict[str, Any]]]:
+        # PDFs pass through untouched and get no cache key
+        timer = StageTimer()
+        with timer.stage("read"):
+            with open(file_path, "rb") as f:
+                data = f.read()
+            timer.count("bytes", len(data))
+        
+        key = None
+        if os.path.splitext(file_path)[1].lower() in IMAGE_EXTENSIONS:
+            key = f"{hashlib.sha256(data).hexdigest()}:{self.options}"
+        return data, key, timer.report()
+    
+    def _cached(self, key: str, read_stages: List[Dict[str, Any]]) -> Optional[PreparedUpload]:
+        if self._cache is None:
+            return None
+        content = self._cache.get(key)
+        if content is None:
+            return None
+        return PreparedUpload(content, PDF_MIME_TYPE, read_stages, cached=True)
+    
+    def _converted(self, key: str, data: bytes, content: bytes, stages: List[Dict[str, Any]]) -> PreparedUpload:
+        if self._cache is not None:
+            self._cache.put(key, content)
+        with self._lock:
+            self.images += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(content)
+            for stage in stages:
+                self.stage_ms[stage["name"]] = self.stage_ms.get(stage["name"], 0.0) + stage["duration_ms"]
+        
+        logger.info(
+            f"[ADE] Image converted to PDF ({len(data)} -> {len(content)} bytes): "
+            + ", ".join(f"{s['name']} {s['duration_ms']:.1f}ms" for s in stages)
+        )
+        return PreparedUpload(content, PDF_MIME_TYPE, stages)
+    
+    def _executor(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the app doesn't start workers.
+        # By then the server has threads (executor, httpx, sqlite), and a
+        # forked child can inherit a lock some other thread held, so workers
+        # are spawned as fresh interpreters instead
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
@@ -3,64 +3,686 @@ Reconciliation engine - matches invoices to contracts
 """
 
 import logging
-from typing import List, Tuple, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, List, Tuple, Dict, Optional, Set
+import numpy as np
 from rapidfuzz import fuzz
+from blocking import BLOCKING_MODES, CandidateBlocker
+from findings import FindingRecord, to_response
+from incremental import ReconcileSession, findings_patch
+from instrumentation import NULL_TIMER, StageTimer
+from contract_index import ContractIndex, ContractIndexCache, contract_fingerprint, normalize_sku
+from ledger import QuantityLedger
+from rules import RulePlan
+from similarity_cache import RowScores, SimilarityCache
+from matching import (
+    LineMatch,
+    normalize_description,
+    score_matrix,
+    score_candidates,
+    greedy_assignment,
+    greedy_assignment_sparse,
+    optimal_assignment,
+    optimal_assignment_sparse,
+)
 from models import (
     Invoice,
+    InvoiceLine,
     Contract,
-    Finding,
-    FindingType,
-    FindingSeverity,
+    FindingPatchOp,
+    MatchTier,
     ReconcileResponse,
-    ReconcileSummary,
 )
 
 logger = logging.getLogger(__name__)
 
+# Part of every result cache key: bump when a change alters the findings
+# produced for the same invoice, contract and settings
+ENGINE_VERSION = "1"
+
+RECONCILE_MODES = ("full", "triage")
+
+MATCH_STRATEGIES = {
+    "greedy": greedy_assignment,
+    "optimal": optimal_assignment,
+}
+
+SPARSE_MATCH_STRATEGIES = {
+    "greedy": greedy_assignment_sparse,
+    "optimal": optimal_assignment_sparse,
+}
+
+# Blocking used when none is configured. Optimal assignment scores every
+# pending line against every free contract line, which is seconds per
+# invoice on large contracts without it; "off" disables blocking outright
+DEFAULT_BLOCKING = {
+    "greedy": None,
+    "optimal": "tokens",
+}
+
+# Per-process state for reconcile_many workers, set once by _init_worker
+_worker_engine: Optional["ReconcileEngine"] = None
+_worker_contracts: Dict[Tuple[str, str], Tuple[Contract, ContractIndex]] = {}
+
 
 class ReconcileEngine:
     
     def __init__(
         self,
         fuzzy_threshold: int = 85,
-        allowed_variance_pct: float = 2.0
+        allowed_variance_pct: float = 2.0,
+        batch_scoring: bool = True,
+        match_strategy: str = "greedy",
+        index_cache: Optional[ContractIndexCache] = None,
+        blocking: Optional[str] = None,
+        blocking_min_lines: int = 1000,
+        blocking_candidates: int = 50,
+        similarity_cache: Optional[SimilarityCache] = None,
+        rules: Optional[List[str]] = None,
+        ledger: Optional[QuantityLedger] = None,
+        scoring_workers: int = -1
     ):
+        if match_strategy not in MATCH_STRATEGIES:
+            raise ValueError(
+                f"Unknown match strategy '{match_strategy}' "
+                f"(expected one of {', '.join(MATCH_STRATEGIES)})"
+            )
+        if blocking is None:
+            blocking = DEFAULT_BLOCKING[match_strategy]
+        elif blocking == "off":
+            blocking = None
+        if blocking and blocking not in BLOCKING_MODES:
+            raise ValueError(
+                f"Unknown blocking mode '{blocking}' "
+                f"(expected one of {', '.join(BLOCKING_MODES)})"
+            )
+        
         self.fuzzy_threshold = fuzzy_threshold
         self.allowed_variance_pct = allowed_variance_pct
+        self.batch_scoring = batch_scoring
+        self.match_strategy = match_strategy
+        self.index_cache = index_cache or ContractIndexCache()
+        self.blocking = blocking or None
+        self.blocking_min_lines = blocking_min_lines
+        self.blocking_candidates = blocking_candidates
+        self.similarity_cache = similarity_cache
+        self.rule_plan = RulePlan.compile(rules)
+        self.ledger = ledger
+        # Threads for full score matrices (-1 = all cores); results don't
+        # depend on it, so it is left out of config()
+        self.scoring_workers = scoring_workers
+    
+    def config(self) -> Dict[str, Any]:
+        return {
+            "fuzzy_threshold": self.fuzzy_threshold,
+            "allowed_variance_pct": self.allowed_variance_pct,
+            "batch_scoring": self.batch_scoring,
+            "match_strategy": self.match_strategy,
+            "blocking": self.blocking,
+            "blocking_min_lines": self.blocking_min_lines,
+            "blocking_candidates": self.blocking_candidates,
+            "rules": self.rule_plan.names,
+        }
     
-    def reconcile(self, invoice: Invoice, contract: Contract) -> ReconcileResponse:
-        findings: List[Finding] = []
+    def reconcile_many(
+        self,
+        pairs: Iterable[Tuple[Invoice, Contract]],
+        workers: int = 1,
+        chunksize: Optional[int] = None,
+        mode: str = "full",
+        post: bool = False
+    ) -> List[ReconcileResponse]:
+        pairs = list(pairs)
+        if workers <= 1 or len(pairs) <= 1:
+            return [self.reconcile(invoice, contract, mode=mode, post=post) for invoice, contract in pairs]
         
-        findings.extend(self._check_currency(invoice, contract))
-        findings.extend(self._check_net_terms(invoice, contract))
+        # Deduplicate contracts so each one is shipped to a worker once, in the
+        # pool initializer; tasks then only carry the invoice and a contract key
+        contracts: Dict[Tuple[str, str], Contract] = {}
+        keys_by_object: Dict[int, Tuple[str, str]] = {}
+        tasks: List[Tuple[Invoice, Tuple[str, str], str, bool]] = []
         
-        line_matches = self._match_lines(invoice, contract)
-        findings.extend(self._check_line_variances(invoice, contract, line_matches))
+        for invoice, contract in pairs:
+            key = keys_by_object.get(id(contract))
+            if key is None:
+                key = (contract.contract_id, contract_fingerprint(contract))
+                keys_by_object[id(contract)] = key
+                contracts.setdefault(key, contract)
+            tasks.append((invoice, key, mode, post))
         
-        major_findings = [f for f in findings if f.severity == FindingSeverity.MAJOR]
-        minor_findings = [f for f in findings if f.severity == FindingSeverity.MINOR]
-        passed = len(major_findings) == 0
+        if chunksize is None:
+            chunksize = max(1, min(256, len(tasks) // (workers * 4)))
         
-        summary = ReconcileSummary(
-            **{
-                "pass": passed,
-                "major_count": len(major_findings),
-                "minor_count": len(minor_findings),
-                "total_count": len(findings),
-            }
+        logger.info(
+            f"Reconciling {len(tasks)} invoices against {len(contracts)} contracts "
+            f"with {workers} workers (chunksize {chunksize})"
+        )
+        
+        # Workers send back finding records, which pickle far smaller than
+        # response models; responses are built here
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.config(), contracts, self.ledger.path if self.ledger else None),
+        ) as executor:
+            return [
+                to_response(records, partial=partial)
+                for records, partial in executor.map(_reconcile_task, tasks, chunksize=chunksize)
+            ]
+    
+    def reconcile(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: Optional[ContractIndex] = None,
+        mode: str = "full",
+        timer: StageTimer = NULL_TIMER,
+        post: bool = False
+    ) -> ReconcileResponse:
+        # With post=True (full mode only) the invoice's matched quantities are
+        # recorded in the quantity ledger; otherwise the ledger is only read
+        records, partial = self._reconcile_records(invoice, contract, index, mode, timer, post)
+        with timer.stage("build_response"):
+            return to_response(records, partial=partial)
+    
+    def line_coverage(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: Optional[ContractIndex] = None
+    ) -> int:
+        index = index or self.index_cache.get(contract)
+        return len(self._match_lines(invoice, contract, index))
+    
+    def start_session(self, invoice: Invoice, contract: Contract) -> ReconcileSession:
+        session = ReconcileSession(
+            invoice=invoice.model_copy(deep=True),
+            contract=contract,
+            index=self.index_cache.get(contract),
         )
+        session.header_findings = self.rule_plan.header_findings(invoice, contract)
+        self._refresh_session(session, set(range(len(invoice.items))))
+        return session
+    
+    def apply_changes(
+        self,
+        session: ReconcileSession,
+        changes: Dict[int, InvoiceLine]
+    ) -> List[FindingPatchOp]:
+        n_items = len(session.invoice.items)
+        for idx in changes:
+            if not 0 <= idx < n_items:
+                raise ValueError(f"Invoice line index {idx} out of range (invoice has {n_items} lines)")
         
-        return ReconcileResponse(summary=summary, findings=findings)
+        for idx, line in changes.items():
+            session.invoice.items[idx] = line
+            session.row_scores.pop(idx, None)
+        
+        previous = session.findings
+        # Header rules can depend on line fields (invoice_tax_rate only
+        # applies while some line has no tax of its own) and are cheap
+        session.header_findings = self.rule_plan.header_findings(session.invoice, session.contract)
+        self._refresh_session(session, set(changes))
+        return findings_patch(previous, session.findings)
+    
+    def session_response(self, session: ReconcileSession) -> ReconcileResponse:
+        return to_response(session.findings, result_token=session.token)
+    
+    def _reconcile_records(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: Optional[ContractIndex] = None,
+        mode: str = "full",
+        timer: StageTimer = NULL_TIMER,
+        post: bool = False
+    ) -> Tuple[List[FindingRecord], bool]:
+        # Returns the findings and whether they may be incomplete
+        if mode == "triage":
+            if post:
+                raise ValueError("Triage results are partial and cannot be posted to the quantity ledger")
+            return self._triage(invoice, contract, index, timer), True
+        if mode != "full":
+            raise ValueError(f"Unknown reconcile mode '{mode}' (expected one of {', '.join(RECONCILE_MODES)})")
+        
+        with timer.stage("header_rules"):
+            findings = self.rule_plan.header_findings(invoice, contract)
+        
+        index = index or self._get_index(contract, timer)
+        line_matches = self._match_lines(invoice, contract, index, timer=timer)
+        with timer.stage("line_rules"):
+            line_findings = self._check_lines(invoice, contract, index, line_matches, post=post)
+            timer.count("findings", len(line_findings))
+        findings.extend(line_findings)
+        return findings, False
+    
+    def _get_index(self, contract: Contract, timer: StageTimer) -> ContractIndex:
+        with timer.stage("contract_index"):
+            return self.index_cache.get(contract, timer)
+    
+    def _refresh_session(self, session: ReconcileSession, changed_rows: Set[int]) -> None:
+        # Only rows whose line changed or whose match moved get new findings;
+        # fuzzy scores for untouched rows come from session.row_scores
+        invoice = session.invoice
+        previous = {m.invoice_idx: (m.contract_idx, m.tier) for m in session.matches}
+        
+        matches = self._match_lines(invoice, session.contract, session.index, row_scores=session.row_scores)
+        current = {m.invoice_idx: (m.contract_idx, m.tier) for m in matches}
+        
+        affected = set(changed_rows)
+        affected.update(row for row in previous.keys() | current.keys() if previous.get(row) != current.get(row))
+        
+        for row in affected:
+            session.row_findings[row] = []
+        for finding in self._check_lines(invoice, session.contract, session.index, matches, rows=affected):
+            session.row_findings[finding.invoice_line_idx].append(finding)
+        
+        session.matches = matches
+        unmatched = [i for i in range(len(invoice.items)) if i not in current]
+        
+        session.findings = list(session.header_findings)
+        for row in [m.invoice_idx for m in matches] + unmatched:
+            session.findings.extend(session.row_findings[row])
+    
+    def _check_lines(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: ContractIndex,
+        line_matches: List[LineMatch],
+        rows: Optional[Set[int]] = None,
+        post: bool = False
+    ) -> List[FindingRecord]:
+        return self.rule_plan.line_findings(
+            invoice,
+            contract,
+            index,
+            line_matches,
+            self.allowed_variance_pct,
+            rows=rows,
+            ledger_prior=self._ledger_prior(invoice, contract, index, line_matches, post)
+        )
+    
+    def _ledger_prior(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: ContractIndex,
+        line_matches: List[LineMatch],
+        post: bool = False
+    ) -> Optional[Dict[int, float]]:
+        # Consumption by other invoices on each matched line. Posting records
+        # the invoice's matched quantities, replacing any earlier posting of
+        # the same invoice_number; without it the ledger is left untouched.
+        # The ledger is keyed by stable line keys, so consumption follows a
+        # line when a re-uploaded contract reorders its lines
+        if self.ledger is None or not invoice.invoice_number:
+            return None
+        if post:
+            quantities = {
+                index.line_keys[m.contract_idx]: invoice.items[m.invoice_idx].quantity
+                for m in line_matches
+            }
+            prior = self.ledger.post(contract.contract_id, invoice.invoice_number, quantities)
+        else:
+            keys = [index.line_keys[m.contract_idx] for m in line_matches]
+            prior = self.ledger.prior(contract.contract_id, invoice.invoice_number, keys)
+        return {m.contract_idx: prior[index.line_keys[m.contract_idx]] for m in line_matches}
+    
+    def _triage(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: Optional[ContractIndex] = None,
+        timer: StageTimer = NULL_TIMER
+    ) -> List[FindingRecord]:
+        # Pass/fail only: stops at the first MAJOR finding, checking header
+        # rules, then exact-key matches, and only then fuzzy matching. MINOR
+        # rules are skipped and the ledger is not read, so the summary
+        # is always marked partial.
+        with timer.stage("header_rules"):
+            finding = self.rule_plan.triage_header(invoice, contract)
+        
+        if finding is None:
+            index = index or self._get_index(contract, timer)
+            inv_descs = self._normalize(invoice, timer)
+            with timer.stage("exact_match"):
+                exact = self._match_exact_keys(invoice, inv_descs, index)
+                timer.count("matches", len(exact))
+            matched_rows = {m.invoice_idx for m in exact}
+            with timer.stage("line_rules"):
+                finding = self.rule_plan.triage_lines(
+                    invoice, contract, index, exact, self.allowed_variance_pct, rows=matched_rows
+                )
+            
+            pending = [i for i in range(len(invoice.items)) if i not in matched_rows]
+            if finding is None and pending:
+                taken = {m.contract_idx for m in exact}
+                with timer.stage("fuzzy_match"):
+                    fuzzy = self._match_fuzzy(invoice, contract, inv_descs, index, pending, taken, timer=timer)
+                    timer.count("matches", len(fuzzy))
+                with timer.stage("line_rules"):
+                    finding = self.rule_plan.triage_lines(
+                        invoice, contract, index, fuzzy, self.allowed_variance_pct, rows=set(pending)
+                    )
+        
+        return [finding] if finding is not None else []
     
     def _match_lines(
         self,
         invoice: Invoice,
-        contract: Contract
-    ) -> List[Tuple[int, int, float]]:
-        matches: List[Tuple[int, int, float]] = []
-        matched_contract_indices = set()
+        contract: Contract,
+        index: Optional[ContractIndex] = None,
+        row_scores: Optional[Dict[int, RowScores]] = None,
+        timer: StageTimer = NULL_TIMER
+    ) -> List[LineMatch]:
+        index = index or ContractIndex.build(contract)
+        inv_descs = self._normalize(invoice, timer)
+        
+        with timer.stage("exact_match"):
+            matches = self._match_exact_keys(invoice, inv_descs, index)
+            timer.count("matches", len(matches))
+        matched_rows = {m.invoice_idx for m in matches}
+        taken = {m.contract_idx for m in matches}
+        pending = [i for i in range(len(invoice.items)) if i not in matched_rows]
+        
+        if pending:
+            with timer.stage("fuzzy_match"):
+                fuzzy = self._match_fuzzy(invoice, contract, inv_descs, index, pending, taken, row_scores, timer)
+                timer.count("matches", len(fuzzy))
+            matches.extend(fuzzy)
+        
+        matches.sort()
+        return matches
+    
+    def _normalize(self, invoice: Invoice, timer: StageTimer) -> List[str]:
+        with timer.stage("normalize"):
+            return [normalize_description(line.description) for line in invoice.items]
+    
+    def _match_fuzzy(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        inv_descs: List[str],
+        index: ContractIndex,
+        pending: List[int],
+        taken: Set[int],
+        row_scores: Optional[Dict[int, RowScores]] = None,
+        timer: StageTimer = NULL_TIMER
+    ) -> List[LineMatch]:
+        if row_scores is None and self.similarity_cache is not None and (
+            self.batch_scoring or self.match_strategy != "greedy"
+        ):
+            # Per-row scores against the whole contract, served from the
+            # process-wide cache where the description was seen before
+            row_scores = {}
+        
+        if row_scores is not None:
+            return self._match_fuzzy_cached(inv_descs, index, pending, taken, row_scores, timer)
+        if self._use_blocking(index):
+            return self._match_fuzzy_blocked(inv_descs, index, pending, taken, timer)
+        if self.batch_scoring or self.match_strategy != "greedy":
+            return self._match_fuzzy_batched(inv_descs, index, pending, taken, timer)
+        return self._match_fuzzy_pairwise(invoice, contract, pending, taken, timer)
+    
+    def _match_exact_keys(
+        self,
+        invoice: Invoice,
+        inv_descs: List[str],
+        index: ContractIndex
+    ) -> List[LineMatch]:
+        matches: List[LineMatch] = []
+        matched_rows = set()
+        taken = set()
+        
+        tiers = (
+            (MatchTier.SKU, [normalize_sku(line.sku) for line in invoice.items], index.sku_map),
+            (MatchTier.EXACT, inv_descs, index.description_map),
+        )
+        
+        for tier, keys, lookup in tiers:
+            for inv_idx, key in enumerate(keys):
+                if not key or inv_idx in matched_rows:
+                    continue
+                
+                for cont_idx in lookup.get(key, ()):
+                    if cont_idx not in taken:
+                        matches.append(LineMatch(inv_idx, cont_idx, 1.0, tier))
+                        matched_rows.add(inv_idx)
+                        taken.add(cont_idx)
+                        break
+        
+        return matches
+    
+    def _match_fuzzy_batched(
+        self,
+        inv_descs: List[str],
+        index: ContractIndex,
+        pending: List[int],
+        taken: Set[int],
+        timer: StageTimer = NULL_TIMER
+    ) -> List[LineMatch]:
+        if taken:
+            available = np.ones(len(index), dtype=bool)
+            available[list(taken)] = False
+            columns = np.flatnonzero(available)
+            cont_descs = [index.descriptions[c] for c in columns]
+        else:
+            columns = np.arange(len(index))
+            cont_descs = index.descriptions
+        
+        timer.count("comparisons", len(pending) * len(cont_descs))
+        scores = score_matrix(
+            [inv_descs[i] for i in pending],
+            cont_descs,
+            score_cutoff=self.fuzzy_threshold,
+            workers=self.scoring_workers
+        )
+        assign = MATCH_STRATEGIES[self.match_strategy]
+        
+        return [
+            LineMatch(pending[row], int(columns[col]), confidence, MatchTier.FUZZY)
+            for row, col, confidence in assign(scores, self.fuzzy_threshold)
+        ]
+    
+    def _use_blocking(self, index: ContractIndex) -> bool:
+        return bool(self.blocking) and len(index) >= self.blocking_min_lines
+    
+    def _match_fuzzy_cached(
+        self,
+        inv_descs: List[str],
+        index: ContractIndex,
+        pending: List[int],
+        taken: Set[int],
+        row_scores: Dict[int, RowScores],
+        timer: StageTimer = NULL_TIMER
+    ) -> List[LineMatch]:
+        # Rows are scored against every contract line, or every blocking
+        # candidate, taken or not, so cached scores stay valid when later
+        # edits free a line
+        missing = [i for i in pending if i not in row_scores]
+        if missing:
+            row_scores.update(self._score_rows(inv_descs, index, missing, timer))
+        
+        exclude = np.zeros(len(index), dtype=bool)
+        exclude[list(taken)] = True
+        blocker = index.blocker(self.blocking) if self._use_blocking(index) else None
+        
+        rows, cols, scores = [], [], []
+        for inv_idx in pending:
+            row_cols, row_vals = row_scores[inv_idx]
+            if blocker is None:
+                free = ~exclude[row_cols]
+                row_cols, row_vals = row_cols[free], row_vals[free]
+            else:
+                row_cols, row_vals = self._free_candidates(
+                    inv_descs[inv_idx], index, blocker, row_cols, row_vals, exclude, timer
+                )
+            rows.append(np.full(len(row_cols), inv_idx, dtype=np.int64))
+            cols.append(row_cols)
+            scores.append(row_vals)
+        
+        assign = SPARSE_MATCH_STRATEGIES[self.match_strategy]
+        return [
+            LineMatch(row, col, confidence, MatchTier.FUZZY)
+            for row, col, confidence in assign(
+                np.concatenate(rows),
+                np.concatenate(cols),
+                np.concatenate(scores),
+                self.fuzzy_threshold
+            )
+        ]
+    
+    def _free_candidates(
+        self,
+        desc: str,
+        index: ContractIndex,
+        blocker: CandidateBlocker,
+        row_cols: np.ndarray,
+        row_vals: np.ndarray,
+        exclude: np.ndarray,
+        timer: StageTimer = NULL_TIMER
+    ) -> RowScores:
+        # The candidates _match_fuzzy_blocked would score: taken lines are
+        # dropped before the top-N cut. Cached rows hold the top N with taken
+        # lines included, so the few candidates that move up are scored here.
+        wanted = blocker.candidates(desc, limit=self.blocking_candidates, exclude=exclude)
+        known = np.isin(wanted, row_cols)
+        vals = np.zeros(len(wanted), dtype=np.float64)
+        vals[known] = row_vals[np.searchsorted(row_cols, wanted[known])]
+        
+        extra = wanted[~known]
+        if len(extra):
+            timer.count("comparisons", len(extra))
+            _, extra_cols, extra_scores = score_candidates(
+                [desc],
+                index.descriptions,
+                [extra],
+                score_cutoff=self.fuzzy_threshold
+            )
+            vals[np.searchsorted(wanted, extra_cols)] = extra_scores
+        return wanted, vals
+    
+    def _score_rows(
+        self,
+        inv_descs: List[str],
+        index: ContractIndex,
+        rows: List[int],
+        timer: StageTimer = NULL_TIMER
+    ) -> Dict[int, RowScores]:
+        queries = [inv_descs[i] for i in rows]
+        
+        if self.similarity_cache is not None:
+            scope = self._similarity_scope(index)
+            scored, missing = self.similarity_cache.get_many(scope, queries)
+            timer.count("cache_hits", len(scored))
+            timer.count("cache_misses", len(missing))
+        else:
+            scored, missing = {}, list(dict.fromkeys(queries))
+        
+        if missing:
+            fresh = self._score_descriptions(missing, index, timer)
+            scored.update(fresh)
+            if self.similarity_cache is not None:
+                self.similarity_cache.put_many(scope, fresh)
+        
+        return {inv_idx: scored[inv_descs[inv_idx]] for inv_idx in rows}
+    
+    def _similarity_scope(self, index: ContractIndex) -> Tuple[Any, ...]:
+        if self._use_blocking(index):
+            return (index.content_hash, self.fuzzy_threshold, self.blocking, self.blocking_candidates)
+        return (index.content_hash, self.fuzzy_threshold, None, None)
+    
+    def _score_descriptions(
+        self,
+        queries: List[str],
+        index: ContractIndex,
+        timer: StageTimer = NULL_TIMER
+    ) -> Dict[str, RowScores]:
+        if self._use_blocking(index):
+            blocker = index.blocker(self.blocking)
+            candidates = [blocker.candidates(q, limit=self.blocking_candidates) for q in queries]
+            timer.count("comparisons", sum(len(c) for c in candidates))
+            pos, cols, scores = score_candidates(
+                queries,
+                index.descriptions,
+                candidates,
+                score_cutoff=self.fuzzy_threshold
+            )
+            # Blocked rows keep every candidate, zero scores included, so
+            # _free_candidates can tell scored candidates from unscored ones;
+            # pos is sorted, so each query's hits are one contiguous slice
+            bounds = np.searchsorted(pos, np.arange(len(queries) + 1))
+            rows = {}
+            for local, (query, cand) in enumerate(zip(queries, candidates)):
+                vals = np.zeros(len(cand), dtype=np.float64)
+                hit = slice(bounds[local], bounds[local + 1])
+                vals[np.searchsorted(cand, cols[hit])] = scores[hit]
+                rows[query] = (cand, vals)
+            return rows
         
-        for inv_idx, inv_line in enumerate(invoice.items):
+        timer.count("comparisons", len(queries) * len(index))
+        matrix = score_matrix(
+            queries,
+            index.descriptions,
+            score_cutoff=self.fuzzy_threshold,
+            workers=self.scoring_workers
+        )
+        pos, cols = np.nonzero(matrix)
+        scores = matrix[pos, cols]
+        
+        # pos is sorted, so each query's hits are one contiguous slice
+        bounds = np.searchsorted(pos, np.arange(len(queries) + 1))
+        return {
+            query: (cols[bounds[local]:bounds[local + 1]], scores[bounds[local]:bounds[local + 1]])
+            for local, query in enumerate(queries)
+        }
+    
+    def _match_fuzzy_blocked(
+        self,
+        inv_descs: List[str],
+        index: ContractIndex,
+        pending: List[int],
+        taken: Set[int],
+        timer: StageTimer = NULL_TIMER
+    ) -> List[LineMatch]:
+        blocker = index.blocker(self.blocking)
+        exclude = np.zeros(len(index), dtype=bool)
+        exclude[list(taken)] = True
+        
+        queries = [inv_descs[i] for i in pending]
+        candidates = [
+            blocker.candidates(q, limit=self.blocking_candidates, exclude=exclude)
+            for q in queries
+        ]
+        timer.count("comparisons", sum(len(c) for c in candidates))
+        rows, cols, scores = score_candidates(
+            queries,
+            index.descriptions,
+            candidates,
+            score_cutoff=self.fuzzy_threshold
+        )
+        assign = SPARSE_MATCH_STRATEGIES[self.match_strategy]
+        
+        return [
+            LineMatch(pending[row], col, confidence, MatchTier.FUZZY)
+            for row, col, confidence in assign(rows, cols, scores, self.fuzzy_threshold)
+        ]
+    
+    def _match_fuzzy_pairwise(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        pending: List[int],
+        taken: Set[int],
+        timer: StageTimer = NULL_TIMER
+    ) -> List[LineMatch]:
+        matches: List[LineMatch] = []
+        matched_contract_indices = set(taken)
+        
+        for inv_idx in pending:
+            timer.count("comparisons", len(contract.line_items) - len(matched_contract_indices))
+            inv_line = invoice.items[inv_idx]
             best_match = None
             best_confidence = 0.0
             best_contract_idx = -1
@@ -73,7 +695,7 @@ class ReconcileEngine:
                 
                 if confidence > best_confidence:
                     best_confidence = confidence
-                    best_match = (inv_idx, cont_idx, confidence)
+                    best_match = LineMatch(inv_idx, cont_idx, confidence, MatchTier.FUZZY)
                     best_contract_idx = cont_idx
             
             if best_match and best_confidence >= (self.fuzzy_threshold / 100.0):
@@ -83,94 +705,33 @@ class ReconcileEngine:
         return matches
     
     def _line_similarity(self, inv_desc: str, cont_desc: str) -> float:
-        inv_desc_norm = " ".join(inv_desc.lower().split())
-        cont_desc_norm = " ".join(cont_desc.lower().split())
+        inv_desc_norm = normalize_description(inv_desc)
+        cont_desc_norm = normalize_description(cont_desc)
         
         score = fuzz.token_set_ratio(inv_desc_norm, cont_desc_norm)
         return score / 100.0
-    
-    def _check_currency(self, invoice: Invoice, contract: Contract) -> List[Finding]:
-        findings: List[Finding] = []
-        
-        inv_curr = invoice.currency or "USD"
-        cont_curr = contract.currency or "USD"
-        
-        if inv_curr != cont_curr:
-            findings.append(Finding(
-                type=FindingType.CURRENCY_MISMATCH,
-                severity=FindingSeverity.MAJOR,
-                details=f"Currency mismatch: Invoice {inv_curr} vs Contract {cont_curr}",
-            ))
-        
-        return findings
-    
-    def _check_net_terms(self, invoice: Invoice, contract: Contract) -> List[Finding]:
-        findings: List[Finding] = []
-        
-        inv_terms = invoice.net_terms or "Net 30"
-        cont_terms = contract.net_terms or "Net 30"
-        
-        if inv_terms != cont_terms:
-            findings.append(Finding(
-                type=FindingType.TERMS_MISMATCH,
-                severity=FindingSeverity.MINOR,
-                details=f"Net terms mismatch: Invoice {inv_terms} vs Contract {cont_terms}",
-            ))
-        
-        return findings
-    
-    def _check_line_variances(
-        self,
-        invoice: Invoice,
-        contract: Contract,
-        line_matches: List[Tuple[int, int, float]]
-    ) -> List[Finding]:
-        findings: List[Finding] = []
-        matched_inv_indices = {m[0] for m in line_matches}
-        matched_cont_indices = {m[1] for m in line_matches}
-        
-        for inv_idx, cont_idx, _conf in line_matches:
-            inv_line = invoice.items[inv_idx]
-            cont_line = contract.line_items[cont_idx]
-            
-            if inv_line.unit_price and cont_line.unit_price:
-                variance = self._compute_variance(
-                    inv_line.unit_price,
-                    cont_line.unit_price
-                )
-                if variance > (self.allowed_variance_pct / 100.0):
-                    findings.append(Finding(
-                        type=FindingType.UNIT_PRICE_VARIANCE,
-                        severity=FindingSeverity.MAJOR,
-                        details=f"Unit price variance {variance*100:.1f}% exceeds {self.allowed_variance_pct}%: "
-                                f"Invoice ${inv_line.unit_price:.2f} vs Contract ${cont_line.unit_price:.2f}",
-                        invoice_line_idx=inv_idx,
-                        contract_line_idx=cont_idx,
-                    ))
-            
-            if cont_line.max_quantity and inv_line.quantity > cont_line.max_quantity:
-                findings.append(Finding(
-                    type=FindingType.QUANTITY_OVERFLOW,
-                    severity=FindingSeverity.MAJOR,
-                    details=f"Quantity {inv_line.quantity} exceeds contract max {cont_line.max_quantity}",
-                    invoice_line_idx=inv_idx,
-                    contract_line_idx=cont_idx,
-                ))
-        
-        for inv_idx in range(len(invoice.items)):
-            if inv_idx not in matched_inv_indices:
-                inv_line = invoice.items[inv_idx]
-                findings.append(Finding(
-                    type=FindingType.UNKNOWN_LINE,
-                    severity=FindingSeverity.MAJOR,
-                    details=f"No matching contract line for invoice item: {inv_line.description[:60]}...",
-                    invoice_line_idx=inv_idx,
-                ))
-        
-        return findings
-    
-    def _compute_variance(self, actual: float, expected: float) -> float:
-        if expected == 0:
-            return 1.0 if actual != 0 else 0.0
-        return abs(actual - expected) / expected
 
+
+def _init_worker(
+    config: Dict[str, Any],
+    contracts: Dict[Tuple[str, str], Contract],
+    ledger_path: Optional[str] = None
+) -> None:
+    global _worker_engine, _worker_contracts
+    # The pool already spreads invoices over cores, so each worker scores
+    # on one thread; blocking comes resolved in config, None included
+    _worker_engine = ReconcileEngine(
+        **{**config, "blocking": config["blocking"] or "off"},
+        ledger=QuantityLedger(ledger_path) if ledger_path else None,
+        scoring_workers=1
+    )
+    _worker_contracts = {
+        key: (contract, ContractIndex.build(contract, content_hash=key[1]))
+        for key, contract in contracts.items()
+    }
+
+
+def _reconcile_task(task: Tuple[Invoice, Tuple[str, str], str, bool]) -> Tuple[List[FindingRecord], bool]:
+    invoice, key, mode, post = task
+    contract, index = _worker_contracts[key]
+    return _worker_engine._reconcile_records(invoice, contract, index=index, mode=mode, post=post)
@@ -0,0 +1,273 @@
+"""
+Retry, concurrency and circuit-breaker policy for upstream ADE calls
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Retried statuses; only 5xx and transport errors count against the breaker,
+# since a 429 or other 4xx shows upstream is up. Other 4xx fail at once.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class ADEError(RuntimeError):
+    
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class ADEUnavailableError(ADEError):
+    # Raised without calling upstream while the circuit is open
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message, status=503)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    # Opens after failure_threshold consecutive upstream failures and rejects
+    # calls for reset_seconds; then one probe call is let through (half-open)
+    # and its outcome closes or re-opens the circuit
+    
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self.opens = 0
+        self.rejected = 0
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+    
+    def allow(self) -> None:
+        with self._lock:
+            state = self._state()
+            if state == "closed" or (state == "half_open" and not self._probing):
+                self._probing = state == "half_open"
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self._opened_at + self.reset_seconds - time.monotonic())
+            failures = self._failures
+        raise ADEUnavailableError(
+            f"ADE circuit open after {failures} consecutive failures; retry in {retry_after:.0f}s",
+            retry_after=retry_after,
+        )
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self.opens += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+    
+    def release_probe(self) -> None:
+        # The probe ended without telling us anything about upstream
+        # (cancelled); the next caller gets to probe instead
+        with self._lock:
+            self._probing = False
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state(),
+                "consecutive_failures": self._failures,
+                "opens": self.opens,
+                "rejected": self.rejected,
+            }
+    
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+
+class RateLimiter:
+    # Token bucket for async callers: rate_per_second on average with bursts
+    # of up to `burst`; waiters are served in arrival order. A rate of 0
+    # disables limiting.
+    
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self.waited_seconds = 0.0
+    
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= 1
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class ResilientCaller:
+    # Wraps one upstream request function. Calls wait for one of
+    # max_concurrency slots, go through the breaker, and are retried on
+    # RETRY_STATUSES and transport errors with full-jitter exponential
+    # backoff (Retry-After wins when upstream sends it, up to backoff_max)
+    
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_attempts: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        breaker: Optional[CircuitBreaker] = None,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._rng = rng or random.Random()
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.wait_seconds = 0.0
+        self.statuses: Dict[str, int] = {}
+    
+    async def acall(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        transport_errors: Tuple[Type[BaseException], ...]
+    ) -> Any:
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        start = time.monotonic()
+        async with self._async_slots:
+            self._enter(time.monotonic() - start)
+            try:
+                for attempt in range(1, self.max_attempts + 1):
+                    self.breaker.allow()
+                    try:
+                        response = await send()
+                    except transport_errors as e:
+                        response = e
+                    except BaseException as e:
+                        self._send_raised(e)
+                        raise
+                    outcome, delay = self._outcome(response, attempt)
+                    if delay is None:
+                        return outcome
+                    await asyncio.sleep(delay)
+            finally:
+                self._exit()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "avg_wait_ms": round(self.wait_seconds * 1000 / self.calls, 3) if self.calls else 0.0,
+                "statuses": dict(self.statuses),
+                "breaker": self.breaker.stats(),
+            }
+    
+    def _outcome(self, response: Any, attempt: int) -> Tuple[Any, Optional[float]]:
+        # Returns (response, None) when done, or (None, delay) to retry;
+        # raises ADEError once the call has failed for good
+        if isinstance(response, BaseException):
+            status, label = None, type(response).__name__
+        else:
+            status, label = response.status_code, str(response.status_code)
+        
+        with self._lock:
+            self.attempts += 1
+            self.statuses[label] = self.statuses.get(label, 0) + 1
+        
+        if status is not None and status < 500:
+            self.breaker.record_success()
+            if status < 400:
+                return response, None
+        else:
+            self.breaker.record_failure()
+        
+        retryable = status is None or status in RETRY_STATUSES
+        if not retryable or attempt == self.max_attempts:
+            with self._lock:
+                self.failures += 1
+            detail = f"HTTP {status}: {response.text[:200]}" if status is not None else f"{label}: {response}"
+            raise ADEError(f"ADE call failed after {attempt} attempt(s) ({detail})", status=status)
+        
+        delay = self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        retry_after = None if status is None else response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        
+        with self._lock:
+            self.retries += 1
+        logger.warning(f"[ADE] Attempt {attempt} failed ({label}); retrying in {delay:.2f}s")
+        return None, delay
+    
+    def _send_raised(self, error: BaseException) -> None:
+        # Every allow() needs a verdict, or a half-open probe would hold the
+        # circuit forever: unexpected errors count as failures, cancellation
+        # only hands the probe on
+        if isinstance(error, Exception):
+            self.breaker.record_failure()
+            with self._lock:
+                self.attempts += 1
+                self.failures += 1
+                self.statuses[type(error).__name__] = self.statuses.get(type(error).__name__, 0) + 1
+        else:
+            self.breaker.release_probe()
+    
+    def _enter(self, waited: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.wait_seconds += waited
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+    
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
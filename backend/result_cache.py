@@ -0,0 +1,156 @@
+"""
+Content-addressed cache of serialized reconciliation results
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from cache import LRUCache
+from models import Invoice, Contract
+
+RESULT_CACHE_BACKENDS = ("memory", "disk")
+
+
+def _canonical(value: Any) -> Any:
+    # Free-form fields (e.g. Invoice.subtotal) keep whatever number type the
+    # client sent, so 1 and 1.0 are folded together before hashing
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def result_key(invoice: Invoice, contract: Contract, config: Dict[str, Any], engine_version: str) -> str:
+    # Canonical JSON (sorted keys, normalized numbers) so key order or number
+    # formatting in the request body doesn't change the address
+    payload = _canonical({
+        "engine_version": engine_version,
+        "config": config,
+        "invoice": invoice.model_dump(mode="json"),
+        "contract": contract.model_dump(mode="json"),
+    })
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+class MemoryResultCache:
+    
+    def __init__(self, max_entries: int = 1024):
+        self._cache = LRUCache(max_entries=max_entries)
+    
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+    
+    def put(self, key: str, payload: str) -> None:
+        self._cache.put(key, payload)
+    
+    def clear(self) -> None:
+        self._cache.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class DiskResultCache:
+    # One JSON file per key under a two-character fan-out directory; hits
+    # touch the file so eviction removes the least recently used entries
+    
+    def __init__(self, directory: str, max_entries: int = 10000):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = sum(1 for _ in self.directory.glob("*/*.json"))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            payload = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return payload
+    
+    def put(self, key: str, payload: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        existed = path.exists()
+        
+        # Several server processes may share the directory, so each write
+        # goes through its own temp file
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{key}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(payload.encode("utf-8"))
+        os.replace(tmp.name, path)
+        
+        with self._lock:
+            self._entries += 0 if existed else 1
+            over = self._entries - self.max_entries
+        if over > 0:
+            self._evict(over)
+    
+    def clear(self) -> None:
+        with self._lock:
+            for path in self.directory.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+            self._entries = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "disk",
+            "directory": str(self.directory),
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+    
+    def _evict(self, count: int) -> None:
+        # Evict a tenth of the budget at once so the directory scan is rare
+        count = max(count, self.max_entries // 10)
+        with self._lock:
+            paths = sorted(self.directory.glob("*/*.json"), key=_mtime)
+            for path in paths[:count]:
+                path.unlink(missing_ok=True)
+                self._entries -= 1
+                self.evictions += 1
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+
+def make_result_cache(backend: str, max_entries: int, directory: str):
+    if not backend:
+        return None
+    if backend == "memory":
+        return MemoryResultCache(max_entries=max_entries)
+    if backend == "disk":
+        return DiskResultCache(directory, max_entries=max_entries)
+    raise ValueError(
+        f"Unknown result cache backend '{backend}' "
+        f"(expected one of {', '.join(RESULT_CACHE_BACKENDS)})"
+    )
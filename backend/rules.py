@@ -0,0 +1,537 @@
+"""
+Pluggable reconciliation rules, compiled into a single-pass plan
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
+import numpy as np
+from contract_index import ContractIndex
+from matching import LineMatch
+from findings import FindingRecord
+from models import Invoice, Contract, FindingType, FindingSeverity
+
+HEADER = "header"
+LINE = "line"
+UNMATCHED = "unmatched"
+
+# Tax amounts are rounded to cents, so allow one cent of drift per line
+TAX_AMOUNT_TOLERANCE = 0.01 + 1e-9
+TAX_RATE_TOLERANCE = 1e-4
+
+
+@dataclass
+class RuleContext:
+    invoice: Invoice
+    contract: Contract
+    index: Optional[ContractIndex] = None
+    matches: List[LineMatch] = field(default_factory=list)
+    allowed_variance_pct: float = 2.0
+    ledger_prior: Optional[Dict[int, float]] = None
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    
+    def column(self, name: str) -> np.ndarray:
+        values = self.columns.get(name)
+        if values is None:
+            values = COLUMNS[name](self)
+            self.columns[name] = values
+        return values
+
+
+def _invoice_column(attr: str) -> Callable[[RuleContext], np.ndarray]:
+    # Missing values become NaN, like the contract index columns
+    def build(ctx: RuleContext) -> np.ndarray:
+        items = ctx.invoice.items
+        return np.array([getattr(items[m.invoice_idx], attr) for m in ctx.matches], dtype=np.float64)
+    return build
+
+
+def _contract_column(attr: str) -> Callable[[RuleContext], np.ndarray]:
+    def build(ctx: RuleContext) -> np.ndarray:
+        return getattr(ctx.index, attr)[ctx.column("contract_idx")]
+    return build
+
+
+def _contract_tax_rates(ctx: RuleContext) -> np.ndarray:
+    rates = ctx.index.tax_rates[ctx.column("contract_idx")]
+    return np.where(np.isnan(rates), ctx.contract.default_tax_rate, rates)
+
+
+def _prior_quantities(ctx: RuleContext) -> np.ndarray:
+    # Units billed against each matched contract line by earlier invoices;
+    # all zero when no quantity ledger is configured
+    prior = ctx.ledger_prior or {}
+    return np.array([prior.get(m.contract_idx, 0.0) for m in ctx.matches], dtype=np.float64)
+
+
+# Columns a rule can declare in `fields`, aligned with RuleContext.matches
+COLUMNS: Dict[str, Callable[[RuleContext], np.ndarray]] = {
+    "contract_idx": lambda ctx: np.array([m.contract_idx for m in ctx.matches], dtype=np.int64),
+    "inv_unit_price": _invoice_column("unit_price"),
+    "inv_quantity": _invoice_column("quantity"),
+    "inv_total": _invoice_column("total_price"),
+    "inv_tax": _invoice_column("tax"),
+    "cont_unit_price": _contract_column("unit_prices"),
+    "cont_max_quantity": _contract_column("max_quantities"),
+    "cont_tax_rate": _contract_tax_rates,
+    "prior_quantity": _prior_quantities,
+}
+
+
+class Rule(ABC):
+    # name: registry key; scope: set by the base class below, HEADER rules
+    # see the invoice and contract, LINE rules see matched pairs as columns,
+    # UNMATCHED rules see leftovers; fields: columns evaluate() reads; cost:
+    # relative expense, cheap first; severity: what the rule reports, if
+    # fixed (MINOR-only rules are skipped in triage since they cannot fail
+    # an invoice)
+    name: str = ""
+    scope: str = ""
+    fields: Tuple[str, ...] = ()
+    cost: int = 1
+    severity: Optional[FindingSeverity] = None
+
+
+class HeaderRule(Rule):
+    scope = HEADER
+    
+    @abstractmethod
+    def check(self, ctx: RuleContext) -> List[FindingRecord]:
+        ...
+
+
+class LineRule(Rule):
+    scope = LINE
+    
+    @abstractmethod
+    def evaluate(self, ctx: RuleContext) -> np.ndarray:
+        ...
+    
+    @abstractmethod
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        ...
+
+
+class UnmatchedRule(Rule):
+    scope = UNMATCHED
+    
+    @abstractmethod
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        ...
+
+
+RULES: Dict[str, Type[Rule]] = {}
+
+
+def register_rule(cls: Type[Rule]) -> Type[Rule]:
+    # Abstract methods left unimplemented fail here, at import, rather than
+    # when a plan is compiled or partway through a reconcile
+    if not cls.name:
+        raise ValueError(f"Rule {cls.__name__} has no name")
+    if not issubclass(cls, (HeaderRule, LineRule, UnmatchedRule)):
+        raise ValueError(f"Rule {cls.__name__} must subclass HeaderRule, LineRule or UnmatchedRule")
+    if cls.__abstractmethods__:
+        raise ValueError(
+            f"Rule {cls.__name__} does not implement {', '.join(sorted(cls.__abstractmethods__))}"
+        )
+    RULES[cls.name] = cls
+    return cls
+
+
+@register_rule
+class CurrencyRule(HeaderRule):
+    name = "currency"
+    severity = FindingSeverity.MAJOR
+    
+    def check(self, ctx: RuleContext) -> List[FindingRecord]:
+        inv_curr = ctx.invoice.currency or "USD"
+        cont_curr = ctx.contract.currency or "USD"
+        if inv_curr == cont_curr:
+            return []
+        return [FindingRecord(
+            type=FindingType.CURRENCY_MISMATCH,
+            severity=FindingSeverity.MAJOR,
+            details=f"Currency mismatch: Invoice {inv_curr} vs Contract {cont_curr}",
+        )]
+
+
+@register_rule
+class NetTermsRule(HeaderRule):
+    name = "net_terms"
+    severity = FindingSeverity.MINOR
+    
+    def check(self, ctx: RuleContext) -> List[FindingRecord]:
+        inv_terms = ctx.invoice.net_terms or "Net 30"
+        cont_terms = ctx.contract.net_terms or "Net 30"
+        if inv_terms == cont_terms:
+            return []
+        return [FindingRecord(
+            type=FindingType.TERMS_MISMATCH,
+            severity=FindingSeverity.MINOR,
+            details=f"Net terms mismatch: Invoice {inv_terms} vs Contract {cont_terms}",
+        )]
+
+
+@register_rule
+class UnitPriceVarianceRule(LineRule):
+    name = "unit_price_variance"
+    fields = ("inv_unit_price", "cont_unit_price")
+    severity = FindingSeverity.MAJOR
+    
+    def evaluate(self, ctx: RuleContext) -> np.ndarray:
+        mask, _ = price_variance_mask(
+            ctx.column("inv_unit_price"),
+            ctx.column("cont_unit_price"),
+            ctx.allowed_variance_pct
+        )
+        return mask
+    
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        match = ctx.matches[k]
+        inv_line = ctx.invoice.items[match.invoice_idx]
+        cont_line = ctx.contract.line_items[match.contract_idx]
+        variance = abs(inv_line.unit_price - cont_line.unit_price) / cont_line.unit_price
+        return FindingRecord(
+            type=FindingType.UNIT_PRICE_VARIANCE,
+            severity=FindingSeverity.MAJOR,
+            details=f"Unit price variance {variance*100:.1f}% exceeds {ctx.allowed_variance_pct}%: "
+                    f"Invoice ${inv_line.unit_price:.2f} vs Contract ${cont_line.unit_price:.2f}",
+            invoice_line_idx=match.invoice_idx,
+            contract_line_idx=match.contract_idx,
+            match_tier=match.tier,
+        )
+
+
+@register_rule
+class QuantityOverflowRule(LineRule):
+    name = "quantity_overflow"
+    fields = ("inv_quantity", "cont_max_quantity")
+    severity = FindingSeverity.MAJOR
+    
+    def evaluate(self, ctx: RuleContext) -> np.ndarray:
+        return quantity_overflow_mask(ctx.column("inv_quantity"), ctx.column("cont_max_quantity"))
+    
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        match = ctx.matches[k]
+        inv_line = ctx.invoice.items[match.invoice_idx]
+        cont_line = ctx.contract.line_items[match.contract_idx]
+        return FindingRecord(
+            type=FindingType.QUANTITY_OVERFLOW,
+            severity=FindingSeverity.MAJOR,
+            details=f"Quantity {inv_line.quantity} exceeds contract max {cont_line.max_quantity}",
+            invoice_line_idx=match.invoice_idx,
+            contract_line_idx=match.contract_idx,
+            match_tier=match.tier,
+        )
+
+
+@register_rule
+class CumulativeQuantityRule(LineRule):
+    # Only fires when the line is within max_quantity on its own, so it never
+    # duplicates a quantity_overflow finding
+    name = "cumulative_quantity"
+    fields = ("inv_quantity", "cont_max_quantity", "prior_quantity")
+    cost = 3
+    severity = FindingSeverity.MAJOR
+    
+    def evaluate(self, ctx: RuleContext) -> np.ndarray:
+        quantities = ctx.column("inv_quantity")
+        max_quantities = ctx.column("cont_max_quantity")
+        cumulative = ctx.column("prior_quantity") + quantities
+        
+        capped = np.nan_to_num(max_quantities) != 0
+        return capped & ~(quantities > max_quantities) & (cumulative > max_quantities)
+    
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        match = ctx.matches[k]
+        inv_line = ctx.invoice.items[match.invoice_idx]
+        cont_line = ctx.contract.line_items[match.contract_idx]
+        prior = float(ctx.column("prior_quantity")[k])
+        return FindingRecord(
+            type=FindingType.QUANTITY_OVERFLOW,
+            severity=FindingSeverity.MAJOR,
+            details=f"Cumulative quantity {prior + inv_line.quantity} exceeds contract max "
+                    f"{cont_line.max_quantity} ({prior} already billed on earlier invoices)",
+            invoice_line_idx=match.invoice_idx,
+            contract_line_idx=match.contract_idx,
+            match_tier=match.tier,
+        )
+
+
+@register_rule
+class InvoiceTaxRateRule(HeaderRule):
+    # The invoice-level tax_rate applies to lines billed without their own
+    # tax, so it is compared once against the contract's default_tax_rate
+    # rather than once per line
+    name = "invoice_tax_rate"
+    severity = FindingSeverity.MINOR
+    
+    def check(self, ctx: RuleContext) -> List[FindingRecord]:
+        inv_rate = ctx.invoice.tax_rate
+        cont_rate = ctx.contract.default_tax_rate
+        if inv_rate is None or all(line.tax is not None for line in ctx.invoice.items):
+            return []
+        if abs(inv_rate - cont_rate) <= TAX_RATE_TOLERANCE:
+            return []
+        return [FindingRecord(
+            type=FindingType.TAX_MISMATCH,
+            severity=FindingSeverity.MINOR,
+            details=f"Invoice tax rate {inv_rate*100:.2f}% vs contract rate {cont_rate*100:.2f}%",
+        )]
+
+
+@register_rule
+class TaxRateRule(LineRule):
+    # Line tax (total_price is gross) is checked against the contract line's
+    # tax_rate, falling back to default_tax_rate; lines without their own tax
+    # are covered by invoice_tax_rate
+    name = "tax_rate"
+    fields = ("inv_tax", "inv_total", "cont_tax_rate")
+    cost = 2
+    severity = FindingSeverity.MINOR
+    
+    def evaluate(self, ctx: RuleContext) -> np.ndarray:
+        tax = ctx.column("inv_tax")
+        expected_tax = (ctx.column("inv_total") - tax) * ctx.column("cont_tax_rate")
+        return ~np.isnan(tax) & (np.abs(tax - expected_tax) > TAX_AMOUNT_TOLERANCE)
+    
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        match = ctx.matches[k]
+        inv_line = ctx.invoice.items[match.invoice_idx]
+        expected_rate = float(ctx.column("cont_tax_rate")[k])
+        expected_tax = (inv_line.total_price - inv_line.tax) * expected_rate
+        return FindingRecord(
+            type=FindingType.TAX_MISMATCH,
+            severity=FindingSeverity.MINOR,
+            details=f"Tax ${inv_line.tax:.2f} does not match contract rate {expected_rate*100:.2f}% "
+                    f"(expected ${expected_tax:.2f})",
+            invoice_line_idx=match.invoice_idx,
+            contract_line_idx=match.contract_idx,
+            match_tier=match.tier,
+        )
+
+
+@register_rule
+class UnknownLineRule(UnmatchedRule):
+    name = "unknown_line"
+    severity = FindingSeverity.MAJOR
+    
+    def finding(self, ctx: RuleContext, k: int) -> FindingRecord:
+        inv_line = ctx.invoice.items[k]
+        return FindingRecord(
+            type=FindingType.UNKNOWN_LINE,
+            severity=FindingSeverity.MAJOR,
+            details=f"No matching contract line for invoice item: {inv_line.description[:60]}...",
+            invoice_line_idx=k,
+        )
+
+
+DEFAULT_RULES = [
+    "currency",
+    "net_terms",
+    "invoice_tax_rate",
+    "unit_price_variance",
+    "quantity_overflow",
+    "cumulative_quantity",
+    "tax_rate",
+    "unknown_line",
+]
+
+
+def price_variance_mask(
+    inv_prices: np.ndarray,
+    cont_prices: np.ndarray,
+    allowed_variance_pct: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Element-wise over aligned columns, which may be concatenated across
+    # invoices. NaN or zero on either side disables the check.
+    priced = (np.nan_to_num(inv_prices) != 0) & (np.nan_to_num(cont_prices) != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variances = np.where(
+            cont_prices == 0,
+            (inv_prices != 0).astype(np.float64),
+            np.abs(inv_prices - cont_prices) / cont_prices
+        )
+    return priced & (variances > allowed_variance_pct / 100.0), variances
+
+
+def quantity_overflow_mask(inv_quantities: np.ndarray, cont_max_quantities: np.ndarray) -> np.ndarray:
+    capped = np.nan_to_num(cont_max_quantities) != 0
+    return capped & (inv_quantities > cont_max_quantities)
+
+
+class RulePlan:
+    
+    def __init__(self, rules: List[Rule]):
+        self.rules = list(rules)
+        self.header_rules = [r for r in self.rules if r.scope == HEADER]
+        self.line_rules = [r for r in self.rules if r.scope == LINE]
+        self.unmatched_rules = [r for r in self.rules if r.scope == UNMATCHED]
+        # Union of declared columns, gathered once per run before any rule
+        self.fields = list(dict.fromkeys(f for r in self.line_rules for f in r.fields))
+        for name in self.fields:
+            if name not in COLUMNS:
+                raise ValueError(f"Unknown rule field '{name}' (expected one of {', '.join(COLUMNS)})")
+        
+        # Triage only runs rules that can fail an invoice, cheapest first
+        self.triage_rules = sorted(
+            (r for r in self.rules if r.severity != FindingSeverity.MINOR),
+            key=lambda r: r.cost
+        )
+        
+        self._lock = threading.Lock()
+        self._timings: Dict[str, List[float]] = {r.name: [0, 0.0] for r in self.rules}
+    
+    @classmethod
+    def compile(cls, names: Optional[List[str]] = None) -> "RulePlan":
+        names = list(names) if names else list(DEFAULT_RULES)
+        unknown = [n for n in names if n not in RULES]
+        if unknown:
+            raise ValueError(
+                f"Unknown rule(s) {', '.join(unknown)} "
+                f"(expected any of {', '.join(RULES)})"
+            )
+        return cls([RULES[name]() for name in names])
+    
+    @property
+    def names(self) -> List[str]:
+        return [r.name for r in self.rules]
+    
+    def header_findings(self, invoice: Invoice, contract: Contract) -> List[FindingRecord]:
+        ctx = RuleContext(invoice=invoice, contract=contract)
+        findings: List[FindingRecord] = []
+        for rule in self.header_rules:
+            start = time.perf_counter()
+            findings.extend(rule.check(ctx))
+            self._record(rule.name, time.perf_counter() - start)
+        return findings
+    
+    def line_findings(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: ContractIndex,
+        matches: List[LineMatch],
+        allowed_variance_pct: float,
+        rows: Optional[Set[int]] = None,
+        ledger_prior: Optional[Dict[int, float]] = None
+    ) -> List[FindingRecord]:
+        findings: List[FindingRecord] = []
+        matched_rows = {m.invoice_idx for m in matches}
+        ctx = RuleContext(
+            invoice=invoice,
+            contract=contract,
+            index=index,
+            matches=[m for m in matches if rows is None or m.invoice_idx in rows],
+            allowed_variance_pct=allowed_variance_pct,
+            ledger_prior=ledger_prior,
+        )
+        
+        if ctx.matches and self.line_rules:
+            for name in self.fields:
+                ctx.column(name)
+            
+            masks = []
+            for rule in self.line_rules:
+                start = time.perf_counter()
+                masks.append(rule.evaluate(ctx))
+                self._record(rule.name, time.perf_counter() - start)
+            
+            # Findings are only materialized for violating pairs, in match
+            # order and rule order within a pair
+            for k in np.flatnonzero(np.logical_or.reduce(masks)):
+                for rule, mask in zip(self.line_rules, masks):
+                    if mask[k]:
+                        findings.append(rule.finding(ctx, k))
+        
+        if self.unmatched_rules:
+            unmatched = [
+                i for i in (range(len(invoice.items)) if rows is None else sorted(rows))
+                if i not in matched_rows
+            ]
+            for rule in self.unmatched_rules:
+                start = time.perf_counter()
+                findings.extend(rule.finding(ctx, i) for i in unmatched)
+                self._record(rule.name, time.perf_counter() - start)
+        
+        return findings
+    
+    def triage_header(self, invoice: Invoice, contract: Contract) -> Optional[FindingRecord]:
+        ctx = RuleContext(invoice=invoice, contract=contract)
+        for rule in self.triage_rules:
+            if rule.scope != HEADER:
+                continue
+            start = time.perf_counter()
+            finding = next((f for f in rule.check(ctx) if f.severity == FindingSeverity.MAJOR), None)
+            self._record(rule.name, time.perf_counter() - start)
+            if finding is not None:
+                return finding
+        return None
+    
+    def triage_lines(
+        self,
+        invoice: Invoice,
+        contract: Contract,
+        index: ContractIndex,
+        matches: List[LineMatch],
+        allowed_variance_pct: float,
+        rows: Set[int]
+    ) -> Optional[FindingRecord]:
+        # First MAJOR finding among `matches` and the unmatched `rows`;
+        # columns are gathered lazily, only for the rules that actually run
+        ctx = RuleContext(
+            invoice=invoice,
+            contract=contract,
+            index=index,
+            matches=matches,
+            allowed_variance_pct=allowed_variance_pct,
+        )
+        
+        for rule in self.triage_rules:
+            if rule.scope != LINE or not ctx.matches:
+                continue
+            start = time.perf_counter()
+            finding = None
+            for k in np.flatnonzero(rule.evaluate(ctx)):
+                candidate = rule.finding(ctx, k)
+                if candidate.severity == FindingSeverity.MAJOR:
+                    finding = candidate
+                    break
+            self._record(rule.name, time.perf_counter() - start)
+            if finding is not None:
+                return finding
+        
+        unmatched = sorted(rows - {m.invoice_idx for m in matches})
+        for rule in self.triage_rules:
+            if rule.scope != UNMATCHED or not unmatched:
+                continue
+            start = time.perf_counter()
+            finding = next(
+                (f for f in (rule.finding(ctx, i) for i in unmatched) if f.severity == FindingSeverity.MAJOR),
+                None
+            )
+            self._record(rule.name, time.perf_counter() - start)
+            if finding is not None:
+                return finding
+        
+        return None
+    
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {name: tuple(t) for name, t in self._timings.items()}
+        return {
+            name: {
+                "calls": calls,
+                "total_ms": round(seconds * 1000, 3),
+                "mean_ms": round(seconds * 1000 / calls, 4) if calls else 0.0,
+            }
+            for name, (calls, seconds) in snapshot.items()
+        }
+    
+    def _record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self._timings[name]
+            timing[0] += 1
+            timing[1] += seconds
@@ -0,0 +1,60 @@
+"""
+Process-wide cache of fuzzy line scores, shared across reconciliations
+"""
+
+import sys
+from typing import Any, Dict, Hashable, List, Tuple
+import numpy as np
+from cache import LRUCache
+
+RowScores = Tuple[np.ndarray, np.ndarray]
+
+# Rough per-entry overhead of the key tuple, value tuple and array headers
+_ENTRY_OVERHEAD_BYTES = 400
+
+
+def _entry_size(key: Hashable, value: RowScores) -> int:
+    cols, scores = value
+    return _ENTRY_OVERHEAD_BYTES + sys.getsizeof(key[-1]) + cols.nbytes + scores.nbytes
+
+
+class SimilarityCache:
+    
+    def __init__(self, max_mb: float = 64.0, max_entries: int = 1_000_000):
+        self._cache = LRUCache(
+            max_entries=max_entries,
+            max_bytes=int(max_mb * 1024 * 1024),
+            sizeof=_entry_size
+        )
+    
+    def get_many(
+        self,
+        scope: Tuple[Hashable, ...],
+        descs: List[str]
+    ) -> Tuple[Dict[str, RowScores], List[str]]:
+        # scope pins everything the scores depend on besides the description:
+        # contract content hash, score cutoff and candidate blocking settings
+        found: Dict[str, RowScores] = {}
+        missing: List[str] = []
+        for desc in dict.fromkeys(descs):
+            entry = self._cache.get(scope + (desc,))
+            if entry is None:
+                missing.append(desc)
+            else:
+                found[desc] = entry
+        return found, missing
+    
+    def put_many(self, scope: Tuple[Hashable, ...], rows: Dict[str, RowScores]) -> None:
+        for desc, (cols, scores) in rows.items():
+            # Copies detach each row from the batch arrays it was sliced from;
+            # entries are shared between requests, so they are made read-only
+            cols, scores = cols.copy(), scores.copy()
+            cols.flags.writeable = False
+            scores.flags.writeable = False
+            self._cache.put(scope + (desc,), (cols, scores))
+    
+    def clear(self) -> None:
+        self._cache.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -139,6 +139,14 @@ def test_reconcile():
         print(f"     Major: {summary.get('major_count')} | Minor: {summary.get('minor_count')}")
         print(f"     Findings: {len(findings)}")
         
+        # An identical resend is answered from the result cache when enabled
+        repeat = requests.post(f"{API_BASE}/reconcile", json=payload, timeout=10)
+        repeat.raise_for_status()
+        cache_status = repeat.headers.get("X-Cache")
+        if cache_status == "HIT" and repeat.json() != result:
+            raise ValueError("Cached result differs from the original")
+        print(f"     Resend: X-Cache {cache_status}")
+        
         if findings:
             print(f"\n     {BLUE}Findings:{RESET}")
             for i, finding in enumerate(findings[:3], 1):
@@ -151,6 +159,63 @@ def test_reconcile():
         return False
 
 
+def test_reconcile_batch():
+    """Test streamed batch reconciliation endpoint."""
+    print(f"\n{BLUE}→ Testing /reconcile/batch{RESET}")
+    try:
+        files_invoice = {"file": ("test.jpg", b"fake image data")}
+        inv_resp = requests.post(
+            f"{API_BASE}/parse_extract/invoice",
+            files=files_invoice,
+            timeout=10
+        )
+        inv_resp.raise_for_status()
+        invoice = inv_resp.json().get("invoice")
+        
+        with open("data/contracts/sample_sow_1.json", "r") as f:
+            contract = json.load(f)
+        
+        payload = {
+            "contract": contract,
+            "invoices": [invoice] * 5
+        }
+        resp = requests.post(
+            f"{API_BASE}/reconcile/batch",
+            json=payload,
+            stream=True,
+            timeout=30
+        )
+        resp.raise_for_status()
+        
+        items = [json.loads(line) for line in resp.iter_lines() if line]
+        indices = [item["index"] for item in items]
+        errors = [item for item in items if item.get("error")]
+        
+        # The same batch as NDJSON: a header line, then one invoice per line
+        lines = [json.dumps({"contract": contract})] + [json.dumps(invoice)] * 5
+        ndjson_resp = requests.post(
+            f"{API_BASE}/reconcile/batch",
+            data="\n".join(lines) + "\n",
+            headers={"Content-Type": "application/x-ndjson"},
+            stream=True,
+            timeout=30
+        )
+        ndjson_resp.raise_for_status()
+        ndjson_items = [json.loads(line) for line in ndjson_resp.iter_lines() if line]
+        
+        print(f"  {GREEN}✅ Batch reconciliation streamed{RESET}")
+        print(f"     Results: {len(items)} | Errors: {len(errors)} | NDJSON results: {len(ndjson_items)}")
+        
+        return (
+            indices == list(range(5))
+            and not errors
+            and [item["result"] for item in ndjson_items] == [item["result"] for item in items]
+        )
+    except Exception as e:
+        print(f"  {RED}❌ Error: {e}{RESET}")
+        return False
+
+
 def test_draft_note():
     """Test note generation endpoint."""
     print(f"\n{BLUE}→ Testing /draft_note{RESET}")
@@ -234,6 +299,7 @@ def main():
         ("Parse Invoice", test_parse_extract_invoice),
         ("Parse Contract", test_parse_extract_contract),
         ("Reconciliation", test_reconcile),
+        ("Batch Reconciliation", test_reconcile_batch),
         ("Draft Note", test_draft_note),
     ]
     
@@ -0,0 +1,53 @@
+"""
+Throughput of ReconcileEngine.reconcile_many across worker counts.
+
+Usage:
+    python scripts/bench_batch.py --invoices 2000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+from synthetic import make_contract, make_invoice
+
+from reconcile import ReconcileEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=2000)
+    parser.add_argument("--invoice-lines", type=int, default=20)
+    parser.add_argument("--contracts", type=int, default=4)
+    parser.add_argument("--contract-lines", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+    
+    contracts = [make_contract(args.contract_lines, seed=args.seed + c) for c in range(args.contracts)]
+    pairs = []
+    for i in range(args.invoices):
+        contract = contracts[i % len(contracts)]
+        invoice, _ = make_invoice(contract, args.invoice_lines, seed=args.seed + i)
+        pairs.append((invoice, contract))
+    
+    print(f"Invoices: {len(pairs)}  Contracts: {len(contracts)}  CPUs: {cpus}")
+    print(f"\n{'workers':>8}{'seconds':>10}{'inv/s':>10}{'speedup':>10}")
+    
+    engine = ReconcileEngine()
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        results = engine.reconcile_many(pairs, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(results) == len(pairs)
+        
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{len(pairs) / elapsed:>10.1f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
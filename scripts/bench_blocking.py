@@ -0,0 +1,97 @@
+"""
+Recall and latency of candidate blocking vs. exhaustive fuzzy matching.
+
+Usage:
+    python scripts/bench_blocking.py --sizes 100 1000 10000 100000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from synthetic import make_contract, make_invoice
+
+from reconcile import ReconcileEngine
+
+
+def timed_match(engine: ReconcileEngine, invoice, contract):
+    """Return (cold seconds incl. index build, warm seconds, match pairs)."""
+    engine.index_cache.clear()
+    start = time.perf_counter()
+    index = engine.index_cache.get(contract)
+    engine._match_lines(invoice, contract, index)
+    cold = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    matches = engine._match_lines(invoice, contract, index)
+    warm = time.perf_counter() - start
+    
+    return cold, warm, {(m.invoice_idx, m.contract_idx) for m in matches}
+
+
+def recall(found, reference) -> float:
+    """Share of reference pairs that were also found."""
+    return len(found & reference) / len(reference) if reference else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--invoice-lines", type=int, default=200)
+    parser.add_argument("--modes", nargs="+", default=["tokens", "ngrams"])
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--max-exhaustive", type=int, default=10000,
+                        help="skip the exhaustive matcher above this contract size")
+    parser.add_argument("--min-recall", type=float, default=0.99)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    results = []
+    failed = False
+    
+    for size in args.sizes:
+        contract = make_contract(size, seed=args.seed)
+        invoice, truth = make_invoice(contract, min(args.invoice_lines, size), seed=args.seed)
+        truth_pairs = {(i, c) for i, c in enumerate(truth) if c >= 0}
+        
+        exhaustive = None
+        if size <= args.max_exhaustive:
+            cold, warm, exhaustive = timed_match(ReconcileEngine(), invoice, contract)
+            results.append({
+                "contract_lines": size, "mode": "exhaustive", "cold_s": cold, "warm_s": warm,
+                "recall_vs_exhaustive": 1.0, "recall_vs_truth": recall(exhaustive, truth_pairs),
+            })
+        
+        for mode in args.modes:
+            engine = ReconcileEngine(
+                blocking=mode,
+                blocking_min_lines=0,
+                blocking_candidates=args.candidates
+            )
+            cold, warm, blocked = timed_match(engine, invoice, contract)
+            row = {
+                "contract_lines": size, "mode": mode, "cold_s": cold, "warm_s": warm,
+                "recall_vs_exhaustive": recall(blocked, exhaustive) if exhaustive is not None else None,
+                "recall_vs_truth": recall(blocked, truth_pairs),
+            }
+            results.append(row)
+            if row["recall_vs_exhaustive"] is not None and row["recall_vs_exhaustive"] < args.min_recall:
+                failed = True
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'lines':>8} {'mode':<11}{'cold s':>9}{'warm s':>9}{'recall/exh':>12}{'recall/truth':>14}")
+        for row in results:
+            exh = row["recall_vs_exhaustive"]
+            print(f"{row['contract_lines']:>8} {row['mode']:<11}{row['cold_s']:>9.3f}{row['warm_s']:>9.3f}"
+                  f"{('-' if exh is None else f'{exh:.3f}'):>12}{row['recall_vs_truth']:>14.3f}")
+        print(f"\nRecall check (>= {args.min_recall} vs exhaustive): {'FAIL' if failed else 'OK'}")
+    
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
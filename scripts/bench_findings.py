@@ -0,0 +1,135 @@
+"""
+Cost of carrying findings as validated Pydantic models vs. slotted records.
+
+Usage:
+    python scripts/bench_findings.py --invoices 100 --invoice-lines 100
+"""
+
+import argparse
+import pickle
+import time
+import tracemalloc
+
+from synthetic import make_contract, make_invoice
+
+from findings import to_response
+from models import Finding, ReconcileResponse, ReconcileSummary
+from reconcile import ReconcileEngine
+
+
+def validated_findings(records):
+    # What the rules built before: one validated model per finding
+    return [
+        Finding(
+            type=r.type,
+            severity=r.severity,
+            details=r.details,
+            invoice_line_idx=r.invoice_line_idx,
+            contract_line_idx=r.contract_line_idx,
+            match_tier=r.match_tier,
+        )
+        for r in records
+    ]
+
+
+def validated_response(findings):
+    major_count = sum(1 for f in findings if f.severity == "MAJOR")
+    minor_count = sum(1 for f in findings if f.severity == "MINOR")
+    return ReconcileResponse(
+        summary=ReconcileSummary(**{
+            "pass": major_count == 0,
+            "major_count": major_count,
+            "minor_count": minor_count,
+            "total_count": len(findings),
+        }),
+        findings=findings,
+    )
+
+
+def record_fields(records):
+    # Stand-in for the rules building records from the same values
+    return [
+        type(r)(r.type, r.severity, r.details, r.invoice_line_idx, r.contract_line_idx, r.match_tier)
+        for r in records
+    ]
+
+
+def timed(fn, batches, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for batch in batches:
+            fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_kib(fn, batches) -> float:
+    tracemalloc.start()
+    kept = [fn(batch) for batch in batches]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=100)
+    parser.add_argument("--invoice-lines", type=int, default=100)
+    parser.add_argument("--contract-lines", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    contract = make_contract(args.contract_lines, seed=args.seed)
+    engine = ReconcileEngine()
+    batches = []
+    for i in range(args.invoices):
+        invoice, _ = make_invoice(contract, args.invoice_lines, seed=args.seed + i, unknown_rate=0.2)
+        batches.append(engine._reconcile_records(invoice, contract)[0])
+    models = [validated_findings(b) for b in batches]
+    responses = [validated_response(m) for m in models]
+    n_findings = sum(len(b) for b in batches)
+    
+    print(f"Invoices: {args.invoices}  Findings: {n_findings} ({n_findings / args.invoices:.0f}/invoice)")
+    print(f"\n{'stage':>34}{'models us':>11}{'records us':>12}{'speedup':>9}")
+    
+    stages = [
+        # Building findings inside the rules
+        ("build findings", timed(validated_findings, batches), timed(record_fields, batches)),
+        # Findings through to the API response, validated once vs. converted once
+        (
+            "build + respond",
+            timed(lambda b: validated_response(validated_findings(b)), batches),
+            timed(to_response, batches),
+        ),
+        # Diffing a session's old and new findings (incremental /reconcile/delta)
+        (
+            "diff keys",
+            timed(lambda m: [f.model_dump_json() for f in m], models),
+            timed(lambda b: [f.key() for f in b], batches),
+        ),
+        # Shipping results back from reconcile_many workers
+        (
+            "worker pickle round trip",
+            timed(lambda r: pickle.loads(pickle.dumps(r)), responses),
+            timed(lambda b: pickle.loads(pickle.dumps((b, False))), batches),
+        ),
+    ]
+    for name, old, new in stages:
+        print(f"{name:>34}{old * 1e6 / n_findings:>11.2f}{new * 1e6 / n_findings:>12.2f}{old / new:>9.1f}x")
+    
+    old_peak = peak_kib(validated_findings, batches)
+    new_peak = peak_kib(record_fields, batches)
+    print(f"\nRetained findings: models {old_peak:.0f} KiB, records {new_peak:.0f} KiB ({old_peak / new_peak:.1f}x)")
+    
+    # Both response paths must serialize identically
+    for records, findings in zip(batches, models):
+        assert (
+            validated_response(findings).model_dump_json(by_alias=True)
+            == to_response(records).model_dump_json(by_alias=True)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark line assignment strategies on a synthetic invoice/contract pair.
+
+The sub-second target is for the engine's matching path end to end, with
+the engine's default blocking and scoring threads for each strategy.
+
+Usage:
+    python scripts/bench_matching.py --invoice-lines 500 --contract-lines 5000
+    python scripts/bench_matching.py --conflict-pairs 500
+"""
+
+import argparse
+import time
+
+from synthetic import make_conflicts, make_contract, make_invoice
+
+from matching import (
+    normalize_description,
+    score_matrix,
+    greedy_assignment,
+    optimal_assignment,
+    SCIPY_AVAILABLE,
+)
+from reconcile import ReconcileEngine
+
+
+def best_of(repeat: int, func, *args):
+    """Run func repeat times and return (fastest seconds, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def accuracy(matches, truth) -> float:
+    """Share of invoice lines assigned to the contract line they came from."""
+    assigned = {inv_idx: cont_idx for inv_idx, cont_idx, _ in matches}
+    correct = sum(1 for inv_idx, cont_idx in enumerate(truth) if assigned.get(inv_idx, -1) == cont_idx)
+    return correct / len(truth) if truth else 1.0
+
+
+def match_lines(engine: ReconcileEngine, invoice, contract):
+    """Exact and fuzzy matching as ReconcileEngine.reconcile runs it, as triples."""
+    index = engine.index_cache.get(contract)
+    return [
+        (m.invoice_idx, m.contract_idx, m.confidence)
+        for m in engine._match_lines(invoice, contract, index)
+    ]
+
+
+def total_score(matches) -> float:
+    """Sum of match confidences, the objective optimal assignment maximizes."""
+    return sum(score for _, _, score in matches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--invoice-lines", type=int, default=500)
+    parser.add_argument("--contract-lines", type=int, default=5000)
+    parser.add_argument("--threshold", type=int, default=85)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=-1, help="rapidfuzz cdist workers (-1 = all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--conflict-pairs", type=int, default=200,
+                        help="invoice line pairs competing for the same contract lines")
+    args = parser.parse_args()
+    
+    contract = make_contract(args.contract_lines, seed=args.seed)
+    invoice, truth = make_invoice(contract, args.invoice_lines, seed=args.seed)
+    
+    inv_descs = [normalize_description(line.description) for line in invoice.items]
+    cont_descs = [normalize_description(line.description) for line in contract.line_items]
+    
+    print(f"Invoice lines: {len(inv_descs)}  Contract lines: {len(cont_descs)}  "
+          f"Threshold: {args.threshold}  scipy: {SCIPY_AVAILABLE}")
+    
+    score_time, scores = best_of(args.repeat, score_matrix, inv_descs, cont_descs, args.threshold, args.workers)
+    greedy_time, greedy = best_of(args.repeat, greedy_assignment, scores, args.threshold)
+    optimal_time, optimal = best_of(args.repeat, optimal_assignment, scores, args.threshold)
+    
+    print(f"\n{'stage':<20}{'seconds':>10}{'end-to-end':>12}{'matches':>10}{'accuracy':>10}")
+    print(f"{'score matrix':<20}{score_time:>10.3f}{score_time:>12.3f}{'':>10}{'':>10}")
+    print(f"{'greedy assign':<20}{greedy_time:>10.3f}{score_time + greedy_time:>12.3f}"
+          f"{len(greedy):>10}{accuracy(greedy, truth):>10.3f}")
+    print(f"{'optimal assign':<20}{optimal_time:>10.3f}{score_time + optimal_time:>12.3f}"
+          f"{len(optimal):>10}{accuracy(optimal, truth):>10.3f}")
+    
+    # The engine path: exact keys first, then fuzzy scoring (blocked where
+    # the strategy's default says so) and assignment; the contract index is
+    # built once beforehand, as the server's index cache does
+    print(f"\n{'engine':<20}{'blocking':>10}{'end-to-end':>12}{'matches':>10}{'accuracy':>10}")
+    engine_times = {}
+    for strategy in ("greedy", "optimal"):
+        engine = ReconcileEngine(
+            fuzzy_threshold=args.threshold,
+            match_strategy=strategy,
+            scoring_workers=args.workers
+        )
+        engine.index_cache.get(contract)
+        seconds, matches = best_of(args.repeat, match_lines, engine, invoice, contract)
+        engine_times[strategy] = seconds
+        blocked = engine.blocking if engine._use_blocking(engine.index_cache.get(contract)) else "off"
+        print(f"{strategy:<20}{blocked:>10}{seconds:>12.3f}{len(matches):>10}{accuracy(matches, truth):>10.3f}")
+    
+    status = "OK" if engine_times["optimal"] < 1.0 else "SLOW"
+    print(f"\nOptimal matching end to end: {engine_times['optimal']:.3f}s ({status}, target < 1s)")
+    
+    # Invoice lines competing for the same contract lines, where greedy and
+    # optimal assignment disagree
+    contract, invoice, truth = make_conflicts(args.conflict_pairs, seed=args.seed)
+    inv_descs = [normalize_description(line.description) for line in invoice.items]
+    cont_descs = [normalize_description(line.description) for line in contract.line_items]
+    
+    score_time, scores = best_of(args.repeat, score_matrix, inv_descs, cont_descs, args.threshold, args.workers)
+    greedy_time, greedy = best_of(args.repeat, greedy_assignment, scores, args.threshold)
+    optimal_time, optimal = best_of(args.repeat, optimal_assignment, scores, args.threshold)
+    
+    print(f"\nConflicting lines: {len(inv_descs)} invoice lines over {len(cont_descs)} contract lines")
+    print(f"{'strategy':<20}{'end-to-end':>12}{'matches':>10}{'total':>10}{'accuracy':>10}")
+    for name, seconds, matches in (("greedy", greedy_time, greedy), ("optimal", optimal_time, optimal)):
+        print(f"{name:<20}{score_time + seconds:>12.3f}{len(matches):>10}"
+              f"{total_score(matches):>10.1f}{accuracy(matches, truth):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
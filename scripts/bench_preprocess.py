@@ -0,0 +1,153 @@
+"""
+Cost of preparing image uploads for ADE: full-resolution PDF conversion vs. the preprocessing stage.
+
+Usage:
+    python scripts/bench_preprocess.py --images 8 --workers 4
+    python scripts/bench_preprocess.py --target-dpi 150 --grayscale
+"""
+
+import argparse
+import io
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from preprocess import ImagePreprocessor, PreprocessOptions, convert_image
+
+# (name, size, format): a 12 MP phone photo and a 600 dpi A4 scan
+SCANS = [
+    ("phone photo", (4032, 3024), "JPEG"),
+    ("600 dpi scan", (4960, 7016), "PNG"),
+]
+
+
+def make_scan(size, fmt: str, seed: int = 0) -> bytes:
+    # Paper-coloured page with rows of text-like marks and sensor noise, so
+    # the encoders see something closer to a document than a flat colour
+    rng = random.Random(seed)
+    width, height = size
+    img = Image.new("RGB", size, (238, 234, 226))
+    draw = ImageDraw.Draw(img)
+    line_height = height // 60
+    for row in range(4, 56):
+        x = width // 12
+        while x < width * 11 // 12:
+            word = rng.randint(line_height, line_height * 4)
+            draw.rectangle([x, row * line_height, x + word, row * line_height + line_height // 2], fill=(40, 40, 48))
+            x += word + line_height // 2
+    noise = Image.effect_noise((width // 4, height // 4), 24).resize(size).filter(ImageFilter.BLUR)
+    img = Image.blend(img, Image.merge("RGB", (noise, noise, noise)), 0.12)
+    
+    out = io.BytesIO()
+    img.save(out, format=fmt, quality=92) if fmt == "JPEG" else img.save(out, format=fmt)
+    return out.getvalue()
+
+
+def legacy_convert(data: bytes) -> bytes:
+    # What _extract_ade did before: full decode, RGB flatten, default PDF save
+    img = Image.open(io.BytesIO(data))
+    if img.mode in ('RGBA', 'LA', 'P'):
+        rgb_img = Image.new('RGB', img.size, (255, 255, 255))
+        rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        img = rgb_img
+    pdf_bytes = io.BytesIO()
+    img.save(pdf_bytes, format='PDF')
+    return pdf_bytes.getvalue()
+
+
+def _peak_growth_mb(data: bytes, options) -> float:
+    # Runs in a fresh worker; options=None converts the old way
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    legacy_convert(data) if options is None else convert_image(data, options)
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+
+
+def peak_rss_mb(data: bytes, options=None) -> float:
+    """Growth of peak RSS during one conversion (ru_maxrss is KiB on Linux)."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_peak_growth_mb, data, options).result()
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target-dpi", type=int, default=PreprocessOptions.target_dpi)
+    parser.add_argument("--grayscale", action="store_true")
+    parser.add_argument("--jpeg-quality", type=int, default=PreprocessOptions.jpeg_quality)
+    parser.add_argument("--images", type=int, default=8, help="uploads in the pool throughput run")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    options = PreprocessOptions(
+        target_dpi=args.target_dpi,
+        grayscale=args.grayscale,
+        jpeg_quality=args.jpeg_quality,
+    )
+    
+    print(f"Target: {options.target_dpi} dpi (max side {options.max_side}px), "
+          f"grayscale={options.grayscale}, quality={options.jpeg_quality}\n")
+    print(f"{'scan':>14}{'input KB':>10}{'old ms':>9}{'new ms':>9}{'old KB':>9}{'new KB':>9}"
+          f"{'old MP':>8}{'new MP':>8}{'old RSS':>9}{'new RSS':>9}")
+    
+    for name, size, fmt in SCANS:
+        data = make_scan(size, fmt)
+        old = legacy_convert(data)
+        new, stages = convert_image(data, options)
+        old_s = best_of(lambda: legacy_convert(data), args.repeat)
+        new_s = best_of(lambda: convert_image(data, options), args.repeat)
+        decoded = next(s["counters"]["decoded_pixels"] for s in stages if s["name"] == "decode")
+        print(f"{name:>14}{len(data) / 1024:>10.0f}{old_s * 1000:>9.0f}{new_s * 1000:>9.0f}"
+              f"{len(old) / 1024:>9.0f}{len(new) / 1024:>9.0f}"
+              f"{size[0] * size[1] / 1e6:>8.1f}{decoded / 1e6:>8.1f}"
+              f"{peak_rss_mb(data):>8.0f}M{peak_rss_mb(data, options):>8.0f}M")
+        print(" " * 14 + "  stages: " + ", ".join(f"{s['name']} {s['duration_ms']:.0f}ms" for s in stages))
+    
+    # Throughput of the preprocessor itself, inline vs. a process pool; the
+    # last pass repeats the uploads to show artifact cache hits
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.images):
+            name, size, fmt = SCANS[i % len(SCANS)]
+            path = Path(tmp) / f"scan-{i}.{'jpg' if fmt == 'JPEG' else 'png'}"
+            path.write_bytes(make_scan(size, fmt, seed=i))
+            paths.append(str(path))
+        
+        print()
+        for workers in (0, args.workers):
+            preprocessor = ImagePreprocessor(options, workers=workers, cache_mb=512)
+            start = time.perf_counter()
+            if workers:
+                with ThreadPoolExecutor(max_workers=workers) as callers:
+                    list(callers.map(preprocessor.prepare, paths))
+            else:
+                for path in paths:
+                    preprocessor.prepare(path)
+            elapsed = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            hits = sum(preprocessor.prepare(path).cached for path in paths)
+            cached_ms = (time.perf_counter() - start) * 1000 / len(paths)
+            preprocessor.close()
+            print(f"workers={workers}: {args.images / elapsed:.1f} images/s, "
+                  f"repeat uploads {hits}/{len(paths)} cached at {cached_ms:.1f} ms each")
+
+
+if __name__ == "__main__":
+    main()
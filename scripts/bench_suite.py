@@ -0,0 +1,188 @@
+"""
+Reconciliation benchmark suite: per-stage latency, throughput and peak memory by invoice size.
+
+Usage:
+    python scripts/bench_suite.py --sizes 10 100 1000 10000 100000 --output out/bench.json
+    python scripts/bench_suite.py --sizes 1000 --typo 0.6 --reorder 0.2 --drop-word 0.1 --sku 0.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import rapidfuzz
+from synthetic import Noise, make_contract, make_invoice
+
+from findings import to_response
+from matching import normalize_description
+from reconcile import ENGINE_VERSION, ReconcileEngine
+
+STAGES = ("index_build", "normalize", "exact_match", "fuzzy_match", "header_rules", "line_rules", "response")
+
+
+def run_stages(engine: ReconcileEngine, invoice, contract):
+    """One cold reconciliation split into the engine's stages; returns (seconds by stage, response, matched lines)."""
+    stages = {}
+    
+    def clock(name, fn, *args):
+        start = time.perf_counter()
+        value = fn(*args)
+        stages[name] = time.perf_counter() - start
+        return value
+    
+    engine.index_cache.clear()
+    normalize_description.cache_clear()
+    
+    index = clock("index_build", engine.index_cache.get, contract)
+    inv_descs = clock("normalize", lambda: [normalize_description(line.description) for line in invoice.items])
+    matches = clock("exact_match", engine._match_exact_keys, invoice, inv_descs, index)
+    
+    matched_rows = {m.invoice_idx for m in matches}
+    taken = {m.contract_idx for m in matches}
+    pending = [i for i in range(len(invoice.items)) if i not in matched_rows]
+    fuzzy = clock("fuzzy_match", engine._match_fuzzy, invoice, contract, inv_descs, index, pending, taken)
+    matches = sorted(matches + fuzzy)
+    
+    findings = clock("header_rules", engine.rule_plan.header_findings, invoice, contract)
+    findings += clock("line_rules", engine._check_lines, invoice, contract, index, matches)
+    response = clock("response", to_response, findings)
+    return stages, response, len(matches)
+
+
+def peak_traced_mb(engine: ReconcileEngine, invoice, contract) -> float:
+    """Peak Python and numpy allocation of one cold reconciliation."""
+    engine.index_cache.clear()
+    normalize_description.cache_clear()
+    tracemalloc.start()
+    engine.reconcile(invoice, contract)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def bench_size(args, size: int, noise: Noise):
+    contract_lines = max(size, args.min_contract_lines)
+    contract = make_contract(contract_lines, seed=args.seed)
+    invoice, _ = make_invoice(contract, size, seed=args.seed, unknown_rate=args.unknown, noise=noise)
+    
+    engine = ReconcileEngine(
+        blocking=args.blocking or None,
+        blocking_min_lines=args.blocking_min_lines,
+        blocking_candidates=args.blocking_candidates,
+    )
+    
+    stages, response, matched = run_stages(engine, invoice, contract)
+    cold = sum(stages.values())
+    
+    # Warm runs reuse the cached contract index, as a long-running server does
+    warm = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        engine.reconcile(invoice, contract)
+        warm = min(warm, time.perf_counter() - start)
+    
+    return {
+        "invoice_lines": size,
+        "contract_lines": contract_lines,
+        "blocked": engine._use_blocking(engine.index_cache.get(contract)),
+        "matched_lines": matched,
+        "findings": response.summary.total_count,
+        "cold_s": round(cold, 6),
+        "warm_s": round(warm, 6),
+        "lines_per_s": round(size / warm, 1),
+        "invoices_per_s": round(1 / warm, 3),
+        "stages_s": {name: round(stages[name], 6) for name in STAGES},
+        "peak_traced_mb": round(peak_traced_mb(engine, invoice, contract), 2) if args.memory else None,
+        "max_rss_mb": round(max_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000],
+                        help="invoice line counts")
+    parser.add_argument("--min-contract-lines", type=int, default=100,
+                        help="contracts have max(size, this) lines")
+    parser.add_argument("--repeat", type=int, default=3, help="warm runs per size (best is reported)")
+    parser.add_argument("--blocking", default="tokens", help="blocking mode, or '' to disable")
+    parser.add_argument("--blocking-min-lines", type=int, default=1000)
+    parser.add_argument("--blocking-candidates", type=int, default=50)
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip the tracemalloc run (it roughly doubles runtime)")
+    parser.add_argument("--unknown", type=float, default=0.05, help="share of lines not on the contract")
+    parser.add_argument("--drop-word", type=float, default=Noise.drop_word)
+    parser.add_argument("--reorder", type=float, default=Noise.reorder)
+    parser.add_argument("--typo", type=float, default=Noise.typo)
+    parser.add_argument("--price-drift", type=float, default=Noise.price_drift)
+    parser.add_argument("--sku", type=float, default=Noise.sku, help="share of lines carrying their SKU")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="print the JSON report instead of a table")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    noise = Noise(
+        drop_word=args.drop_word,
+        reorder=args.reorder,
+        typo=args.typo,
+        price_drift=args.price_drift,
+        sku=args.sku,
+    )
+    
+    results = []
+    if not args.json:
+        print(f"{'lines':>8}{'cold s':>10}{'warm s':>10}{'lines/s':>11}{'peak MB':>9}  slowest stage")
+    for size in args.sizes:
+        row = bench_size(args, size, noise)
+        results.append(row)
+        if not args.json:
+            slowest = max(row["stages_s"], key=row["stages_s"].get)
+            peak = "-" if row["peak_traced_mb"] is None else f"{row['peak_traced_mb']:.1f}"
+            print(f"{size:>8}{row['cold_s']:>10.3f}{row['warm_s']:>10.3f}{row['lines_per_s']:>11.0f}{peak:>9}"
+                  f"  {slowest} ({row['stages_s'][slowest]:.3f}s)")
+    
+    report = {
+        "engine_version": ENGINE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+            "rapidfuzz": rapidfuzz.__version__,
+        },
+        "settings": {
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "min_contract_lines": args.min_contract_lines,
+            "blocking": args.blocking or None,
+            "blocking_min_lines": args.blocking_min_lines,
+            "blocking_candidates": args.blocking_candidates,
+            "unknown_rate": args.unknown,
+            "noise": {**vars(noise), "drift_range": list(noise.drift_range)},
+        },
+        "results": results,
+    }
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
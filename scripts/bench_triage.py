@@ -0,0 +1,83 @@
+"""
+Invoices per second of full vs. triage reconciliation on a mixed workload.
+
+Usage:
+    python scripts/bench_triage.py --invoices 400 --contract-lines 2000
+"""
+
+import argparse
+import random
+import time
+
+from synthetic import make_contract, make_invoice
+
+from reconcile import ReconcileEngine
+
+KINDS = ("clean", "currency", "sku_price", "unknown")
+
+
+def make_workload(contract, n_invoices: int, n_lines: int, seed: int):
+    """Invoices cycling through clean, header-failing, exact-tier-failing and unknown-line cases."""
+    rng = random.Random(seed)
+    workload = []
+    for i in range(n_invoices):
+        kind = KINDS[i % len(KINDS)]
+        invoice, truth = make_invoice(
+            contract,
+            n_lines,
+            seed=seed + i,
+            unknown_rate=0.2 if kind == "unknown" else 0.0
+        )
+        
+        for line, cont_idx in zip(invoice.items, truth):
+            if cont_idx >= 0:
+                cont_line = contract.line_items[cont_idx]
+                line.unit_price = cont_line.unit_price
+                line.quantity = min(line.quantity, cont_line.max_quantity or line.quantity)
+        
+        if kind == "currency":
+            invoice.currency = "EUR"
+        elif kind == "sku_price":
+            pos = rng.randrange(len(invoice.items))
+            invoice.items[pos].sku = contract.line_items[truth[pos]].sku
+            invoice.items[pos].unit_price = round(invoice.items[pos].unit_price * 1.15, 2)
+        
+        workload.append((kind, invoice))
+    return workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=400)
+    parser.add_argument("--invoice-lines", type=int, default=30)
+    parser.add_argument("--contract-lines", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    contract = make_contract(args.contract_lines, seed=args.seed)
+    workload = make_workload(contract, args.invoices, args.invoice_lines, args.seed)
+    
+    engine = ReconcileEngine()
+    engine.index_cache.get(contract)
+    
+    print(f"Invoices: {len(workload)}  Lines/invoice: {args.invoice_lines}  Contract lines: {args.contract_lines}")
+    print(f"\n{'mode':>8}{'seconds':>10}{'inv/s':>10}{'failed':>8}{'speedup':>10}")
+    
+    baseline = None
+    verdicts = {}
+    for mode in ("full", "triage"):
+        start = time.perf_counter()
+        results = [engine.reconcile(invoice, contract, mode=mode) for _, invoice in workload]
+        elapsed = time.perf_counter() - start
+        
+        verdicts[mode] = [r.summary.pass_ for r in results]
+        baseline = baseline or elapsed
+        failed = verdicts[mode].count(False)
+        print(f"{mode:>8}{elapsed:>10.2f}{len(workload) / elapsed:>10.1f}{failed:>8}{baseline / elapsed:>10.2f}")
+    
+    assert verdicts["full"] == verdicts["triage"], "triage verdicts differ from full reconciliation"
+    print("\nPass/fail verdicts identical")
+
+
+if __name__ == "__main__":
+    main()
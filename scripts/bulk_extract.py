@@ -0,0 +1,108 @@
+"""
+Extract a directory of invoices (or contracts) into the extraction cache, resumably.
+
+Run from backend/, like the API server, so EXTRACTION_CACHE_DIR, BULK_JOBS_DIR
+and the schemas resolve to the same places and the API serves the results:
+
+Usage:
+    cd backend && python ../scripts/bulk_extract.py ../incoming/2024-q3
+    python ../scripts/bulk_extract.py a.pdf b.png --doc-type contract --workers 8 --rate 120
+    python ../scripts/bulk_extract.py ../incoming/2024-q3 --job-id q3-invoices   # resume by name
+
+Interrupting and rerunning the same command resumes the job: files already in
+its checkpoint are skipped and failed ones are retried.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from ade_client import make_ade_client
+from bulk import DOC_MODELS, BulkExtractionJob, collect_files, job_id_for
+from config import get_settings, load_schema
+from extraction_cache import ExtractionCache
+
+
+async def run(args) -> int:
+    settings = get_settings()
+    if settings.extraction_cache_max_mb <= 0:
+        print("Bulk extraction stores results in the extraction cache; set EXTRACTION_CACHE_MAX_MB")
+        return 2
+    try:
+        files = collect_files(args.paths)
+    except FileNotFoundError as e:
+        print(e)
+        return 2
+    if not files:
+        print("No supported documents found")
+        return 1
+    
+    schema = json.loads(Path(args.schema).read_text()) if args.schema else load_schema(args.doc_type)
+    client = make_ade_client(settings)
+    store = ExtractionCache(
+        settings.extraction_cache_dir,
+        max_mb=settings.extraction_cache_max_mb,
+        memory_entries=settings.extraction_cache_memory_entries
+    )
+    job = BulkExtractionJob(
+        args.job_id or job_id_for(files, args.doc_type),
+        files,
+        doc_type=args.doc_type,
+        schema=schema,
+        client=client,
+        store=store,
+        job_dir=args.job_dir or settings.bulk_jobs_dir,
+        workers=args.workers or settings.bulk_workers,
+        rate_per_minute=args.rate if args.rate is not None else settings.bulk_rate_per_minute
+    )
+    
+    print(f"Job {job.job_id}: {len(files)} files -> {store.directory} (checkpoint {job.checkpoint_path})")
+    progress = asyncio.create_task(report(job))
+    try:
+        status = await job.run()
+    finally:
+        progress.cancel()
+        await client.aclose()
+    
+    print(f"\n{status['state']}: {status['extracted']} extracted, {status['cached']} cached, "
+          f"{status['skipped']} skipped, {status['failed']} failed in {status['elapsed_seconds']:.1f}s "
+          f"({status['extractions_per_minute']:.1f}/min, {status['rate_limit_wait_seconds']:.1f}s rate-limited)")
+    for file_path, error in status["errors"].items():
+        print(f"  FAILED {file_path}: {error}")
+    if status["error"]:
+        print(f"  {status['error']}")
+    return 0 if status["state"] == "finished" and not status["failed"] else 1
+
+
+async def report(job: BulkExtractionJob) -> None:
+    while True:
+        await asyncio.sleep(5)
+        status = job.status()
+        print(f"  {status['total'] - status['remaining']}/{status['total']} done "
+              f"({status['extracted']} extracted, {status['failed']} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="files or directories (searched recursively)")
+    parser.add_argument("--doc-type", choices=sorted(DOC_MODELS), default="invoice")
+    parser.add_argument("--schema", help="JSON schema file (default: schemas/{doc_type}.schema.json, as the API uses)")
+    parser.add_argument("--job-id", help="default: derived from doc type and file list")
+    parser.add_argument("--job-dir", help="checkpoint directory (default: BULK_JOBS_DIR)")
+    parser.add_argument("--workers", type=int, help="files in flight (default: BULK_WORKERS)")
+    parser.add_argument("--rate", type=float, help="upstream calls per minute, 0 = unlimited (default: BULK_RATE_PER_MINUTE)")
+    args = parser.parse_args()
+    
+    try:
+        sys.exit(asyncio.run(run(args)))
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to resume")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Seeded synthetic invoices and contracts for benchmarks.
+"""
+
+import random
+import string
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from models import Invoice, InvoiceLine, Contract, ContractLine
+
+
+@dataclass
+class Noise:
+    """Per-line noise rates for make_invoice; the defaults are the historical mix.
+    
+    drop_word, reorder and typo are mutually exclusive description edits and
+    must sum to at most 1. price_drift lines are billed above the contract
+    price by a factor drawn from drift_range. sku is the share of lines that
+    carry their contract SKU; the rest are billed without one.
+    """
+    drop_word: float = 0.25
+    reorder: float = 0.25
+    typo: float = 0.25
+    price_drift: float = 0.1
+    drift_range: Tuple[float, float] = (1.03, 1.2)
+    sku: float = 0.0
+    
+    def __post_init__(self):
+        if self.drop_word + self.reorder + self.typo > 1.0:
+            raise ValueError("drop_word + reorder + typo must not exceed 1")
+
+
+def make_vocabulary(rng: random.Random, size: int = 2000) -> List[str]:
+    """Build a pool of pronounceable, mostly-unique product words."""
+    consonants = "bcdfghjklmnprstvwz"
+    vowels = "aeiou"
+    words = set()
+    while len(words) < size:
+        syllables = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(syllables)))
+    return sorted(words)
+
+
+def make_contract(n_lines: int, seed: int = 0, vocab_size: int = 2000) -> Contract:
+    """Generate a contract with n_lines distinct line items."""
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng, vocab_size)
+    
+    line_items = []
+    for idx in range(n_lines):
+        words = rng.sample(vocab, rng.randint(4, 8))
+        line_items.append(ContractLine(
+            description=" ".join(w.capitalize() for w in words),
+            sku=f"SKU-{idx:06d}",
+            unit_price=round(rng.uniform(5, 500), 2),
+            max_quantity=float(rng.randint(10, 100)) if rng.random() < 0.3 else None,
+        ))
+    
+    return Contract(
+        vendor_name="Synthetic Vendor LLC",
+        client_name="Synthetic Client Inc",
+        contract_id=f"SOW-SYN-{seed}-{n_lines}",
+        line_items=line_items,
+    )
+
+
+def _perturb(rng: random.Random, description: str, noise: Noise) -> str:
+    words = description.split()
+    roll = rng.random()
+    if roll < noise.drop_word and len(words) > 3:
+        words.pop(rng.randrange(len(words)))
+    elif roll < noise.drop_word + noise.reorder:
+        rng.shuffle(words)
+    elif roll < noise.drop_word + noise.reorder + noise.typo:
+        pos = rng.randrange(len(words))
+        word = list(words[pos])
+        word[rng.randrange(len(word))] = rng.choice(string.ascii_lowercase)
+        words[pos] = "".join(word)
+    return " ".join(words)
+
+
+def make_invoice(
+    contract: Contract,
+    n_lines: int,
+    seed: int = 0,
+    unknown_rate: float = 0.05,
+    noise: Optional[Noise] = None
+) -> Tuple[Invoice, List[int]]:
+    """Generate an invoice billing n_lines of the contract with noisy descriptions.
+    
+    Returns the invoice and, per line, the contract line it was drawn from
+    (-1 for lines that are not on the contract).
+    """
+    noise = noise or Noise()
+    rng = random.Random(seed + 1)
+    # SKUs draw from their own stream so enabling them leaves the rest of
+    # the invoice unchanged
+    sku_rng = random.Random(seed + 2)
+    sources = rng.sample(range(len(contract.line_items)), min(n_lines, len(contract.line_items)))
+    
+    items = []
+    truth = []
+    for cont_idx in sources:
+        if rng.random() < unknown_rate:
+            description = " ".join(rng.choice(string.ascii_lowercase) * 6 for _ in range(4))
+            unit_price = round(rng.uniform(5, 500), 2)
+            sku = None
+            truth.append(-1)
+        else:
+            cont_line = contract.line_items[cont_idx]
+            description = _perturb(rng, cont_line.description, noise)
+            unit_price = cont_line.unit_price
+            if rng.random() < noise.price_drift:
+                unit_price = round(unit_price * rng.uniform(*noise.drift_range), 2)
+            sku = cont_line.sku if sku_rng.random() < noise.sku else None
+            truth.append(cont_idx)
+        
+        quantity = float(rng.randint(1, 20))
+        items.append(InvoiceLine(
+            description=description,
+            sku=sku,
+            quantity=quantity,
+            unit_price=unit_price,
+            total_price=round(quantity * unit_price, 2),
+        ))
+    
+    invoice = Invoice(
+        client_name=contract.client_name,
+        seller_name=contract.vendor_name,
+        invoice_number=f"INV-SYN-{seed}-{n_lines}",
+        invoice_date="01/15/2025",
+        items=items,
+        subtotal={"tax": 0.0, "total": round(sum(i.total_price for i in items), 2)},
+    )
+    return invoice, truth
+
+
+def make_conflicts(n_pairs: int, seed: int = 0) -> Tuple[Contract, Invoice, List[int]]:
+    """Generate invoice lines that compete for the same contract lines.
+    
+    Each pair is a short contract line and a longer one extending it. The
+    invoice first bills the long line with its words reordered, which scores
+    100 against both, then the short line plus two words not on the
+    contract, which only clears the threshold against the short line. A
+    greedy matcher hands the first invoice line the short contract line
+    (lowest index on ties) and leaves the second unmatched; the optimal
+    assignment matches both. Returns the contract, the invoice and, per
+    invoice line, the contract line it bills.
+    """
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng, max(2000, 8 * n_pairs))
+    words = rng.sample(vocab, 7 * n_pairs)
+    
+    line_items = []
+    items = []
+    truth = []
+    for pair in range(n_pairs):
+        short, extension, extra = (
+            words[7 * pair:7 * pair + 3],
+            words[7 * pair + 3:7 * pair + 5],
+            words[7 * pair + 5:7 * pair + 7],
+        )
+        unit_price = round(rng.uniform(5, 500), 2)
+        line_items.append(ContractLine(description=" ".join(short), sku=f"SKU-{2 * pair:06d}", unit_price=unit_price))
+        line_items.append(ContractLine(
+            description=" ".join(short + extension),
+            sku=f"SKU-{2 * pair + 1:06d}",
+            unit_price=unit_price * 2,
+        ))
+        
+        reordered = short + extension
+        rng.shuffle(reordered)
+        for description, price, cont_idx in (
+            (" ".join(reordered), unit_price * 2, 2 * pair + 1),
+            (" ".join(short + extra), unit_price, 2 * pair),
+        ):
+            items.append(InvoiceLine(description=description, quantity=1.0, unit_price=price, total_price=price))
+            truth.append(cont_idx)
+    
+    contract = Contract(
+        vendor_name="Synthetic Vendor LLC",
+        client_name="Synthetic Client Inc",
+        contract_id=f"SOW-CONFLICT-{seed}-{n_pairs}",
+        line_items=line_items,
+    )
+    invoice = Invoice(
+        client_name=contract.client_name,
+        seller_name=contract.vendor_name,
+        invoice_number=f"INV-CONFLICT-{seed}-{n_pairs}",
+        invoice_date="01/15/2025",
+        items=items,
+        subtotal={"tax": 0.0, "total": round(sum(i.total_price for i in items), 2)},
+    )
+    return contract, invoice, truth
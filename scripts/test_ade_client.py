@@ -0,0 +1,720 @@
+"""
+Test the ADE client against a local fake LandingAI endpoint.
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from ade_client import AsyncADEClient, MAPPER_VERSION
+from preprocess import ImagePreprocessor, PreprocessOptions
+from resilience import ADEError, ADEUnavailableError, CircuitBreaker, ResilientCaller
+from extraction_cache import ExtractionCache, content_sha256, dump_extraction, extraction_key, load_extraction
+from bulk import BulkExtractionJob, collect_files, job_id_for
+
+FAKE_EXTRACTION = {
+    "invoice_number": {"value": "INV-FAKE-1"},
+    "issue_date": "01/15/2025",
+    "seller_name": "Fake Vendor LLC",
+    "client_name": "Fake Client Inc",
+    "items": [
+        {"description": "Consulting hours", "qty": 2, "net_price": 100.0, "gross_worth": 220.0},
+    ],
+    "summary": {"vat_value": 20.0, "gross_worth": 220.0},
+}
+
+
+class FakeADEHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    # Consumed one request at a time: an int answers with that status, a
+    # float stalls that many extra seconds; once empty, requests succeed
+    plan = []
+    lock = threading.Lock()
+    requests = 0
+    active = 0
+    max_active = 0
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            step = cls.plan.pop(0) if cls.plan else None
+        
+        time.sleep(self.delay + (step if isinstance(step, float) else 0.0))
+        if isinstance(step, int):
+            status, body = step, json.dumps({"error": "injected failure"}).encode("utf-8")
+        else:
+            status, body = 200, json.dumps({"data": {"extracted_schema": FAKE_EXTRACTION}}).encode("utf-8")
+        with cls.lock:
+            cls.active -= 1
+        
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_ade(delay: float = 0.0, plan=()):
+    """Start the fake endpoint on a free port; returns (server, url). Counters live on server.RequestHandlerClass."""
+    handler = type("ScriptedFakeADEHandler", (FakeADEHandler,), {
+        "delay": delay,
+        "plan": list(plan),
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/tools/agentic-document-analysis"
+
+
+def make_pdf(directory: str) -> str:
+    path = Path(directory) / "invoice.pdf"
+    path.write_bytes(b"%PDF-1.4\n% fake invoice\n")
+    return str(path)
+
+
+def test_connection_reuse():
+    """Test that repeated extractions share pooled keep-alive connections."""
+    print("=" * 80)
+    print("TEST 1: Connection Reuse (Pooled session)")
+    print("=" * 80)
+    
+    server, url = start_fake_ade()
+    client = AsyncADEClient(api_key="test-key", mode="ADE", pool_size=2)
+    client.extract_endpoint = url
+    
+    async def run(pdf):
+        results = [await client.extract(pdf, schema={}, doc_type="invoice") for _ in range(5)]
+        stats = client.stats()
+        await client.aclose()
+        return results, stats
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            results, stats = asyncio.run(run(make_pdf(tmp)))
+        closed_stats = client.stats()
+    finally:
+        server.shutdown()
+    
+    print(f"Invoice number: {results[-1].document.get('invoice_number')}")
+    print(f"Stats: {stats}")
+    print()
+    
+    return (
+        all(r.document.get("invoice_number") == "INV-FAKE-1" for r in results)
+        and stats["requests"] == 5
+        and stats["connections_opened"] == 1
+        and closed_stats["requests"] == 5
+    )
+
+
+
+def test_async_client():
+    """Test that the async client overlaps slow upstream calls."""
+    print("=" * 80)
+    print("TEST 2: Async Client (Concurrent extractions)")
+    print("=" * 80)
+    
+    delay = 0.3
+    server, url = start_fake_ade(delay=delay)
+    
+    async def run(pdf):
+        client = AsyncADEClient(api_key="test-key", mode="ADE", pool_size=4)
+        client.extract_endpoint = url
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.extract(pdf, schema={}, doc_type="invoice") for _ in range(4)))
+        elapsed = time.perf_counter() - start
+        # A second round reuses the kept-alive connections
+        results += await asyncio.gather(*(client.extract(pdf, schema={}, doc_type="invoice") for _ in range(4)))
+        stub = await AsyncADEClient(api_key="", mode="STUB").extract(pdf, schema={}, doc_type="invoice")
+        await client.aclose()
+        return results, elapsed, client.stats(), stub
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            results, elapsed, stats, stub = asyncio.run(run(make_pdf(tmp)))
+    finally:
+        server.shutdown()
+    
+    print(f"4 concurrent extractions: {elapsed:.2f}s (upstream latency {delay}s each)")
+    print(f"Stats: {stats}")
+    print()
+    
+    return (
+        all(r.document == results[0].document for r in results)
+        and results[0].document.get("invoice_number") == "INV-FAKE-1"
+        and elapsed < 2 * delay
+        and stats["requests"] == 8
+        and stats["connections_opened"] == 4
+        and stub.document.get("invoice_number") == "INV-001"
+    )
+
+
+
+def test_parse_extract_single_call():
+    """Test that a combined parse+extract costs one upstream request per document."""
+    print("=" * 80)
+    print("TEST 3: Parse+Extract (Single upstream call)")
+    print("=" * 80)
+    
+    server, url = start_fake_ade()
+    separate = AsyncADEClient(api_key="test-key", mode="ADE")
+    combined = AsyncADEClient(api_key="test-key", mode="ADE")
+    for client in (separate, combined):
+        client.extract_endpoint = url
+    
+    async def run(pdf):
+        await separate.parse(pdf)
+        expected = await separate.extract(pdf, schema={}, doc_type="invoice")
+        parse, result = await combined.parse_extract(pdf, schema={}, doc_type="invoice")
+        stub_parse, stub_result = await AsyncADEClient(api_key="", mode="STUB").parse_extract(pdf, schema={})
+        await separate.aclose()
+        await combined.aclose()
+        return expected, parse, result, stub_parse, stub_result
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            expected, parse, result, stub_parse, stub_result = asyncio.run(run(make_pdf(tmp)))
+    finally:
+        server.shutdown()
+    
+    print(f"Requests: parse then extract {separate.stats()['requests']}, combined {combined.stats()['requests']}")
+    print()
+    
+    return (
+        separate.stats()["requests"] == 2
+        and combined.stats()["requests"] == 1
+        and result.document == expected.document
+        and parse == expected.parse
+        and stub_parse.markdown
+        and stub_result.document.get("invoice_number") == "INV-001"
+    )
+
+
+
+def test_extraction_cache():
+    """Test that duplicate uploads are served from the extraction cache without an upstream call."""
+    print("=" * 80)
+    print("TEST 4: Extraction Cache (Content-addressed, two tiers)")
+    print("=" * 80)
+    
+    server, url = start_fake_ade(delay=0.2)
+    client = AsyncADEClient(api_key="test-key", mode="ADE")
+    client.extract_endpoint = url
+    loop = asyncio.new_event_loop()
+    
+    def extract_cached(cache, path, schema):
+        contents = Path(path).read_bytes()
+        key = extraction_key(content_sha256(contents), schema, "invoice", MAPPER_VERSION)
+        cached = cache.get(key)
+        if cached is not None:
+            return load_extraction(cached)
+        _, result = loop.run_until_complete(client.parse_extract(path, schema=schema, doc_type="invoice"))
+        cache.put(key, dump_extraction(result))
+        return result
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = make_pdf(tmp)
+            renamed = Path(tmp) / "same-scan-renamed.pdf"
+            renamed.write_bytes(Path(pdf).read_bytes())
+            cache = ExtractionCache(str(Path(tmp) / "cache"), max_mb=1)
+            
+            first = extract_cached(cache, pdf, {})
+            start = time.perf_counter()
+            duplicate = extract_cached(cache, str(renamed), {})
+            hit_ms = (time.perf_counter() - start) * 1000
+            extract_cached(cache, pdf, {"properties": {"invoice_number": {"type": "string"}}})
+            requests_sent = client.stats()["requests"]
+            
+            # A fresh instance has an empty memory tier and reads from disk
+            reopened = ExtractionCache(str(Path(tmp) / "cache"), max_mb=1)
+            from_disk = extract_cached(reopened, pdf, {})
+            purged = reopened.purge(content_sha256(Path(pdf).read_bytes()))
+            
+            small = ExtractionCache(str(Path(tmp) / "small"), max_mb=0.01)
+            payload = dump_extraction(first)
+            keys = [f"{i:064x}-0" for i in range(20)]
+            for key in keys:
+                small.put(key, payload)
+            small_stats = small.stats()
+            # Evicted keys leave the memory tier too, and no temp files remain
+            evicted = [key for key in keys if key not in small]
+            evicted_served = [key for key in evicted if small.get(key) is not None]
+            stray_tmp = list((Path(tmp) / "small").glob("*/*.tmp"))
+            
+            try:
+                reopened.purge("../not-a-digest")
+                rejected = False
+            except ValueError:
+                rejected = True
+        loop.run_until_complete(client.aclose())
+    finally:
+        loop.close()
+        server.shutdown()
+    
+    print(f"Duplicate upload served in {hit_ms:.2f} ms; upstream requests: {requests_sent}")
+    print(f"Reopened: {reopened.stats()}")
+    print(f"Size-capped: {small_stats['bytes']} / {small_stats['max_bytes']} bytes, {small_stats['evictions']} evictions")
+    print()
+    
+    return (
+        duplicate.document == first.document
+        and hit_ms < 50
+        and requests_sent == 2
+        and from_disk.document == first.document
+        and reopened.stats()["disk_hits"] == 1
+        and purged == 2
+        and small_stats["bytes"] <= small_stats["max_bytes"]
+        and small_stats["evictions"] > 0
+        and len(evicted) == small_stats["evictions"]
+        and evicted_served == []
+        and stray_tmp == []
+        and rejected
+    )
+
+
+
+def test_image_preprocessing():
+    """Test that image uploads are downscaled while decoding, recompressed and cached."""
+    print("=" * 80)
+    print("TEST 5: Image Preprocessing (Downscale, recompress, cache)")
+    print("=" * 80)
+    
+    from PIL import Image
+    
+    options = PreprocessOptions(target_dpi=50, grayscale=True)
+    inline = ImagePreprocessor(options)
+    pooled = ImagePreprocessor(options, workers=1)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = Path(tmp) / "photo.jpg"
+        Image.new("RGB", (2000, 1500), (200, 180, 160)).save(photo, quality=90)
+        scan = Path(tmp) / "scan.png"
+        Image.new("RGBA", (1200, 1600), (0, 0, 0, 0)).save(scan)
+        pdf = make_pdf(tmp)
+        
+        first = inline.prepare(str(photo))
+        again = inline.prepare(str(photo))
+        flattened = inline.prepare(str(scan))
+        passthrough = inline.prepare(pdf)
+        pdf_bytes = Path(pdf).read_bytes()
+        from_pool = asyncio.run(pooled.prepare_async(str(photo)))
+        pooled.close()
+    
+    stages = {s["name"]: s["counters"] for s in first.stages}
+    print(f"Stages: {[(s['name'], s['duration_ms']) for s in first.stages]}")
+    print(f"Decode: {stages['decode']}")
+    print(f"Size: {stages['decode']['bytes_in']} -> {stages['encode']['bytes_out']} bytes")
+    print(f"Stats: {inline.stats()}")
+    print()
+    
+    return (
+        list(stages) == ["read", "decode", "downscale", "encode"]
+        and stages["decode"]["decoded_pixels"] < stages["decode"]["source_pixels"]
+        and stages["downscale"]["pixels"] <= options.max_side * options.max_side
+        and first.content.startswith(b"%PDF")
+        and again.cached and again.content == first.content
+        and flattened.content.startswith(b"%PDF")
+        and passthrough.content == pdf_bytes and not passthrough.stages[1:]
+        and from_pool.content == first.content
+        and inline.stats()["images"] == 2
+    )
+
+
+
+def fast_caller(**kwargs) -> ResilientCaller:
+    # Millisecond backoff so retry tests don't sleep for real
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.01)
+    return ResilientCaller(**kwargs)
+
+
+def test_retries():
+    """Test backoff retries on 429/5xx and timeouts, and that failures raise instead of returning sample data."""
+    print("=" * 80)
+    print("TEST 6: Retries (Backoff on 429/5xx, no stub fallback)")
+    print("=" * 80)
+    
+    server, url = start_fake_ade(plan=[503, 429, 0.5, 500])
+    fake = server.RequestHandlerClass
+    client = AsyncADEClient(api_key="test-key", mode="ADE", read_timeout=0.2, caller=fast_caller(max_attempts=5))
+    client.extract_endpoint = url
+    
+    async def run(pdf):
+        recovered = await client.extract(pdf, schema={}, doc_type="invoice")
+        retry_stats = client.caller.stats()
+        
+        errors = {}
+        for name, plan in (("bad request", [400]), ("exhausted", [502] * 5)):
+            fake.plan = plan
+            try:
+                await client.extract(pdf, schema={}, doc_type="invoice")
+            except ADEError as e:
+                errors[name] = e.status
+        await client.aclose()
+        return recovered, retry_stats, errors
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            recovered, retry_stats, errors = asyncio.run(run(make_pdf(tmp)))
+    finally:
+        server.shutdown()
+    
+    print(f"Recovered after: {retry_stats['statuses']}")
+    print(f"Errors raised: {errors}")
+    print()
+    
+    return (
+        recovered.document.get("invoice_number") == "INV-FAKE-1"
+        and retry_stats["attempts"] == 5
+        and retry_stats["retries"] == 4
+        and retry_stats["statuses"].get("ReadTimeout") == 1
+        and errors == {"bad request": 400, "exhausted": 502}
+    )
+
+
+def test_concurrency_limit():
+    """Test that concurrent extractions never exceed the configured number of upstream calls."""
+    print("=" * 80)
+    print("TEST 7: Concurrency Limit (Semaphore)")
+    print("=" * 80)
+    
+    delay = 0.2
+    server, url = start_fake_ade(delay=delay)
+    fake = server.RequestHandlerClass
+    
+    async def run(pdf):
+        client = AsyncADEClient(api_key="test-key", mode="ADE", caller=ResilientCaller(max_concurrency=2))
+        client.extract_endpoint = url
+        start = time.perf_counter()
+        await asyncio.gather(*(client.extract(pdf, schema={}, doc_type="invoice") for _ in range(6)))
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        return elapsed, client.caller.stats()
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed, stats = asyncio.run(run(make_pdf(tmp)))
+    finally:
+        server.shutdown()
+    
+    print(f"6 calls, limit 2: {elapsed:.2f}s, upstream max concurrent {fake.max_active}, caller {stats['max_in_flight']}")
+    print(f"Average wait for a slot: {stats['avg_wait_ms']:.0f} ms")
+    print()
+    
+    return fake.max_active == 2 and stats["max_in_flight"] == 2 and elapsed >= 3 * delay
+
+
+def test_circuit_breaker():
+    """Test that the breaker fails fast while upstream is down and recovers through a probe call."""
+    print("=" * 80)
+    print("TEST 8: Circuit Breaker (Fail fast, half-open probe)")
+    print("=" * 80)
+    
+    server, url = start_fake_ade(plan=[500] * 3)
+    fake = server.RequestHandlerClass
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.3)
+    client = AsyncADEClient(api_key="test-key", mode="ADE", caller=fast_caller(max_attempts=1, breaker=breaker))
+    client.extract_endpoint = url
+    
+    async def run(pdf):
+        outcomes = []
+        for _ in range(5):
+            try:
+                await client.extract(pdf, schema={}, doc_type="invoice")
+                outcomes.append("ok")
+            except ADEUnavailableError:
+                outcomes.append("rejected")
+            except ADEError:
+                outcomes.append("failed")
+        upstream_while_open = fake.requests
+        state_while_open = breaker.state
+        
+        await asyncio.sleep(0.35)
+        state_after_reset = breaker.state
+        probe = await client.extract(pdf, schema={}, doc_type="invoice")
+        await client.aclose()
+        return outcomes, upstream_while_open, state_while_open, state_after_reset, probe
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            outcomes, upstream_while_open, state_while_open, state_after_reset, probe = asyncio.run(run(make_pdf(tmp)))
+    finally:
+        server.shutdown()
+    
+    print(f"Outcomes: {outcomes}, upstream requests {upstream_while_open}, state {state_while_open}")
+    print(f"After reset: {state_after_reset}; probe -> {breaker.state}")
+    print(f"Breaker: {breaker.stats()}")
+    print()
+    
+    return (
+        outcomes == ["failed", "failed", "failed", "rejected", "rejected"]
+        and upstream_while_open == 3
+        and state_while_open == "open"
+        and state_after_reset == "half_open"
+        and probe.document.get("invoice_number") == "INV-FAKE-1"
+        and breaker.state == "closed"
+        and breaker.stats()["rejected"] == 2
+    )
+
+
+def test_bulk_extraction():
+    """Test that a bulk job fills the extraction cache, honours its rate limit and resumes from its checkpoint."""
+    print("=" * 80)
+    print("TEST 9: Bulk Extraction (Checkpoint and resume)")
+    print("=" * 80)
+    
+    # Run 1: a and b succeed, c fails with a 500 that opens the breaker, and
+    # the job stops at d as if upstream went down mid-run
+    server, url = start_fake_ade(plan=[0.0, 0.0, 500])
+    fake = server.RequestHandlerClass
+    
+    async def run_job(files, store, job_dir, caller, workers, rate_per_minute):
+        client = AsyncADEClient(api_key="test-key", mode="ADE", caller=caller)
+        client.extract_endpoint = url
+        job = BulkExtractionJob(
+            job_id_for(files, "invoice"),
+            files,
+            doc_type="invoice",
+            schema={},
+            client=client,
+            store=store,
+            job_dir=job_dir,
+            workers=workers,
+            rate_per_minute=rate_per_minute
+        )
+        status = await job.run()
+        await client.aclose()
+        return status
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            docs = Path(tmp) / "docs"
+            (docs / "nested").mkdir(parents=True)
+            for name in "abcde":
+                (docs / f"{name}.pdf").write_bytes(f"%PDF-1.4\n% invoice {name}\n".encode())
+            (docs / "nested" / "b-copy.pdf").write_bytes((docs / "b.pdf").read_bytes())
+            (docs / "notes.txt").write_text("not a document")
+            
+            files = collect_files([str(docs)])
+            store = ExtractionCache(str(Path(tmp) / "store"))
+            job_dir = str(Path(tmp) / "jobs")
+            breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+            first = asyncio.run(run_job(files, store, job_dir, fast_caller(max_attempts=1, breaker=breaker), 1, 0))
+            first_requests = fake.requests
+            
+            # A line torn by the crash is ignored on resume
+            with open(first["checkpoint_path"], "a") as checkpoint:
+                checkpoint.write('{"file": "')
+            
+            # Run 2, a fresh process in practice: skips a and b, retries c,
+            # and serves the copy of b from the cache
+            start = time.perf_counter()
+            resumed = asyncio.run(run_job(files, store, job_dir, fast_caller(), 3, 600))
+            resumed_elapsed = time.perf_counter() - start
+            resumed_requests = fake.requests - first_requests
+            
+            rerun = asyncio.run(run_job(files, store, job_dir, fast_caller(), 3, 600))
+            
+            stored = [
+                store.get(extraction_key(content_sha256(Path(f).read_bytes()), {}, "invoice", MAPPER_VERSION))
+                for f in files
+            ]
+    finally:
+        server.shutdown()
+    
+    for label, status in (("Run 1", first), ("Resume", resumed), ("Rerun", rerun)):
+        print(f"{label}: {status['state']}, extracted {status['extracted']}, cached {status['cached']}, "
+              f"skipped {status['skipped']}, failed {status['failed']}, remaining {status['remaining']}")
+    print(f"Upstream requests: {first_requests} then {resumed_requests}; "
+          f"resume took {resumed_elapsed:.2f}s at 10 calls/s ({resumed['rate_limit_wait_seconds']:.2f}s waiting)")
+    print()
+    
+    return (
+        len(files) == 6
+        and first["state"] == "interrupted"
+        and (first["extracted"], first["failed"], first["remaining"]) == (2, 1, 3)
+        and first_requests == 3
+        and resumed["state"] == "finished"
+        and (resumed["skipped"], resumed["extracted"], resumed["cached"], resumed["failed"]) == (2, 3, 1, 0)
+        and resumed_requests == 3
+        and resumed_elapsed >= 0.2
+        and resumed["rate_limit_wait_seconds"] > 0
+        and rerun["skipped"] == 6
+        and fake.requests == first_requests + resumed_requests
+        and all(p is not None and load_extraction(p).document["invoice_number"] == "INV-FAKE-1" for p in stored)
+    )
+
+
+def test_breaker_probe_release():
+    """Test that a cancelled or crashed half-open probe doesn't leave the circuit stuck."""
+    print("=" * 80)
+    print("TEST 10: Breaker Probe Release (Cancelled and failed probes)")
+    print("=" * 80)
+    
+    # The 500 opens the circuit; the probe after the reset stalls and is
+    # cancelled, and the call after it must be let through as the new probe
+    server, url = start_fake_ade(plan=[500, 1.0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.1)
+    
+    async def run(pdf):
+        client = AsyncADEClient(api_key="test-key", mode="ADE", caller=fast_caller(max_attempts=1, breaker=breaker))
+        client.extract_endpoint = url
+        try:
+            await client.extract(pdf, schema={}, doc_type="invoice")
+        except ADEError:
+            pass
+        await asyncio.sleep(0.15)
+        probe = asyncio.create_task(client.extract(pdf, schema={}, doc_type="invoice"))
+        await asyncio.sleep(0.1)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        state_after_cancel = breaker.state
+        result = await client.extract(pdf, schema={}, doc_type="invoice")
+        await client.aclose()
+        return state_after_cancel, result
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            state_after_cancel, result = asyncio.run(run(make_pdf(tmp)))
+    finally:
+        server.shutdown()
+    state_after_probe = breaker.state
+    
+    # A probe whose send() raises something other than a transport error
+    # counts as a failure and re-opens the circuit
+    crashing = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    caller = fast_caller(max_attempts=1, breaker=crashing)
+    crashing.record_failure()
+    time.sleep(0.06)
+    
+    async def send():
+        raise ValueError("unexpected response")
+    
+    try:
+        asyncio.run(caller.acall(send, transport_errors=(ConnectionError,)))
+    except ValueError:
+        pass
+    state_after_crash = crashing.state
+    time.sleep(0.06)
+    state_after_reset = crashing.state
+    
+    print(f"After cancelled probe: {state_after_cancel}; next call -> {result.document.get('invoice_number')}, {state_after_probe}")
+    print(f"After crashed probe: {state_after_crash}, then {state_after_reset}; caller {caller.stats()['statuses']}")
+    print()
+    
+    return (
+        state_after_cancel == "half_open"
+        and result.document.get("invoice_number") == "INV-FAKE-1"
+        and state_after_probe == "closed"
+        and state_after_crash == "open"
+        and state_after_reset == "half_open"
+    )
+
+def test_bulk_duplicates():
+    """Test that identical files processed concurrently in one job cost a single upstream call."""
+    print("=" * 80)
+    print("TEST 11: Bulk Duplicates (Concurrent identical files)")
+    print("=" * 80)
+    
+    # Every worker picks up a copy at once; the slow response keeps the
+    # first extraction in flight while the others arrive
+    server, url = start_fake_ade(delay=0.2)
+    fake = server.RequestHandlerClass
+    
+    async def run(files, store, job_dir):
+        client = AsyncADEClient(api_key="test-key", mode="ADE", caller=fast_caller())
+        client.extract_endpoint = url
+        job = BulkExtractionJob(
+            job_id_for(files, "invoice"),
+            files,
+            doc_type="invoice",
+            schema={},
+            client=client,
+            store=store,
+            job_dir=job_dir,
+            workers=len(files)
+        )
+        status = await job.run()
+        await client.aclose()
+        return status
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            docs = Path(tmp) / "docs"
+            docs.mkdir()
+            for name in ("a", "b", "c", "d"):
+                (docs / f"{name}.pdf").write_bytes(b"%PDF-1.4\n% the same invoice\n")
+            files = collect_files([str(docs)])
+            status = asyncio.run(run(files, ExtractionCache(str(Path(tmp) / "store")), str(Path(tmp) / "jobs")))
+    finally:
+        server.shutdown()
+    
+    print(f"{status['state']}: extracted {status['extracted']}, cached {status['cached']}, "
+          f"failed {status['failed']} ({status['error']}); upstream requests: {fake.requests}")
+    print()
+    
+    return (
+        status["state"] == "finished"
+        and (status["extracted"], status["cached"], status["failed"]) == (1, 3, 0)
+        and fake.requests == 1
+    )
+
+
+if __name__ == "__main__":
+    print("\n🧪 PactProof ADE Client Tests\n")
+    
+    tests = [
+        ("Connection Reuse", test_connection_reuse),
+        ("Async Client", test_async_client),
+        ("Parse+Extract Single Call", test_parse_extract_single_call),
+        ("Extraction Cache", test_extraction_cache),
+        ("Image Preprocessing", test_image_preprocessing),
+        ("Retries", test_retries),
+        ("Concurrency Limit", test_concurrency_limit),
+        ("Circuit Breaker", test_circuit_breaker),
+        ("Bulk Extraction", test_bulk_extraction),
+        ("Breaker Probe Release", test_breaker_probe_release),
+        ("Bulk Duplicates", test_bulk_duplicates),
+    ]
+    
+    results = []
+    for name, test_func in tests:
+        try:
+            passed = test_func()
+            results.append((name, passed))
+        except Exception as e:
+            print(f"❌ {name} failed with error: {e}\n")
+            results.append((name, False))
+    
+    print("=" * 80)
+    print("TEST SUMMARY")
+    print("=" * 80)
+    for name, passed in results:
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status}: {name}")
+    
+    passed_count = sum(1 for _, p in results if p)
+    total_count = len(results)
+    print(f"\nTotal: {passed_count}/{total_count} passed")
@@ -236,6 +236,633 @@ def test_terms_mismatch():
     return has_terms_mismatch and result.summary.minor_count > 0
 
 
+def test_batched_matching_parity():
+    """Test batched matrix scoring yields the same findings as the pairwise loop."""
+    print("=" * 80)
+    print("TEST 6: Batched Matching Parity (Identical findings expected)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    
+    # Reorder and perturb lines so the greedy order actually matters
+    invoice.items.reverse()
+    invoice.items[1].unit_price = 30.0
+    invoice.items[2].description = "Vintage Crystal Red Wine Glasses"
+    
+    pairwise = ReconcileEngine(fuzzy_threshold=85, batch_scoring=False).reconcile(invoice, contract)
+    batched = ReconcileEngine(fuzzy_threshold=85, batch_scoring=True).reconcile(invoice, contract)
+    
+    print(f"Pairwise findings: {pairwise.summary.total_count}")
+    print(f"Batched findings:  {batched.summary.total_count}")
+    print()
+    
+    return pairwise.model_dump() == batched.model_dump()
+
+
+def test_optimal_assignment():
+    """Test optimal strategy recovers a line the greedy strategy locks out."""
+    print("=" * 80)
+    print("TEST 7: Optimal Assignment (Greedy flags unknown line, optimal does not)")
+    print("=" * 80)
+    
+    from backend.models import InvoiceLine, ContractLine
+    invoice, contract = load_sample_data()
+    
+    contract.line_items = [
+        ContractLine(description="Wine Glass Rack", unit_price=20.0),
+        ContractLine(description="Wine Glass Rack Holder Steel", unit_price=35.0),
+    ]
+    invoice.items = [
+        InvoiceLine(description="Steel Wine Glass Rack Holder", quantity=1.0, unit_price=35.0, total_price=35.0),
+        InvoiceLine(description="Wine Glass Rack Oak", quantity=1.0, unit_price=20.0, total_price=20.0),
+    ]
+    
+    greedy = ReconcileEngine(fuzzy_threshold=90, match_strategy="greedy").reconcile(invoice, contract)
+    optimal = ReconcileEngine(fuzzy_threshold=90, match_strategy="optimal").reconcile(invoice, contract)
+    
+    print(f"Greedy findings:  {[f.type.value for f in greedy.findings]}")
+    print(f"Optimal findings: {[f.type.value for f in optimal.findings]}")
+    print()
+    
+    greedy_unknown = any(f.type == "UNKNOWN_LINE" for f in greedy.findings)
+    return greedy_unknown and optimal.summary.pass_ and optimal.summary.total_count == 0
+
+
+def test_contract_index_cache():
+    """Test contract index is reused per contract and rebuilt when content changes."""
+    print("=" * 80)
+    print("TEST 8: Contract Index Cache (Hit on repeat, miss on edited contract)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    
+    first = engine.reconcile(invoice, contract)
+    second = engine.reconcile(invoice, contract)
+    
+    contract.line_items[0].unit_price = 60.0
+    edited = engine.reconcile(invoice, contract)
+    
+    stats = engine.index_cache.stats()
+    print(f"Cache stats: {stats}")
+    print()
+    
+    has_price_variance = any(f.type == "UNIT_PRICE_VARIANCE" for f in edited.findings)
+    return (
+        first.model_dump() == second.model_dump()
+        and stats["hits"] == 1
+        and stats["misses"] == 2
+        and has_price_variance
+    )
+
+
+def test_sku_tier_match():
+    """Test SKU fast path matches lines whose descriptions differ."""
+    print("=" * 80)
+    print("TEST 9: SKU Tier Match (Price variance reported with SKU tier)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    
+    contract.line_items[3].sku = "IKEA-300.557.60"
+    invoice.items[3].sku = "ikea-300.557.60"
+    invoice.items[3].description = "Wine rack, 4 bottle"
+    invoice.items[3].unit_price = 30.0
+    
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    result = engine.reconcile(invoice, contract)
+    
+    if result.findings:
+        print(f"Findings:")
+        for i, finding in enumerate(result.findings, 1):
+            print(f"  {i}. {finding.type} ({finding.severity}) tier={finding.match_tier}")
+            print(f"     {finding.details}")
+    print()
+    
+    return (
+        len(result.findings) == 1
+        and result.findings[0].type == "UNIT_PRICE_VARIANCE"
+        and result.findings[0].match_tier == "SKU"
+        and result.findings[0].contract_line_idx == 3
+    )
+
+
+def test_blocking_recall():
+    """Test candidate blocking finds the same matches as exhaustive scoring."""
+    print("=" * 80)
+    print("TEST 10: Blocking Recall (Identical findings to exhaustive matcher)")
+    print("=" * 80)
+    
+    from synthetic import make_contract, make_invoice
+    contract = make_contract(2000, seed=7)
+    invoice, _truth = make_invoice(contract, 100, seed=7)
+    
+    exhaustive = ReconcileEngine().reconcile(invoice, contract)
+    results = {"exhaustive": exhaustive}
+    for mode in ("tokens", "ngrams"):
+        engine = ReconcileEngine(blocking=mode, blocking_min_lines=0)
+        results[mode] = engine.reconcile(invoice, contract)
+    
+    for mode, result in results.items():
+        print(f"  {mode:<11} findings: {result.summary.total_count}")
+    print()
+    
+    return all(r.model_dump() == exhaustive.model_dump() for r in results.values())
+
+
+def test_reconcile_many():
+    """Test process-pool batch reconciliation returns results in input order."""
+    print("=" * 80)
+    print("TEST 11: Reconcile Many (Pool results match sequential, in order)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    
+    pairs = []
+    for i in range(12):
+        inv = invoice.model_copy(deep=True)
+        inv.invoice_number = f"{invoice.invoice_number}-{i}"
+        inv.items[i % len(inv.items)].unit_price = 10.0 + i
+        if i % 3 == 0:
+            inv.currency = "EUR"
+        pairs.append((inv, contract))
+    
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    sequential = [engine.reconcile(inv, con) for inv, con in pairs]
+    pooled = engine.reconcile_many(pairs, workers=2)
+    
+    print(f"Pairs: {len(pairs)}  Pooled results: {len(pooled)}")
+    print()
+    
+    return [r.model_dump() for r in pooled] == [r.model_dump() for r in sequential]
+
+def test_incremental_delta():
+    """Test that patching a session's findings equals a full re-reconcile."""
+    print("=" * 80)
+    print("TEST 12: Incremental Delta (Patched findings match full reconcile)")
+    print("=" * 80)
+    
+    from incremental import findings_patch
+    
+    invoice, contract = load_sample_data()
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    session = engine.start_session(invoice, contract)
+    findings = list(engine.session_response(session).findings)
+    
+    edited = invoice.model_copy(deep=True)
+    changed = edited.items[0].model_copy()
+    changed.unit_price = changed.unit_price * 1.5
+    renamed = edited.items[-1].model_copy()
+    renamed.description = "Unlisted Consulting Hours"
+    edited.items[0], edited.items[-1] = changed, renamed
+    
+    patch = engine.apply_changes(session, {0: changed, len(edited.items) - 1: renamed})
+    for op in patch:
+        pos = int(op.path.rsplit("/", 1)[1])
+        if op.op == "remove":
+            del findings[pos]
+        else:
+            findings.insert(pos, op.value)
+    
+    full = engine.reconcile(edited, contract)
+    print(f"Patch ops: {len(patch)}  Findings: {len(findings)} (full: {len(full.findings)})")
+    print()
+    
+    return (
+        [f.model_dump() for f in findings] == [f.model_dump() for f in full.findings]
+        and findings_patch(session.findings, engine._reconcile_records(edited, contract)[0]) == []
+        and engine.session_response(session).summary == full.summary
+    )
+
+def test_contract_routing():
+    """Test that the registry routes an invoice to its governing contract."""
+    print("=" * 80)
+    print("TEST 13: Contract Routing (Best coverage wins among same-vendor SOWs)")
+    print("=" * 80)
+    
+    from contract_registry import ContractRegistry
+    
+    invoice, contract = load_sample_data()
+    registry = ContractRegistry(engine=ReconcileEngine(fuzzy_threshold=85))
+    loaded = registry.load_dir("data/contracts")
+    
+    decoy = contract.model_copy(deep=True)
+    decoy.contract_id = "SOW-DECOY"
+    decoy.vendor_name = "Nguyen Roach Inc."
+    decoy.line_items = decoy.line_items[:1]
+    registry.add(decoy)
+    
+    routed = invoice.model_copy(deep=True)
+    routed.seller_name = "NGUYEN-ROACH, LLC"
+    routes = registry.route(routed, limit=3)
+    
+    # Registered contracts were fingerprinted when added, so routing again
+    # serves every index from the cache without re-hashing a contract
+    import contract_index
+    fingerprint = contract_index.contract_fingerprint
+    hashed = []
+    contract_index.contract_fingerprint = lambda c: hashed.append(c.contract_id) or fingerprint(c)
+    try:
+        rerouted = registry.route(routed, limit=3)
+    finally:
+        contract_index.contract_fingerprint = fingerprint
+    
+    print(f"Registered: {len(registry)} ({loaded} from disk)")
+    for route in routes:
+        print(f"  {route.contract_id}: coverage {route.coverage:.2f}, vendor {route.vendor_score:.2f}")
+    print()
+    
+    return (
+        [r.contract_id for r in routes] == [contract.contract_id, "SOW-DECOY"]
+        and routes[0].coverage == 1.0
+        and routes[1].matched_lines == 1
+        and rerouted == routes
+        and hashed == []
+    )
+
+def test_line_check_edge_cases():
+    """Test zero, missing and capped values in the column-wise line checks."""
+    print("=" * 80)
+    print("TEST 14: Line Check Edge Cases (Zero/missing prices, max quantity)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    contract = contract.model_copy(deep=True)
+    invoice.items[0].unit_price = None
+    invoice.items[1].unit_price = 0.0
+    contract.line_items[2].unit_price = 0.0
+    contract.line_items[3].max_quantity = 2.0
+    contract.line_items[4].max_quantity = 0.0
+    invoice.items[4].quantity = 5.0
+    
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    result = engine.reconcile(invoice, contract)
+    found = [(f.type.value, f.invoice_line_idx) for f in result.findings]
+    
+    print(f"Findings: {found}")
+    print()
+    
+    # Only line 3 (4 units vs max 2) violates: missing/zero prices and a
+    # zero max_quantity disable their checks
+    return found == [("QUANTITY_OVERFLOW", 3)]
+
+def test_similarity_cache():
+    """Test that cached fuzzy scores give identical results and get reused."""
+    print("=" * 80)
+    print("TEST 15: Similarity Cache (Repeat descriptions skip fuzzy scoring)")
+    print("=" * 80)
+    
+    from similarity_cache import SimilarityCache
+    
+    invoice, contract = load_sample_data()
+    for line in invoice.items:
+        line.description = line.description.replace("Wine", "Wine Glass", 1)
+    
+    plain = ReconcileEngine(fuzzy_threshold=85)
+    cached = ReconcileEngine(fuzzy_threshold=85, similarity_cache=SimilarityCache(max_mb=1))
+    
+    expected = plain.reconcile(invoice, contract).model_dump()
+    first = cached.reconcile(invoice, contract).model_dump()
+    misses = cached.similarity_cache.stats()["misses"]
+    second = cached.reconcile(invoice, contract).model_dump()
+    stats = cached.similarity_cache.stats()
+    
+    print(f"Cache stats: {stats}")
+    print()
+    
+    return (
+        first == expected
+        and second == expected
+        and misses > 0
+        and stats["misses"] == misses
+        and stats["hits"] == misses
+    )
+
+def test_tax_rate_rule():
+    """Test the tax rate rules against line and contract default rates."""
+    print("=" * 80)
+    print("TEST 16: Tax Rate Rule (Line tax vs contract tax_rate/default, header rate once)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    contract = contract.model_copy(deep=True)
+    contract.default_tax_rate = 0.10
+    contract.line_items[1].tax_rate = 0.0
+    
+    # Gross totals: line 0 taxed at the default 10%, line 1 wrongly taxed
+    # although its contract line is tax exempt, line 2 taxed at 20%
+    invoice.items[0].tax = 4.66
+    invoice.items[0].total_price = 46.55 + 4.66
+    invoice.items[1].tax = 1.54
+    invoice.items[1].total_price = 15.40 + 1.54
+    invoice.items[2].tax = 7.80
+    invoice.items[2].total_price = 39.00 + 7.80
+    
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    result = engine.reconcile(invoice, contract)
+    found = [(f.type.value, f.severity.value, f.invoice_line_idx) for f in result.findings]
+    
+    without_tax = ReconcileEngine(rules=["currency", "net_terms", "unknown_line"])
+    
+    # An invoice-level rate that disagrees with the contract is one finding,
+    # not one per line billed without tax
+    header_rated, _ = load_sample_data()
+    header_rated.tax_rate = 0.20
+    header_found = [
+        (f.type.value, f.invoice_line_idx)
+        for f in engine.reconcile(header_rated, contract).findings
+    ]
+    
+    # A rule missing an abstract method is rejected when it is registered
+    from rules import LineRule, register_rule
+    
+    class PriceOnlyRule(LineRule):
+        name = "price_only"
+        
+        def evaluate(self, ctx):
+            return ctx.column("inv_unit_price") < 0
+    
+    try:
+        register_rule(PriceOnlyRule)
+        incomplete_rejected = False
+    except ValueError:
+        incomplete_rejected = True
+    
+    print(f"Findings: {found}")
+    print(f"Header rate findings: {header_found}")
+    print(f"Rule timings: {list(engine.rule_plan.timings())}")
+    print()
+    
+    return (
+        found == [("TAX_MISMATCH", "MINOR", 1), ("TAX_MISMATCH", "MINOR", 2)]
+        and result.summary.pass_
+        and without_tax.reconcile(invoice, contract).findings == []
+        and header_found == [("TAX_MISMATCH", None)]
+        and incomplete_rejected
+    )
+
+def test_quantity_ledger():
+    """Test cumulative max_quantity across invoices, replays and dry runs."""
+    print("=" * 80)
+    print("TEST 17: Quantity Ledger (Cumulative caps, replays, voids, dry runs)")
+    print("=" * 80)
+    
+    import tempfile
+    from ledger import QuantityLedger
+    
+    invoice, contract = load_sample_data()
+    contract = contract.model_copy(deep=True)
+    contract.line_items[3].max_quantity = 10.0
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ReconcileEngine(ledger=QuantityLedger(f"{tmp}/ledger.db"))
+        
+        def overflow(number: str, post: bool = True) -> list:
+            inv = invoice.model_copy(deep=True)
+            inv.invoice_number = number
+            inv.items[3].quantity = 4.0
+            return [
+                f.details for f in engine.reconcile(inv, contract, post=post).findings
+                if f.type.value == "QUANTITY_OVERFLOW"
+            ]
+        
+        first, second = overflow("A-1"), overflow("A-2")
+        replay = overflow("A-2")
+        # Without post the ledger is read but left as it was
+        before_dry_run = engine.ledger.totals(contract.contract_id)
+        dry_run = overflow("A-3", post=False)
+        after_dry_run = engine.ledger.totals(contract.contract_id)
+        third = overflow("A-3")
+        engine.ledger.void(contract.contract_id, "A-2")
+        after_void = overflow("A-3")
+        totals = engine.ledger.totals(contract.contract_id)
+        
+        # The same contract re-uploaded with a line inserted up front and the
+        # rest reversed: consumption stays with the capped line, not index 3
+        inserted = contract.line_items[0].model_copy(update={"description": "Gift Wrapping"})
+        contract.line_items = [inserted] + contract.line_items[::-1]
+        reuploaded = overflow("A-4")
+        reuploaded_totals = engine.ledger.totals(contract.contract_id)
+    
+    capped_key = "desc:" + " ".join(invoice.items[3].description.lower().split())
+    print(f"Third invoice: {third}")
+    print(f"Totals after void: {totals}")
+    print(f"After re-upload: {reuploaded}")
+    print()
+    
+    return (
+        first == [] and second == [] and replay == []
+        and len(dry_run) == 1 and "12.0 exceeds contract max 10.0" in dry_run[0]
+        and after_dry_run == before_dry_run
+        and len(third) == 1 and "12.0 exceeds contract max 10.0" in third[0]
+        and after_void == []
+        and totals[capped_key] == 8.0
+        and len(reuploaded) == 1 and "12.0 exceeds contract max 10.0" in reuploaded[0]
+        and reuploaded_totals[capped_key] == 12.0
+    )
+
+def test_result_cache():
+    """Test result cache keys and the on-disk backend's eviction."""
+    print("=" * 80)
+    print("TEST 18: Result Cache (Stable keys, settings invalidation, disk LRU)")
+    print("=" * 80)
+    
+    import tempfile
+    from reconcile import ENGINE_VERSION
+    from result_cache import DiskResultCache, result_key
+    
+    invoice, contract = load_sample_data()
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    key = result_key(invoice, contract, engine.config(), ENGINE_VERSION)
+    
+    reordered = Invoice(**{**invoice.model_dump(), "subtotal": {"total": 232.95, "tax": 21.18}})
+    same_key = result_key(reordered, contract, engine.config(), ENGINE_VERSION)
+    stricter = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=1.0)
+    other_key = result_key(invoice, contract, stricter.config(), ENGINE_VERSION)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiskResultCache(tmp, max_entries=10)
+        payload = engine.reconcile(invoice, contract).model_dump_json(by_alias=True)
+        cache.put(key, payload)
+        hit = cache.get(key) == payload
+        for i in range(20):
+            cache.put(f"{i:064x}", "{}")
+        stats = cache.stats()
+    
+    print(f"Key: {key[:16]}...  Disk stats: {stats}")
+    print()
+    
+    return key == same_key and key != other_key and hit and stats["entries"] <= 10
+
+
+def test_triage_mode():
+    """Test that triage stops at the first MAJOR finding and agrees with full mode."""
+    print("=" * 80)
+    print("TEST 19: Triage Mode (Fail-fast pass/fail)")
+    print("=" * 80)
+    
+    invoice, contract = load_sample_data()
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    
+    foreign = Invoice(**{**invoice.model_dump(), "currency": "EUR"})
+    variants = [invoice, foreign]
+    for bump in (1.01, 1.10):
+        items = [{**item, "unit_price": round(item["unit_price"] * bump, 2)} for item in invoice.model_dump()["items"]]
+        variants.append(Invoice(**{**invoice.model_dump(), "items": items}))
+    
+    agree = True
+    for variant in variants:
+        full = engine.reconcile(variant, contract)
+        triage = engine.reconcile(variant, contract, mode="triage")
+        print(f"Full: pass={full.summary.pass_} findings={len(full.findings)}  "
+              f"Triage: pass={triage.summary.pass_} findings={len(triage.findings)}")
+        agree = agree and full.summary.pass_ == triage.summary.pass_ and triage.summary.partial
+        agree = agree and len(triage.findings) <= 1 and not full.summary.partial
+    
+    stopped = engine.reconcile(foreign, contract, mode="triage")
+    header_only = [f.type for f in stopped.findings] == ["CURRENCY_MISMATCH"]
+    print()
+    
+    return agree and header_only
+
+
+def test_finding_records():
+    """Test that engine finding records convert to the same response as validated models."""
+    print("=" * 80)
+    print("TEST 20: Finding Records (Boundary conversion, pickling)")
+    print("=" * 80)
+    
+    import pickle
+    from backend.models import ReconcileResponse
+    
+    invoice, contract = load_sample_data()
+    items = [{**item, "unit_price": round(item["unit_price"] * 1.10, 2)} for item in invoice.model_dump()["items"]]
+    invoice = Invoice(**{**invoice.model_dump(), "currency": "EUR", "items": items})
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    
+    records, partial = engine._reconcile_records(invoice, contract)
+    result = engine.reconcile(invoice, contract)
+    validated = ReconcileResponse.model_validate(result.model_dump(by_alias=True))
+    restored = pickle.loads(pickle.dumps(records))
+    
+    print(f"Records: {len(records)}  Restored equal: {restored == records}")
+    print()
+    
+    return (
+        not partial
+        and result.model_dump_json(by_alias=True) == validated.model_dump_json(by_alias=True)
+        and restored == records
+        and len(records) == result.summary.total_count > 1
+    )
+
+
+def test_stage_timing():
+    """Test opt-in stage instrumentation: stages, counters and unchanged findings."""
+    print("=" * 80)
+    print("TEST 21: Stage Timing (Server-Timing stages and counters)")
+    print("=" * 80)
+    
+    from instrumentation import StageTimer
+    
+    invoice, contract = load_sample_data()
+    renamed = [{**item, "description": item["description"] + " Deluxe"} for item in invoice.model_dump()["items"]]
+    invoice = Invoice(**{**invoice.model_dump(), "items": renamed})
+    engine = ReconcileEngine(fuzzy_threshold=85, allowed_variance_pct=2.0)
+    
+    timer = StageTimer()
+    timed = engine.reconcile(invoice, contract, timer=timer)
+    plain = engine.reconcile(invoice, contract)
+    stages = {stage["name"]: stage for stage in timer.report()}
+    
+    print(f"Server-Timing: {timer.server_timing()}")
+    print()
+    
+    return (
+        timed.model_dump() == plain.model_dump()
+        and {"header_rules", "contract_index", "exact_match", "fuzzy_match", "line_rules"} <= set(stages)
+        and stages["fuzzy_match"]["counters"].get("comparisons", 0) > 0
+        and stages["contract_index"]["counters"] == {"cache_misses": 1}
+        and "fuzzy_match;dur=" in timer.server_timing()
+    )
+
+
+def test_conflicting_lines():
+    """Test optimal assignment maximizes the total score when invoice lines compete for contract lines."""
+    print("=" * 80)
+    print("TEST 22: Conflicting Lines (Optimal total beats greedy)")
+    print("=" * 80)
+    
+    from synthetic import make_conflicts
+    from matching import normalize_description, score_matrix, greedy_assignment, optimal_assignment
+    n_pairs = 50
+    contract, invoice, truth = make_conflicts(n_pairs, seed=3)
+    scores = score_matrix(
+        [normalize_description(line.description) for line in invoice.items],
+        [normalize_description(line.description) for line in contract.line_items],
+        85,
+    )
+    greedy = greedy_assignment(scores, 85)
+    optimal = optimal_assignment(scores, 85)
+    greedy_total = sum(score for _, _, score in greedy)
+    optimal_total = sum(score for _, _, score in optimal)
+    
+    engine_unknown = {
+        strategy: sum(
+            f.type == "UNKNOWN_LINE"
+            for f in ReconcileEngine(fuzzy_threshold=85, match_strategy=strategy).reconcile(invoice, contract).findings
+        )
+        for strategy in ("greedy", "optimal")
+    }
+    
+    print(f"Greedy:  {len(greedy)} matches, total {greedy_total:.1f}")
+    print(f"Optimal: {len(optimal)} matches, total {optimal_total:.1f}")
+    print(f"Engine unknown lines: {engine_unknown}")
+    print()
+    
+    return (
+        optimal_total == 2 * n_pairs
+        and greedy_total < optimal_total
+        and sorted((inv, cont) for inv, cont, _ in optimal) == list(enumerate(truth))
+        and engine_unknown == {"greedy": n_pairs, "optimal": 0}
+    )
+
+
+def test_similarity_cache_blocking():
+    """Test that cached blocked scoring skips taken lines before the top-N cut, like the uncached path."""
+    print("=" * 80)
+    print("TEST 23: Similarity Cache with Blocking (Taken lines don't crowd out candidates)")
+    print("=" * 80)
+    
+    from backend.models import InvoiceLine, ContractLine
+    from similarity_cache import SimilarityCache
+    invoice, contract = load_sample_data()
+    
+    # Every line shares four tokens; the exact matches take the two lowest
+    # ids, which are the top two candidates for the third invoice line
+    contract.line_items = [
+        ContractLine(description="Red Wine Glass Set", unit_price=10.0),
+        ContractLine(description="Red Wine Glass Set Deluxe", unit_price=20.0),
+        ContractLine(description="Red Wine Glass Set Premium", unit_price=30.0),
+    ]
+    invoice.items = [
+        InvoiceLine(description=line.description, quantity=1.0, unit_price=line.unit_price, total_price=line.unit_price)
+        for line in contract.line_items
+    ]
+    invoice.items[2].description = "Red Wine Glass Set Prem"
+    
+    settings = dict(fuzzy_threshold=85, blocking="tokens", blocking_min_lines=0, blocking_candidates=2)
+    expected = ReconcileEngine(**settings).reconcile(invoice, contract).model_dump()
+    cached = ReconcileEngine(**settings, similarity_cache=SimilarityCache(max_mb=1))
+    first = cached.reconcile(invoice, contract).model_dump()
+    second = cached.reconcile(invoice, contract).model_dump()
+    
+    print(f"Uncached findings: {len(expected['findings'])}  Cached: {len(first['findings'])}, {len(second['findings'])}")
+    print(f"Cache stats: {cached.similarity_cache.stats()}")
+    print()
+    
+    return first == expected and second == expected and not expected["findings"]
+
+
 if __name__ == "__main__":
     print("\n🧪 PactProof Reconciliation Tests\n")
     
@@ -245,6 +872,24 @@ if __name__ == "__main__":
         ("Unknown Line", test_unknown_line),
         ("Currency Mismatch", test_currency_mismatch),
         ("Terms Mismatch", test_terms_mismatch),
+        ("Batched Matching Parity", test_batched_matching_parity),
+        ("Optimal Assignment", test_optimal_assignment),
+        ("Contract Index Cache", test_contract_index_cache),
+        ("SKU Tier Match", test_sku_tier_match),
+        ("Blocking Recall", test_blocking_recall),
+        ("Reconcile Many", test_reconcile_many),
+        ("Incremental Delta", test_incremental_delta),
+        ("Contract Routing", test_contract_routing),
+        ("Line Check Edge Cases", test_line_check_edge_cases),
+        ("Similarity Cache", test_similarity_cache),
+        ("Tax Rate Rule", test_tax_rate_rule),
+        ("Quantity Ledger", test_quantity_ledger),
+        ("Result Cache", test_result_cache),
+        ("Triage Mode", test_triage_mode),
+        ("Finding Records", test_finding_records),
+        ("Stage Timing", test_stage_timing),
+        ("Conflicting Lines", test_conflicting_lines),
+        ("Similarity Cache Blocking", test_similarity_cache_blocking),
     ]
     
     results = []
@@ -4,9 +4,13 @@ import {
   Invoice,
   Contract,
   ReconcileResponse,
+  InvoiceLineChange,
+  ReconcileDeltaResponse,
+  RouteResponse,
   ExtractionResponse,
   NoteGenerationRequest,
   NoteGenerationResponse,
+  applyFindingsPatch,
 } from "../types/api";
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
@@ -57,14 +61,67 @@ class ApiClient {
     return response.data;
   }
 
-  async reconcile(invoice: Invoice, contract: Contract): Promise<ReconcileResponse> {
-    const response = await this.client.post("/reconcile", {
-      invoice,
-      contract,
+  async reconcile(
+    invoice: Invoice,
+    contract: Contract,
+    incremental: boolean = false
+  ): Promise<ReconcileResponse> {
+    const response = await this.client.post(
+      "/reconcile",
+      {
+        invoice,
+        contract,
+      },
+      {
+        params: incremental ? { incremental: true } : undefined,
+      }
+    );
+    return response.data;
+  }
+
+  async routeInvoice(invoice: Invoice, limit: number = 3): Promise<RouteResponse> {
+    const response = await this.client.post("/route", invoice, {
+      params: { limit },
+    });
+    return response.data;
+  }
+
+  async reconcileDelta(
+    resultToken: string,
+    changes: InvoiceLineChange[]
+  ): Promise<ReconcileDeltaResponse> {
+    const response = await this.client.post("/reconcile/delta", {
+      result_token: resultToken,
+      changes,
     });
     return response.data;
   }
 
+  async reconcileLineChanges(
+    previous: ReconcileResponse,
+    invoice: Invoice,
+    contract: Contract,
+    changes: InvoiceLineChange[]
+  ): Promise<ReconcileResponse> {
+    // Only the edited lines are re-checked while the server still holds the
+    // session; an unknown or expired token falls back to a full run
+    if (previous.result_token) {
+      try {
+        const delta = await this.reconcileDelta(previous.result_token, changes);
+        return {
+          summary: delta.summary,
+          findings: applyFindingsPatch(previous.findings, delta.patch),
+          result_token: delta.result_token,
+        };
+      } catch (err) {
+        if (!axios.isAxiosError(err) || err.response?.status !== 404) {
+          throw err;
+        }
+      }
+    }
+    return this.reconcile(invoice, contract, true);
+  }
+
   async draftNote(request: NoteGenerationRequest): Promise<NoteGenerationResponse> {
     const response = await this.client.post("/draft_note", request);
     return response.data;
@@ -1,10 +1,65 @@
 import React from "react";
 import { useAppStore } from "../store/appStore";
-import { Invoice, Contract } from "../types/api";
+import { apiClient } from "../api/client";
+import { InvoiceLine } from "../types/api";
 import "../styles/components.css";
 
 export const ExtractionPane: React.FC = () => {
-  const { invoice, contract, setHighlightedFieldPath } = useAppStore();
+  const {
+    invoice,
+    contract,
+    reconcileResult,
+    setInvoice,
+    setReconcileResult,
+    setLoading,
+    setError,
+    setHighlightedFieldPath,
+  } = useAppStore();
+
+  const handleLineEdit = async (idx: number, field: "quantity" | "unit_price", value: string) => {
+    if (!invoice) return;
+    const parsed = parseFloat(value);
+    const current = invoice.items[idx];
+    if (isNaN(parsed) || parsed === current[field]) return;
+
+    const line: InvoiceLine = { ...current, [field]: parsed };
+    if (line.unit_price !== undefined) {
+      line.total_price = line.quantity * line.unit_price;
+    }
+    const updatedInvoice = {
+      ...invoice,
+      items: invoice.items.map((item, i) => (i === idx ? line : item)),
+    };
+    setInvoice(updatedInvoice);
+    if (!contract || !reconcileResult) return;
+
+    try {
+      setLoading(true);
+      const result = await apiClient.reconcileLineChanges(reconcileResult, updatedInvoice, contract, [
+        { index: idx, line },
+      ]);
+      setReconcileResult(result);
+      setError(null);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Reconciliation failed");
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const renderLineInput = (idx: number, field: "quantity" | "unit_price", value: number | undefined) => (
+    <input
+      key={`${field}-${idx}-${value}`}
+      type="number"
+      step="any"
+      className="cell-input"
+      defaultValue={value}
+      onBlur={(e) => handleLineEdit(idx, field, e.target.value)}
+      onKeyDown={(e) => {
+        if (e.key === "Enter") e.currentTarget.blur();
+      }}
+    />
+  );
 
   const renderInvoiceFields = () => {
     if (!invoice) return <div className="placeholder">No invoice extracted</div>;
@@ -57,8 +112,8 @@ export const ExtractionPane: React.FC = () => {
               <tr key={idx} onMouseEnter={() => setHighlightedFieldPath(`items[${idx}].description`)}>
                 <td>{idx + 1}</td>
                 <td className="truncate">{item.description.substring(0, 40)}...</td>
-                <td>{item.quantity}</td>
-                <td>${(item.unit_price || 0).toFixed(2)}</td>
+                <td>{renderLineInput(idx, "quantity", item.quantity)}</td>
+                <td>{renderLineInput(idx, "unit_price", item.unit_price)}</td>
                 <td>${item.total_price.toFixed(2)}</td>
               </tr>
             ))}
@@ -22,7 +22,7 @@ export const FindingsPane: React.FC = () => {
 
     try {
       setLoading(true);
-      const result = await apiClient.reconcile(invoice, contract);
+      const result = await apiClient.reconcile(invoice, contract, true);
       setReconcileResult(result);
       setError(null);
     } catch (err) {
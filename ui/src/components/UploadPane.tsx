@@ -56,7 +56,7 @@ export const UploadPane: React.FC = () => {
 
       if (autoProcessing && parsedInvoice && parsedContract) {
         try {
-          const reconcileResult = await apiClient.reconcile(parsedInvoice, parsedContract);
+          const reconcileResult = await apiClient.reconcile(parsedInvoice, parsedContract, true);
           setReconcileResult(reconcileResult);
 
           const noteResponse = await apiClient.draftNote({
@@ -75,12 +75,15 @@ export type FindingType =
 
 export type FindingSeverity = "MAJOR" | "MINOR";
 
+export type MatchTier = "SKU" | "EXACT" | "FUZZY";
+
 export interface Finding {
   type: FindingType;
   severity: FindingSeverity;
   details: string;
   invoice_line_idx?: number;
   contract_line_idx?: number;
+  match_tier?: MatchTier;
   evidence_page?: number;
   evidence_boxes: Box[];
 }
@@ -90,11 +93,52 @@ export interface ReconcileSummary {
   major_count: number;
   minor_count: number;
   total_count: number;
+  partial?: boolean;
+}
+
+export interface StageTiming {
+  name: string;
+  duration_ms: number;
+  counters: Record<string, number>;
 }
 
 export interface ReconcileResponse {
   summary: ReconcileSummary;
   findings: Finding[];
+  result_token?: string;
+  diagnostics?: StageTiming[] | null;
+}
+
+export interface InvoiceLineChange {
+  index: number;
+  line: InvoiceLine;
+}
+
+export interface FindingPatchOp {
+  op: "add" | "remove";
+  path: string;
+  value?: Finding;
+}
+
+export interface ReconcileDeltaResponse {
+  result_token: string;
+  summary: ReconcileSummary;
+  patch: FindingPatchOp[];
+}
+
+export interface ContractRoute {
+  contract_id: string;
+  vendor_name: string;
+  client_name: string;
+  coverage: number;
+  matched_lines: number;
+  vendor_score: number;
+  client_match: boolean;
+  currency_match: boolean;
+}
+
+export interface RouteResponse {
+  candidates: ContractRoute[];
 }
 
 export interface ParseResult {
@@ -123,6 +167,21 @@ export interface NoteGenerationResponse {
 }
 
 // Utility functions
+export function applyFindingsPatch(findings: Finding[], patch: FindingPatchOp[]): Finding[] {
+  // Ops come in the order the server emitted them; each path refers to the
+  // list as the previous op left it
+  const next = [...findings];
+  for (const op of patch) {
+    const index = Number(op.path.split("/").pop());
+    if (op.op === "remove") {
+      next.splice(index, 1);
+    } else if (op.value) {
+      next.splice(index, 0, op.value);
+    }
+  }
+  return next;
+}
+
 export function normalizeCoordinate(value: number): number {
   return Math.max(0, Math.min(1, value));
 }